@@ -0,0 +1,186 @@
+# admission.py
+
+# Controle de admissão do Master: limita o backlog da scheduler em vez de deixá-lo crescer sem
+# fim sob sobrecarga. Decide na chegada (aceita, rejeita, retém ou descarta uma tarefa de menor
+# prioridade para abrir espaço) e na saída da fila (prazo vencido = descartada sem executar),
+# e sinaliza pressão à fonte de chegadas com histerese.
+
+ADMITTED = "admitted"
+REJECTED = "rejected"
+BLOCKED = "blocked"      # overflow="block": a chegada fica retida e a fonte não é mais lida
+
+OVERFLOW_MODES = ("reject", "block")
+HIGH_WATERMARK = 0.9     # fração de max_backlog que liga o sinal de pressão
+LOW_WATERMARK = 0.5      # fração que o desliga
+
+
+class AdmissionControl:
+    """
+    Política de admissão de uma execução (um objeto por Master; guarda os contadores):
+      max_backlog      tarefas na scheduler (None = sem limite)
+      priority_limits  {prioridade: máximo na scheduler} (prioridades ausentes sem limite)
+      shed             backlog cheio: a chegada de prioridade melhor (número menor) que a pior
+                       da fila descarta uma tarefa dessa pior prioridade em vez de ser rejeitada
+      drop_expired     tarefas com 'deadline' (s após a chegada) vencido ao sair da fila são
+                       descartadas sem executar
+      overflow         "reject" descarta a chegada que não cabe; "block" a retém e para de ler
+                       a fonte até abrir espaço (pressão de volta a quem gera as tarefas)
+    O descarte por shed é preguiçoso: a prioridade ganha uma cota e a próxima tarefa nova dela
+    que sair da scheduler é descartada, então funciona com qualquer política da scheduler.
+    Só chegadas que ainda não saíram da fila são descartadas (por shed ou prazo): uma tarefa
+    que volta à fila (preemptada, recuperada de um worker) já foi aceita e vai até o fim.
+    """
+
+    def __init__(self, max_backlog=None, priority_limits=None, shed=False, drop_expired=False,
+                 overflow="reject", high_watermark=HIGH_WATERMARK, low_watermark=LOW_WATERMARK):
+        if overflow not in OVERFLOW_MODES:
+            raise ValueError("Unknown overflow mode: " + str(overflow))
+        self.max_backlog = max_backlog
+        self.priority_limits = dict(priority_limits or {})
+        self.shed = shed
+        self.drop_expired = drop_expired
+        self.overflow = overflow
+        self.high = high_watermark
+        self.low = low_watermark
+
+        self.to_shed = {}        # prioridade -> tarefas na scheduler já marcadas para descarte
+        self.pending_shed = 0
+        self.fresh = {}          # prioridade -> chegadas admitidas que ainda não saíram da scheduler
+        self.pressure = False    # sinal de pressão atual (ver update_pressure)
+        self.held = None         # chegada retida (overflow="block"), reavaliada até caber
+        self.pressure_changes = 0
+
+        self.admitted = 0
+        self.rejected = {"backlog": 0, "priority": 0}
+        self.blocked = 0         # chegadas retidas ao menos uma vez (overflow="block")
+        self.shed_count = 0
+        self.expired = 0
+        self.on_time = 0         # concluídas dentro do prazo (ou sem prazo)
+        self.late = 0            # concluídas depois do prazo
+
+    # -------------------------
+    # chegada
+    # -------------------------
+    def backlog(self, scheduler):
+        """Tarefas na scheduler que ainda vão executar (sem as marcadas para descarte)."""
+        return len(scheduler) - self.pending_shed
+
+    def queued(self, scheduler, prioridade):
+        return scheduler.counts.get(prioridade, 0) - self.to_shed.get(prioridade, 0)
+
+    def admit(self, task, scheduler):
+        """Decide a chegada de 'task': ADMITTED (o chamador a põe na scheduler), REJECTED ou BLOCKED."""
+        p = task.get("prioridade")
+        limit = self.priority_limits.get(p)
+        if limit is not None and self.queued(scheduler, p) >= limit:
+            return self._overflow("priority", task)
+        if self.max_backlog is not None and self.backlog(scheduler) >= self.max_backlog:
+            victim = self._shed_victim(scheduler, p) if self.shed else None
+            if victim is None:
+                return self._overflow("backlog", task)
+            self.to_shed[victim] = self.to_shed.get(victim, 0) + 1
+            self.pending_shed += 1
+        self.admitted += 1
+        self.fresh[p] = self.fresh.get(p, 0) + 1
+        task["fresh"] = True     # retirado na primeira saída da fila (on_pop)
+        if task is self.held:
+            self.held = None
+        return ADMITTED
+
+    def _overflow(self, reason, task):
+        if self.overflow == "block":
+            # cada chegada retida conta uma vez, por mais que seja reavaliada
+            if task is not self.held:
+                self.held = task
+                self.blocked += 1
+            return BLOCKED
+        self.rejected[reason] += 1
+        return REJECTED
+
+    def _shed_victim(self, scheduler, p):
+        # pior prioridade (maior número) com chegadas novas na fila e pior que a da chegada; cada
+        # unidade da cota corresponde a uma chegada nova ainda na fila, então a cota sempre se cumpre
+        worst = None
+        for q, n in self.fresh.items():
+            if q is None or p is None or q <= p:
+                continue
+            if n - self.to_shed.get(q, 0) > 0 and (worst is None or q > worst):
+                worst = q
+        return worst
+
+    # -------------------------
+    # saída da fila e conclusão
+    # -------------------------
+    def on_pop(self, task, now):
+        """
+        Tarefa saiu da scheduler. False = descartada (cota de shed ou prazo vencido), não executar.
+        Tarefas que voltaram à fila depois de despachadas nunca são descartadas.
+        """
+        if not task.pop("fresh", False):
+            return True
+        p = task.get("prioridade")
+        self.fresh[p] -= 1
+        if self.to_shed.get(p):
+            self.to_shed[p] -= 1
+            self.pending_shed -= 1
+            self.shed_count += 1
+            return False
+        if self.drop_expired:
+            deadline = task.get("deadline")
+            arrival = task.get("arrival_time")
+            if deadline is not None and arrival is not None and now > arrival + deadline:
+                self.expired += 1
+                return False
+        return True
+
+    def completed(self, task, end):
+        deadline = task.get("deadline")
+        arrival = task.get("arrival_time")
+        if deadline is not None and arrival is not None and end > arrival + deadline:
+            self.late += 1
+        else:
+            self.on_time += 1
+
+    @property
+    def dropped(self):
+        """Tarefas admitidas que saíram sem executar (shed + prazo vencido)."""
+        return self.shed_count + self.expired
+
+    # -------------------------
+    # pressão
+    # -------------------------
+    def update_pressure(self, scheduler):
+        """
+        Recalcula o sinal de pressão pelo backlog (histerese entre low e high * max_backlog;
+        sem max_backlog, pelos limites por prioridade). Retorna True se o sinal mudou.
+        """
+        if self.max_backlog is not None:
+            level = self.backlog(scheduler) / max(1, self.max_backlog)
+        elif self.priority_limits:
+            level = max(self.queued(scheduler, p) / max(1, lim) for p, lim in self.priority_limits.items())
+        else:
+            return False
+        if not self.pressure and level >= self.high:
+            self.pressure = True
+        elif self.pressure and level <= self.low:
+            self.pressure = False
+        else:
+            return False
+        self.pressure_changes += 1
+        return True
+
+    def summary(self, total_time):
+        rejected = sum(self.rejected.values())
+        return {
+            "admitted": self.admitted,
+            "rejected": rejected,
+            "rejected_backlog": self.rejected["backlog"],
+            "rejected_priority": self.rejected["priority"],
+            "blocked": self.blocked,
+            "shed": self.shed_count,
+            "expired": self.expired,
+            "on_time": self.on_time,
+            "late": self.late,
+            "goodput": self.on_time / max(total_time, 1e-6),
+            "pressure_changes": self.pressure_changes,
+        }
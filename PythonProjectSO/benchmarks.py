@@ -0,0 +1,1084 @@
+# benchmarks.py
+import argparse
+import contextlib
+import csv
+import io
+import json
+import os
+import platform
+import random
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import urllib.request
+import multiprocessing as mp
+from master import Master
+from simulation import SimMaster
+from eventlog import EventLog
+from workload import make_workload, specialized_servers, BackpressureSource, WORKLOADS
+from admission import AdmissionControl
+from exporter import MetricsExporter
+from pool import WorkerPool
+from monitor import SystemMonitor
+from statetable import WorkerStateTable
+from worker import simulate_cpu_work, calibrate, EXEC_THREAD, EXEC_PROCESS, KERNELS, KERNEL_PYTHON
+from load_index import LoadIndex
+from scheduler import Scheduler, POLICIES
+from results import ResultStore, quantile_summary
+from protocol import EventChannel, EV_STARTED, EV_DONE, pack_event, unpack_events
+
+# Os resultados dependem do host: o trabalho simulado é calibrado na máquina (worker.calibrate),
+# então tempos, vazões e unidades de CPU só se comparam entre execuções no mesmo host (meta
+# "platform"/"cpus" de cada arquivo; compare avisa quando diferem). Com o modo padrão
+# (cpu_work="time") cada tarefa dura tempo_exec e a quantidade de trabalho varia com a disputa;
+# cpu_work="fixed" fixa o trabalho e deixa o tempo variar.
+
+REGRESSION_THRESHOLD = 0.10   # piora relativa a partir da qual compare acusa regressão
+QUICK = False                 # --quick: versões menores dos benchmarks mais longos
+CHECK_FAILURES = []           # verificações de corretude que falharam (o 'run' sai com código 1)
+
+
+def _quiet_run(m):
+    # os prints por evento do Master não interessam ao benchmark
+    with contextlib.redirect_stdout(io.StringIO()):
+        m.run()
+    return m
+
+
+def bench_dispatch_latency(num_tasks=200, tempo_exec=0.002, poll_interval=None):
+    """
+    Latência de reação do Master: um único servidor de capacidade 1 recebe tarefas curtas em
+    sequência; para cada tarefa mede-se o intervalo entre o 'done' da anterior (timestamp do
+    worker) e a atribuição da seguinte. Também mede o tempo de CPU gasto pelo processo master.
+    """
+    servers = [{"id": 1, "capacidade": 1}]
+    tasks = [{"id": i, "tipo": "nlp", "prioridade": 1, "tempo_exec": tempo_exec} for i in range(num_tasks)]
+    m = Master(servers, tasks, policy="RR", realtime=False, poll_interval=poll_interval)
+
+    cpu0 = time.process_time()
+    _quiet_run(m)
+    cpu = time.process_time() - cpu0
+
+    ends = sorted(m.completed_log.column("end"))
+    assigned = sorted(m.assigned_log.time)
+    # a tarefa k+1 só pode ser atribuída depois do 'done' da tarefa k
+    lat = sorted(a - e for e, a in zip(ends, assigned[1:]))
+    wall = m.end_time - m.start_time
+    return {
+        "tasks": num_tasks,
+        "wall_s": wall,
+        "master_cpu_s": cpu,
+        "lat_p50_ms": lat[len(lat) // 2] * 1000,
+        "lat_p99_ms": lat[int(len(lat) * 0.99)] * 1000,
+    }
+
+
+def main_dispatch_latency():
+    results = {}
+    for label, poll in (("polling 20ms (legado)", 0.02), ("orientado a eventos", None)):
+        r = results[label] = bench_dispatch_latency(poll_interval=poll)
+        print(f"{label:24s} | wall {r['wall_s']:6.2f}s | CPU master {r['master_cpu_s']:5.2f}s | "
+              f"latência p50 {r['lat_p50_ms']:7.3f} ms | p99 {r['lat_p99_ms']:7.3f} ms")
+    return results
+
+
+def bench_slot_scaling(total_capacity, exec_mode, seconds=1.0, kernel=KERNEL_PYTHON):
+    """
+    Vazão de CPU (unidades de trabalho/s) com 'total_capacity' slots executando simulate_cpu_work
+    ao mesmo tempo, como um worker faria em cada modo de execução. Cada slot usa capacity=1, então
+    um slot com um núcleo só para si faz UNIT_OPS unidades/s com qualquer kernel.
+    """
+    calibrate(kernel)   # antes de criar o pool: os processos filhos herdam a taxa medida
+    t0 = time.perf_counter()
+    if exec_mode == EXEC_PROCESS:
+        with mp.Pool(processes=total_capacity) as pool:
+            ops = sum(pool.starmap(simulate_cpu_work, [(seconds, 1, 1, kernel)] * total_capacity))
+    else:
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(simulate_cpu_work(seconds, 1, 1, kernel)))
+                   for _ in range(total_capacity)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        ops = sum(results)
+    return ops / (time.perf_counter() - t0)
+
+
+def main_slot_scaling():
+    cores = os.cpu_count() or 1
+    results = {}
+    for cap in range(1, cores + 2):
+        row = []
+        r = results[f"capacidade {cap}"] = {}
+        for mode in (EXEC_THREAD, EXEC_PROCESS):
+            for kernel in KERNELS:
+                key = f"{mode.lower()}_ops_per_s" if kernel == KERNEL_PYTHON else f"{mode.lower()}_{kernel}_ops_per_s"
+                rate = r[key] = bench_slot_scaling(cap, mode, kernel=kernel)
+                row.append(f"{mode} {kernel} {rate / 1e6:6.3f} Munid/s")
+        print(f"capacidade total {cap:3d} (núcleos: {cores}) | " + " | ".join(row))
+    return results
+
+
+def _legacy_cpu_work(seconds, peso_cpu, capacity):
+    # simulate_cpu_work anterior: blocos de 50_000 * peso * capacidade iterações entre leituras do
+    # relógio, então a última volta passa do prazo por até um bloco inteiro
+    end = time.time() + seconds
+    ops = int(50_000 * peso_cpu * capacity)
+    done = 0
+    while time.time() < end:
+        x = 0
+        for i in range(ops):
+            x += i * i
+        done += ops
+    return done
+
+
+CPU_WORK_TIMES = (0.002, 0.01, 0.05, 0.2)
+CPU_WORK_CAPACITIES = (1, 4, 16)
+
+
+def bench_cpu_work(fn, seconds, capacity, repeats=5):
+    """
+    Exatidão do trabalho simulado: tempo real de fn(seconds, 1, capacity) comparado ao pedido.
+    Retorna o erro médio e o pior erro (ms) e a variação relativa das unidades retornadas.
+    """
+    errors = []
+    units = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        units.append(fn(seconds, 1, capacity))
+        errors.append(time.perf_counter() - t0 - seconds)
+    mean_units = sum(units) / len(units)
+    return {"err_mean_ms": sum(errors) / len(errors) * 1e3, "err_max_ms": max(errors) * 1e3,
+            "units_spread_pct": (max(units) - min(units)) / mean_units * 100 if mean_units else 0.0}
+
+
+def main_cpu_work():
+    for kernel in KERNELS:
+        calibrate(kernel)
+    results = {}
+    for seconds in CPU_WORK_TIMES:
+        for cap in CPU_WORK_CAPACITIES:
+            row = []
+            for name, fn in (("antigo", _legacy_cpu_work), ("calibrado", simulate_cpu_work)):
+                r = results[f"{name} {seconds * 1e3:g} ms x capacidade {cap}"] = bench_cpu_work(fn, seconds, cap)
+                row.append(f"{name} erro {r['err_mean_ms']:8.3f} ms (máx {r['err_max_ms']:8.3f})")
+            print(f"tempo_exec {seconds * 1e3:5g} ms | capacidade {cap:2d} | " + " | ".join(row))
+    return results
+
+
+_SAMPLE_TASK = {"id": 101, "tipo": "visao_computacional", "prioridade": 1, "tempo_exec": 3, "peso_cpu": 1,
+                "arrival_time": 1.7e9}
+
+
+def _produce_dict_events(out_queue, n):
+    # formato antigo: dois dicts por tarefa, cada um carregando a tarefa inteira, via mp.Queue
+    for _ in range(n // 2):
+        out_queue.put({"type": "started", "task": _SAMPLE_TASK, "worker": 1, "time": time.time()})
+        out_queue.put({"type": "done", "task": _SAMPLE_TASK, "worker": 1, "time": time.time()})
+
+
+def _produce_struct_events(out_channel, n):
+    for i in range(n // 2):
+        out_channel.send(pack_event(EV_STARTED, 1, i, time.time()))
+        out_channel.send(pack_event(EV_DONE, 1, i, time.time()))
+
+
+def bench_event_wire(n=100_000):
+    """Eventos/s entre um processo worker e o master: dicts via mp.Queue vs registros struct."""
+    results = {}
+
+    q = mp.Queue()
+    p = mp.Process(target=_produce_dict_events, args=(q, n))
+    t0 = time.perf_counter()
+    p.start()
+    for _ in range(n):
+        q.get()
+    results["pickle_dict_queue"] = n / (time.perf_counter() - t0)
+    p.join()
+
+    ch = EventChannel()
+    p = mp.Process(target=_produce_struct_events, args=(ch, n))
+    t0 = time.perf_counter()
+    p.start()
+    received = 0
+    while received < n:
+        received += len(unpack_events(ch.recv()))
+    results["struct_pipe"] = n / (time.perf_counter() - t0)
+    p.join()
+    return results
+
+
+def main_event_wire():
+    results = {}
+    for label, rate in bench_event_wire().items():
+        results[label] = {"events_per_s": rate}
+        print(f"{label:20s} | {rate:12,.0f} eventos/s")
+    return results
+
+
+def bench_batching(num_tasks=100_000, batch_size=1, flush_interval=0.002, servers=4, capacity=16):
+    """Throughput do Master com tarefas de custo zero, variando o tamanho do lote de eventos."""
+    servers = [{"id": i, "capacidade": capacity} for i in range(1, servers + 1)]
+    tasks = [{"id": i, "tipo": "nlp", "prioridade": 1, "tempo_exec": 0} for i in range(num_tasks)]
+    m = Master(servers, tasks, policy="RR", realtime=False, batch_size=batch_size, flush_interval=flush_interval)
+    _quiet_run(m)
+    return num_tasks / (m.end_time - m.start_time)
+
+
+def main_batching(num_tasks=100_000):
+    results = {}
+    for batch_size in (1, 16, 64):
+        rate = bench_batching(num_tasks, batch_size=batch_size)
+        results[f"batch_size {batch_size}"] = {"tasks_per_s": rate}
+        print(f"batch_size {batch_size:3d} | {rate:10,.0f} tarefas/s")
+    return results
+
+
+def bench_server_selection(num_servers=1_000, num_tasks=100_000, indexed=True, seed=1):
+    """
+    Custo de escolher o servidor de cada tarefa com o cluster cheio: a cada passo uma tarefa
+    termina num servidor aleatório e a próxima é despachada. indexed=False reproduz a
+    seleção antiga (ordenar todos os servidores por carga a cada chamada de dispatch).
+    """
+    rng = random.Random(seed)
+    capacity = {sid: rng.randint(1, 8) for sid in range(num_servers)}
+    load = dict(capacity)   # começa com todos os slots ocupados
+    busy = [sid for sid, c in capacity.items() for _ in range(c)]
+    index = LoadIndex(capacity)
+    for sid in capacity:
+        index.update(sid, load[sid])
+
+    t0 = time.perf_counter()
+    for _ in range(num_tasks):
+        # conclusão em um servidor aleatório
+        i = rng.randrange(len(busy))
+        busy[i], busy[-1] = busy[-1], busy[i]
+        freed = busy.pop()
+        load[freed] -= 1
+        if indexed:
+            index.update(freed, load[freed])
+            sid = index.least_loaded()
+        else:
+            order = sorted(capacity, key=lambda s: load[s] / capacity[s])
+            sid = next(s for s in order if load[s] < capacity[s])
+        load[sid] += 1
+        busy.append(sid)
+        if indexed:
+            index.update(sid, load[sid])
+    return num_tasks / (time.perf_counter() - t0)
+
+
+def main_server_selection():
+    results = {}
+    for label, indexed in (("sort por dispatch (antigo)", False), ("LoadIndex (heap)", True)):
+        rate = bench_server_selection(indexed=indexed)
+        results[label] = {"dispatch_per_s": rate}
+        print(f"{label:28s} | 1.000 servidores | {rate:12,.0f} despachos/s")
+    return results
+
+
+def bench_monitor_sampling(num_workers=20, rounds=50, table=False):
+    """
+    Custo (ms) de um ciclo de amostragem do SystemMonitor com 'num_workers' processos ativos:
+    psutil por processo ou (table=True) leitura da tabela de estado em memória compartilhada.
+    """
+    procs = {i: mp.Process(target=time.sleep, args=(60,), daemon=True) for i in range(num_workers)}
+    for p in procs.values():
+        p.start()
+    state = WorkerStateTable(num_workers) if table else None
+    try:
+        if state is not None:
+            for i, p in procs.items():
+                state.cols["pid"][i] = p.pid
+            mon = SystemMonitor(procs, state=state, rows={i: i for i in procs})
+        else:
+            mon = SystemMonitor(procs)
+        mon.sample()   # arma os contadores
+        t0 = time.perf_counter()
+        for _ in range(rounds):
+            mon.sample()
+        return (time.perf_counter() - t0) / rounds * 1000
+    finally:
+        for p in procs.values():
+            p.terminate()
+        if state is not None:
+            state.close()
+
+
+def main_monitor_sampling():
+    ms = bench_monitor_sampling()
+    table_ms = bench_monitor_sampling(table=True)
+    print(f"20 workers | psutil {ms:.3f} ms | tabela compartilhada {table_ms:.3f} ms por ciclo de amostragem")
+    return {"20 workers": {"sample_ms": ms}, "20 workers (tabela)": {"sample_ms": table_ms}}
+
+
+def bench_shared_state(shared, num_tasks, tempo_exec, batch_size, flush_interval=0.01, servers=4,
+                       capacity=4, repeats=3):
+    """
+    Master com a carga dos workers lida da tabela compartilhada (shared=True) ou inferida só dos
+    eventos. Com lotes de eventos a contagem por eventos atrasa até flush_interval e os slots
+    liberados ficam ociosos; a tabela mostra o slot livre assim que a tarefa termina.
+    """
+    servers = [{"id": i, "capacidade": capacity} for i in range(1, servers + 1)]
+    best = None
+    with WorkerPool() as pool:
+        for run in range(repeats + 1):
+            tasks = [{"id": i, "tipo": "nlp", "prioridade": 1, "tempo_exec": tempo_exec} for i in range(num_tasks)]
+            m = Master(servers, tasks, realtime=False, use_monitor=False, verbose=False, pool=pool,
+                       shared_state=shared, batch_size=batch_size, flush_interval=flush_interval)
+            m.run()
+            if run == 0:
+                continue   # a primeira execução cria os workers e não conta
+            wall = m.end_time - m.start_time
+            best = wall if best is None else min(best, wall)
+    return {"makespan_s": best, "tasks_per_s": num_tasks / best}
+
+
+SHARED_STATE_CASES = (
+    ("tarefas vazias, sem lote", 20_000, 0.0, 1),
+    ("tarefas de 2 ms, lotes de 16", 2_000, 0.002, 16),
+)
+
+
+def main_shared_state():
+    results = {}
+    for label, n, tempo_exec, batch_size in SHARED_STATE_CASES:
+        for shared in (False, True):
+            r = results[f"{label} | {'tabela' if shared else 'eventos'}"] = bench_shared_state(
+                shared, n, tempo_exec, batch_size)
+            print(f"{label:30s} | {'tabela ' if shared else 'eventos'} | makespan {r['makespan_s']:6.3f}s | "
+                  f"{r['tasks_per_s']:8.0f} tarefas/s")
+    return results
+
+
+def bench_result_storage(n=1_000_000, columnar=True, seed=1):
+    """
+    Memória (MB) e tempos (s) para guardar 'n' registros de tarefa, resumi-los e escrevê-los em
+    CSV: lista de dicts (formato antigo do completed_log) vs ResultStore colunar.
+    """
+    rng = random.Random(seed)
+    tipos = ["nlp", "voz", "visao_computacional"]
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    if columnar:
+        log = ResultStore()
+        for i in range(n):
+            a = i * 0.01
+            s = a + rng.random()
+            log.append(i, i % 8, a, a, s, s + rng.random(), i % 3 + 1, tipos[i % 3])
+    else:
+        log = []
+        for i in range(n):
+            a = i * 0.01
+            s = a + rng.random()
+            e = s + rng.random()
+            log.append({"task_id": i, "worker_id": i % 8, "arrival": a, "dispatch": a, "start": s, "end": e,
+                        "wait": s - a, "runtime": e - s, "response": e - a,
+                        "prioridade": i % 3 + 1, "tipo": tipos[i % 3]})
+    build = time.perf_counter() - t0
+    mem = tracemalloc.get_traced_memory()[0] / (1024 * 1024)
+    tracemalloc.stop()
+
+    t0 = time.perf_counter()
+    if columnar:
+        log.summary()
+    else:
+        for field in ("response", "wait", "runtime"):
+            quantile_summary([r[field] for r in log])
+    summary = time.perf_counter() - t0
+
+    keys = ["task_id", "worker_id", "arrival", "dispatch", "start", "end", "wait", "runtime",
+            "response", "prioridade", "tipo"]
+    t0 = time.perf_counter()
+    out = io.StringIO()
+    if columnar:
+        csv.writer(out).writerows(log.rows(keys))
+    else:
+        writer = csv.DictWriter(out, fieldnames=keys)
+        for r in log:
+            writer.writerow({k: r.get(k, "") for k in keys})
+    write = time.perf_counter() - t0
+    return {"mem_mb": mem, "build_s": build, "summary_s": summary, "csv_s": write}
+
+
+def main_result_storage(n=None):
+    n = n or (100_000 if QUICK else 1_000_000)
+    results = {}
+    for label, columnar in (("lista de dicts", False), ("colunar (array)", True)):
+        r = results[label] = bench_result_storage(n, columnar)
+        print(f"{label:16s} | {n} registros | memória {r['mem_mb']:7.1f} MB | montagem {r['build_s']:5.2f}s | "
+              f"resumo {r['summary_s']:5.2f}s | CSV {r['csv_s']:5.2f}s")
+    return results
+
+
+def bench_scheduler(policy, n=1_000_000, seed=1):
+    """Operações push/pop por segundo do Scheduler com 'n' tarefas (todas enfileiradas, depois retiradas)."""
+    rng = random.Random(seed)
+    tipos = ["nlp", "voz", "visao_computacional"]
+    tasks = [{"id": i, "tipo": tipos[i % 3], "prioridade": rng.randint(1, 3), "tempo_exec": rng.uniform(0.1, 5.0),
+              "arrival_time": i * 0.001, "deadline": rng.uniform(1.0, 30.0), "preemptions": rng.randint(0, 2)}
+             for i in range(n)]
+    s = Scheduler(policy)
+    t0 = time.perf_counter()
+    for t in tasks:
+        s.push(t)
+    push = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    while s.pop() is not None:
+        pass
+    pop = time.perf_counter() - t0
+    return {"push_per_s": n / push, "pop_per_s": n / pop}
+
+
+def main_scheduler(n=None):
+    n = n or (100_000 if QUICK else 1_000_000)
+    results = {}
+    for policy in POLICIES:
+        r = results[policy] = bench_scheduler(policy, n)
+        print(f"{policy:8s} | {n} tarefas | push {r['push_per_s'] / 1e6:5.2f} M/s | pop {r['pop_per_s'] / 1e6:5.2f} M/s")
+    return results
+
+
+def bench_preemption(quantum=None, num_long=6, num_short=40, long_s=1.0, short_s=0.05):
+    """
+    Tarefas longas (visao_computacional) e curtas (nlp) chegando juntas a um servidor de
+    capacidade 2, com e sem quantum: latência das curtas, preempções e custo de cada troca.
+    """
+    servers = [{"id": 1, "capacidade": 2}]
+    tasks = [{"id": i, "tipo": "visao_computacional", "prioridade": 1, "tempo_exec": long_s} for i in range(num_long)]
+    tasks += [{"id": num_long + i, "tipo": "nlp", "prioridade": 1, "tempo_exec": short_s} for i in range(num_short)]
+    m = _quiet_run(Master(servers, tasks, policy="RR", realtime=False, quantum=quantum, use_monitor=False))
+    short = m.stats.summary("tipo", "nlp")["response"]
+    sw = m.switch_cost.summary()
+    return {
+        "short_p50_s": short["p50"],
+        "short_p99_s": short["p99"],
+        "wall_s": m.end_time - m.start_time,
+        "preemptions": m.preemptions,
+        "switch_mean_ms": sw["mean"] * 1000,
+        "switch_p99_ms": sw["p99"] * 1000,
+    }
+
+
+def main_preemption():
+    results = {}
+    for quantum in (None, 0.2, 0.05):
+        r = results[f"quantum {quantum}"] = bench_preemption(quantum)
+        print(f"quantum {str(quantum):5s} | nlp p50 {r['short_p50_s']:5.2f}s | p99 {r['short_p99_s']:5.2f}s | "
+              f"wall {r['wall_s']:5.2f}s | preempções {r['preemptions']:4d} | "
+              f"troca média {r['switch_mean_ms']:5.2f} ms | p99 {r['switch_p99_ms']:5.2f} ms")
+    return results
+
+
+def bench_work_stealing(prefetch=2, steal=True, num_tasks=14, long_s=0.8, short_s=0.2):
+    """
+    Makespan com capacidades heterogêneas e tempo_exec assimétrico (tarefas longas e curtas
+    alternadas, chegando juntas). Com prefetch, tarefas esperam na fila local do worker; sem
+    roubo elas ficam presas lá (ex.: atrás de uma longa no worker de capacidade 1) mesmo com
+    outros workers ociosos.
+    """
+    servers = [{"id": 1, "capacidade": 4}, {"id": 2, "capacidade": 2}, {"id": 3, "capacidade": 1}]
+    tasks = [{"id": i, "tipo": "nlp", "prioridade": 1, "tempo_exec": long_s if i % 2 == 0 else short_s}
+             for i in range(num_tasks)]
+    m = _quiet_run(Master(servers, tasks, policy="RR", realtime=False, use_monitor=False,
+                          prefetch=prefetch, steal=steal))
+    return {"makespan_s": m.end_time - m.start_time, "reclaimed": m.reclaimed, "completed": m.stats.count()}
+
+
+def main_work_stealing(repeats=3):
+    results = {}
+    for label, prefetch, steal in (("sem prefetch", 0, False), ("prefetch 2, sem roubo", 2, False),
+                                   ("prefetch 2, com roubo", 2, True)):
+        runs = [bench_work_stealing(prefetch, steal) for _ in range(repeats)]
+        makespan = sum(r["makespan_s"] for r in runs) / repeats
+        results[label] = {"makespan_s": makespan, "completed": runs[-1]["completed"],
+                          "reclaimed": runs[-1]["reclaimed"]}
+        print(f"{label:22s} | makespan médio {makespan:5.2f}s ({repeats} execuções) | "
+              f"concluídas {runs[-1]['completed']} | recolhidas {runs[-1]['reclaimed']}")
+    return results
+
+
+def bench_pool_reuse(num_workers=64, runs=5, num_tasks=128, shared=True):
+    """
+    'runs' execuções seguidas com 'num_workers' servidores de capacidade 1 e tarefas curtas:
+    processos novos a cada Master vs um WorkerPool compartilhado. Mede o tempo até os workers
+    estarem prontos para receber tarefas (spawn_workers) e o tempo total das execuções.
+    """
+    servers = [{"id": i, "capacidade": 1} for i in range(1, num_workers + 1)]
+    pool = WorkerPool() if shared else None
+    startup = []
+    t0 = time.perf_counter()
+    try:
+        for _ in range(runs):
+            tasks = [{"id": i, "tipo": "nlp", "prioridade": 1, "tempo_exec": 0.001} for i in range(num_tasks)]
+            m = Master(servers, tasks, realtime=False, use_monitor=False, pool=pool)
+            spawn = m.spawn_workers
+            def timed_spawn():
+                s0 = time.perf_counter()
+                spawn()
+                startup.append(time.perf_counter() - s0)
+            m.spawn_workers = timed_spawn
+            _quiet_run(m)
+    finally:
+        if pool is not None:
+            pool.close()
+    return {
+        "total_s": time.perf_counter() - t0,
+        "first_startup_ms": startup[0] * 1000,
+        "warm_startup_ms": sum(startup[1:]) / max(1, len(startup) - 1) * 1000,
+    }
+
+
+def main_pool_reuse():
+    results = {}
+    for label, shared in (("processos novos", False), ("WorkerPool compartilhado", True)):
+        r = results[label] = bench_pool_reuse(shared=shared)
+        print(f"{label:24s} | 64 workers x 5 execuções | total {r['total_s']:5.2f}s | "
+              f"startup 1ª {r['first_startup_ms']:7.1f} ms | seguintes {r['warm_startup_ms']:7.1f} ms")
+    return results
+
+
+def bench_fault_recovery(faults=True, num_tasks=120, tempo_exec=0.05, kill_at=0.5, stop_at=1.0,
+                         heartbeat_interval=0.2, heartbeat_timeout=1.0):
+    """
+    Injeção de falhas: durante a execução o worker 1 é morto (SIGKILL) e o worker 2 é congelado
+    (SIGSTOP, simula um processo travado). Mede se todas as tarefas terminam exatamente uma vez,
+    o makespan e, por falha, o tempo até a detecção e até o worker recriado estar disponível.
+    """
+    servers = [{"id": 1, "capacidade": 2}, {"id": 2, "capacidade": 2}, {"id": 3, "capacidade": 2}]
+    tasks = [{"id": i, "tipo": "nlp", "prioridade": 1, "tempo_exec": tempo_exec} for i in range(num_tasks)]
+    m = Master(servers, tasks, realtime=False, use_monitor=False,
+               heartbeat_interval=heartbeat_interval, heartbeat_timeout=heartbeat_timeout)
+    injected = {}
+
+    def inject(sid, sig):
+        injected[sid] = time.time()
+        os.kill(m.worker_procs[sid].pid, sig)
+
+    timers = []
+    if faults:
+        timers = [threading.Timer(kill_at, inject, (1, signal.SIGKILL)),
+                  threading.Timer(stop_at, inject, (2, signal.SIGSTOP))]
+    for t in timers:
+        t.start()
+    _quiet_run(m)
+    for t in timers:
+        t.cancel()
+
+    ids = m.completed_log.values("task_id")
+    recovery = [{"worker": f["worker"], "reason": f["reason"], "requeued": f["requeued"],
+                 "detect_s": f["detected_at"] - injected.get(f["worker"], f["detected_at"]),
+                 "respawn_ms": f["respawn_s"] * 1000, "respawned": f["respawned"]} for f in m.failures]
+    return {
+        "tasks": num_tasks,
+        "completed": len(ids),
+        "unique": len(set(ids)),
+        "makespan_s": m.end_time - m.start_time,
+        "recovery": recovery,
+    }
+
+
+def main_fault_recovery():
+    results = {}
+    for label, faults in (("sem falhas", False), ("SIGKILL + SIGSTOP", True)):
+        r = results[label] = bench_fault_recovery(faults)
+        print(f"{label:18s} | concluídas {r['completed']} (únicas {r['unique']}) | makespan {r['makespan_s']:5.2f}s")
+        for f in r["recovery"]:
+            print(f"    worker {f['worker']} ({f['reason']}): detecção {f['detect_s']:5.2f}s | "
+                  f"{f['requeued']} tarefas redistribuídas | recriação {f['respawn_ms']:6.1f} ms")
+        # cada tarefa exatamente uma vez, cada falha injetada detectada e o worker recriado
+        problems = []
+        if r["completed"] != r["tasks"] or r["unique"] != r["tasks"]:
+            problems.append(f"{r['completed']} concluídas, {r['unique']} únicas de {r['tasks']}")
+        if faults and sorted(f["worker"] for f in r["recovery"]) != [1, 2]:
+            problems.append(f"falhas detectadas: {[(f['worker'], f['reason']) for f in r['recovery']]}")
+        if any(not f["respawned"] for f in r["recovery"]):
+            problems.append("worker não recriado")
+        for p in problems:
+            print(f"    FALHOU: {p}")
+            CHECK_FAILURES.append(f"fault_recovery {label}: {p}")
+    return results
+
+
+# leitor lento do outro lado do pipe, como um terminal que não acompanha a saída
+SLOW_READER = ("import sys, time\n"
+               "rate = float(sys.argv[1])\n"
+               "while True:\n"
+               "    data = sys.stdin.buffer.read1(4096)\n"
+               "    if not data:\n"
+               "        break\n"
+               "    time.sleep(len(data) / rate)\n")
+
+
+def bench_event_log(mode, num_tasks=5000, bytes_per_s=200_000):
+    """
+    Vazão do Master (tarefas/s) com tarefas vazias e o stdout ligado a um leitor lento que enche
+    o pipe. Modos: 'off' sem log; 'sync' escrita na própria chamada (como os prints por evento);
+    'async' thread de fundo; 'rate' async limitado a 100 mensagens/s por evento; 'jsonl' só o
+    arquivo JSON lines. 'drain_s' é o tempo que o close() ainda leva para escrever a fila.
+    """
+    servers = [{"id": i, "capacidade": 4} for i in range(1, 5)]
+    tasks = [{"id": i, "tipo": "nlp", "prioridade": 1, "tempo_exec": 0.0} for i in range(num_tasks)]
+    path = os.path.join(tempfile.mkdtemp(), "events.jsonl") if mode == "jsonl" else None
+    log = EventLog(path=path, console=mode in ("sync", "async", "rate"), background=(mode != "sync"),
+                   rate=(100 if mode == "rate" else None))
+    reader = subprocess.Popen([sys.executable, "-c", SLOW_READER, str(bytes_per_s)], stdin=subprocess.PIPE)
+    stream = io.TextIOWrapper(reader.stdin, encoding="utf-8")
+    m = Master(servers, tasks, realtime=False, use_monitor=False, log=log)
+    with contextlib.redirect_stdout(stream):
+        m.run()
+        t0 = time.time()
+        log.close()
+        drain = time.time() - t0
+    stream.close()
+    reader.wait()
+    if path:
+        os.remove(path)
+        os.rmdir(os.path.dirname(path))
+    wall = m.end_time - m.start_time
+    return {"wall_s": wall, "tasks_per_s": num_tasks / wall, "drain_s": drain, **log.stats()}
+
+
+def main_event_log():
+    results = {}
+    for mode in ("off", "sync", "async", "rate", "jsonl"):
+        r = results[mode] = bench_event_log(mode)
+        print(f"{mode:6s} | master {r['wall_s']:5.2f}s ({r['tasks_per_s']:7.0f} tarefas/s) | "
+              f"escrita pendente no fim {r['drain_s']:5.2f}s | escritos {r['written']:6d} | "
+              f"descartados {r['dropped']} | suprimidos {r['suppressed']}")
+    return results
+
+
+def bench_workload(name, n=1_000_000, sim_tasks=50_000, arrival_mean=0.2, seed=1):
+    """
+    Cargas de workload.py: tempo para gerar 'n' tarefas sob demanda (sem lista em memória),
+    reprodutibilidade pela semente e latência de resposta numa SimMaster com ~83% de utilização.
+    """
+    t0 = time.perf_counter()
+    count = sum(1 for _ in make_workload(name, n, seed=seed, arrival_mean=arrival_mean))
+    gen = time.perf_counter() - t0
+    head = [(t["arrival"], t["tempo_exec"]) for t in make_workload(name, 1000, seed=seed, arrival_mean=arrival_mean)]
+    again = [(t["arrival"], t["tempo_exec"]) for t in make_workload(name, 1000, seed=seed, arrival_mean=arrival_mean)]
+
+    servers = [{"id": i, "capacidade": 4} for i in range(1, 4)]
+    m = SimMaster(servers, make_workload(name, sim_tasks, seed=seed, arrival_mean=arrival_mean),
+                  realtime=True, verbose=False)
+    m.run()
+    resp = m.completed_log.summary()["response"]
+    return {"generated": count, "gen_s": gen, "reproducible": head == again,
+            "resp_p50": resp["p50"], "resp_p99": resp["p99"]}
+
+
+def main_workload():
+    results = {}
+    for name in WORKLOADS:
+        r = results[name] = bench_workload(name, n=(100_000 if QUICK else 1_000_000))
+        print(f"{name:10s} | {r['generated']} tarefas geradas em {r['gen_s']:5.2f}s | "
+              f"reprodutível {r['reproducible']} | resposta p50 {r['resp_p50']:6.2f}s | p99 {r['resp_p99']:7.2f}s")
+    return results
+
+
+def bench_instrumentation(mode, num_tasks=5000, repeats=3):
+    """
+    Custo da instrumentação no Master: vazão (tarefas/s) e CPU do processo master com tarefas
+    vazias. Modos: 'off', 'on' (tempos e histogramas), 'sample' e 'cprofile' (mais profilers).
+    """
+    servers = [{"id": i, "capacidade": 4} for i in range(1, 5)]
+    best = None
+    for _ in range(repeats):
+        tasks = [{"id": i, "tipo": "nlp", "prioridade": 1, "tempo_exec": 0.0} for i in range(num_tasks)]
+        m = Master(servers, tasks, realtime=False, use_monitor=False, verbose=False,
+                   instrument=(mode != "off"), profile=(mode if mode in ("sample", "cprofile") else None))
+        cpu0 = time.process_time()
+        m.run()
+        cpu = time.process_time() - cpu0
+        wall = m.end_time - m.start_time
+        if best is None or wall < best["wall_s"]:
+            best = {"wall_s": wall, "tasks_per_s": num_tasks / wall, "master_cpu_s": cpu}
+    return best
+
+
+def main_instrumentation():
+    base = None
+    results = {}
+    for mode in ("off", "on", "sample", "cprofile"):
+        r = results[mode] = bench_instrumentation(mode)
+        base = base or r
+        print(f"{mode:8s} | {r['tasks_per_s']:7.0f} tarefas/s | CPU master {r['master_cpu_s']:5.2f}s | "
+              f"custo {(base['tasks_per_s'] / r['tasks_per_s'] - 1) * 100:+5.1f}%")
+    return results
+
+
+SCALING_SIM = [(n, s) for n in (10, 1_000, 100_000, 1_000_000) for s in (3, 100, 1_000)]
+SCALING_REAL = [(n, s) for n in (10, 1_000) for s in (3, 32)]
+
+
+def bench_scaling(engine, num_tasks, num_servers, capacity=4, utilization=0.8, seed=1):
+    """
+    Makespan e latência de ponta a ponta com a carga e o cluster escalados. SIM: chegadas de
+    Poisson (workload.py) com a utilização pedida e tempo_exec médio de 2 s, no relógio virtual;
+    'wall_s' é o custo real da simulação. REAL: tarefas curtas (2 ms) chegando juntas a workers reais.
+    """
+    servers = [{"id": i, "capacidade": capacity} for i in range(1, num_servers + 1)]
+    t0 = time.perf_counter()
+    if engine == "SIM":
+        arrival_mean = 2.0 / (utilization * capacity * num_servers)
+        m = SimMaster(servers, make_workload("poisson", num_tasks, seed=seed, arrival_mean=arrival_mean),
+                      realtime=True, verbose=False)
+    else:
+        tasks = [{"id": i, "tipo": "nlp", "prioridade": 1, "tempo_exec": 0.002} for i in range(num_tasks)]
+        m = Master(servers, tasks, realtime=False, use_monitor=False, verbose=False)
+    m.run()
+    wall = time.perf_counter() - t0
+    resp = m.completed_log.summary()["response"]
+    return {"wall_s": wall, "makespan_s": m.end_time - m.start_time, "tasks_per_s": num_tasks / wall,
+            "resp_p50_s": resp["p50"], "resp_p99_s": resp["p99"]}
+
+
+def main_scaling():
+    results = {}
+    grid = [("SIM", n, s) for n, s in SCALING_SIM] + [("REAL", n, s) for n, s in SCALING_REAL]
+    for engine, n, s in grid:
+        if QUICK and (n > 100_000 or s > 100):
+            continue
+        r = results[f"{engine} {n} tarefas x {s} servidores"] = bench_scaling(engine, n, s)
+        print(f"{engine:4s} | {n:9d} tarefas | {s:5d} servidores | wall {r['wall_s']:7.2f}s "
+              f"({r['tasks_per_s']:9.0f} tarefas/s) | makespan {r['makespan_s']:9.2f}s | "
+              f"resposta p50 {r['resp_p50_s']:6.3f}s | p99 {r['resp_p99_s']:6.3f}s")
+    return results
+
+
+def bench_placement(engine, placement, pin_cpus=False, num_tasks=None, seed=1):
+    """
+    Servidores especializados (speedup 2.0 no próprio tipo, 0.75 nos demais) com colocação por
+    carga ou por afinidade. SIM: 12 servidores x 4 slots, chegadas de Poisson a ~85% da capacidade
+    efetiva da colocação por carga, tempo_exec médio de 2 s. REAL: 3 workers x 2 slots com
+    tarefas de 10 ms chegando juntas. Retorna vazão e latências de resposta por tipo.
+    """
+    if engine == "SIM":
+        num_tasks = num_tasks or (2_000 if QUICK else 20_000)
+        servers = specialized_servers(12, 4)
+        # tempo médio com colocação por carga: 1/3 das tarefas no servidor rápido
+        mean_load = 2.0 * (1 / 3 / 2.0 + 2 / 3 / 0.75)
+        arrival_mean = mean_load / (0.85 * 48)
+        m = SimMaster(servers, make_workload("poisson", num_tasks, seed=seed, arrival_mean=arrival_mean),
+                      realtime=True, verbose=False, placement=placement)
+    else:
+        num_tasks = num_tasks or 300
+        servers = specialized_servers(3, 2)
+        rng = random.Random(seed)
+        tasks = [{"id": i, "tipo": rng.choice(("visao_computacional", "nlp", "voz")), "prioridade": 1,
+                  "tempo_exec": 0.01} for i in range(num_tasks)]
+        m = Master(servers, tasks, realtime=False, use_monitor=False, verbose=False,
+                   placement=placement, pin_cpus=pin_cpus)
+    m.run()
+    makespan = m.end_time - m.start_time
+    out = {"makespan_s": makespan, "tasks_per_s": num_tasks / makespan}
+    for tipo in m.stats.names("tipo"):
+        r = m.stats.summary("tipo", tipo)
+        out[f"{tipo}_service_s"] = r["service"]["mean"]
+        out[f"{tipo}_resp_p50_s"] = r["response"]["p50"]
+        out[f"{tipo}_resp_p99_s"] = r["response"]["p99"]
+    return out
+
+
+def main_placement():
+    results = {}
+    cases = [("SIM", "load", False), ("SIM", "affinity", False),
+             ("REAL", "load", False), ("REAL", "affinity", False), ("REAL", "affinity", True)]
+    for engine, placement, pin in cases:
+        label = f"{engine} {placement}" + (" + pin" if pin else "")
+        r = results[label] = bench_placement(engine, placement, pin)
+        per_type = " | ".join(f"{t[:4]} exec {r[f'{t}_service_s']:.3f}s p99 {r[f'{t}_resp_p99_s']:.3f}s"
+                              for t in ("visao_computacional", "nlp", "voz") if f"{t}_service_s" in r)
+        print(f"{label:20s} | {r['tasks_per_s']:8.2f} tarefas/s | {per_type}")
+    return results
+
+
+ADMISSION_CASES = {
+    # caso -> (parâmetros de AdmissionControl, fonte com pressão de volta)
+    "sem controle": ({}, False),
+    "reject": ({"max_backlog": 64}, False),
+    "shed": ({"max_backlog": 64, "shed": True}, False),
+    "drop_expired": ({"drop_expired": True}, False),
+    "shed + drop_expired": ({"max_backlog": 64, "shed": True, "drop_expired": True}, False),
+    "block + backpressure": ({"max_backlog": 64, "overflow": "block"}, True),
+}
+
+
+def _with_deadline(tasks, deadline):
+    for t in tasks:
+        t["deadline"] = deadline
+        yield t
+
+
+def bench_admission(case, num_tasks=None, utilization=1.5, deadline=20.0, seed=1):
+    """
+    Sobrecarga no SIM: 8 servidores x 4 slots, chegadas de Poisson a 'utilization' vezes a
+    capacidade, tempo_exec médio de 2 s, prioridades 1-3 (política PRIORITY) e prazo de 'deadline'
+    s para todas. Goodput = tarefas concluídas dentro do prazo por segundo de simulação.
+    """
+    num_tasks = num_tasks or (2_000 if QUICK else 20_000)
+    params, backpressure = ADMISSION_CASES[case]
+    servers = [{"id": i, "capacidade": 4} for i in range(1, 9)]
+    tasks = _with_deadline(make_workload("poisson", num_tasks, seed=seed,
+                                         arrival_mean=2.0 / (utilization * 32)), deadline)
+    if backpressure:
+        tasks = BackpressureSource(tasks)
+    adm = AdmissionControl(**params)
+    m = SimMaster(servers, tasks, policy="PRIORITY", realtime=True, verbose=False, admission=adm)
+    m.run()
+    makespan = m.end_time - m.start_time
+    out = adm.summary(makespan)
+    out["goodput_per_s"] = out.pop("goodput")
+    out["makespan_s"] = makespan
+    for p in m.stats.names("prioridade"):
+        out[f"p{p}_resp_p99_s"] = m.stats.summary("prioridade", p)["response"]["p99"]
+    return out
+
+
+def main_admission():
+    results = {}
+    for case in ADMISSION_CASES:
+        r = results[case] = bench_admission(case)
+        print(f"{case:20s} | goodput {r['goodput_per_s']:6.2f} tarefas/s | no prazo {r['on_time']:6d} | "
+              f"atrasadas {r['late']:6d} | rejeitadas {r['rejected']:6d} | shed {r['shed']:6d} | "
+              f"expiradas {r['expired']:6d} | p99 P1 {r.get('p1_resp_p99_s', 0):7.2f}s "
+              f"P3 {r.get('p3_resp_p99_s', 0):7.2f}s | makespan {r['makespan_s']:8.1f}s")
+    return results
+
+
+def _scrape_loop(m, interval, stop, costs):
+    # coletor local: GET /metrics a cada 'interval' s enquanto o Master roda
+    while not stop.wait(interval):
+        if m.exporter is None or m.exporter.server is None:
+            continue
+        t0 = time.perf_counter()
+        try:
+            urllib.request.urlopen(m.exporter.url, timeout=1.0).read()
+        except OSError:
+            continue
+        costs.append(time.perf_counter() - t0)
+
+
+def bench_metrics_export(mode, num_tasks=20_000, scrape_interval=0.05, servers=4, capacity=4, repeats=3):
+    """
+    Vazão do Master com tarefas vazias: sem endpoint ("off"), com endpoint sem coletas ("idle") e
+    com um coletor a cada scrape_interval s ("scrape"), que é o pior caso de uma coleta por segundo
+    de um Prometheus. Também mede o custo de MetricsExporter.observe por conclusão.
+    """
+    servers = [{"id": i, "capacidade": capacity} for i in range(1, servers + 1)]
+    best = None
+    costs = []
+    with WorkerPool() as pool:
+        for run in range(repeats + 1):
+            tasks = [{"id": i, "tipo": ("nlp", "voz")[i % 2], "prioridade": 1, "tempo_exec": 0.0}
+                     for i in range(num_tasks)]
+            m = Master(servers, tasks, realtime=False, use_monitor=False, verbose=False, pool=pool,
+                       metrics_port=None if mode == "off" else 0)
+            stop = threading.Event()
+            scraper = None
+            if mode == "scrape":
+                scraper = threading.Thread(target=_scrape_loop, args=(m, scrape_interval, stop, costs), daemon=True)
+                scraper.start()
+            m.run()
+            stop.set()
+            if scraper is not None:
+                scraper.join()
+            if run == 0:
+                continue
+            wall = m.end_time - m.start_time
+            best = wall if best is None else min(best, wall)
+    out = {"makespan_s": best, "tasks_per_s": num_tasks / best}
+    if costs:
+        out["scrapes"] = len(costs)
+        out["scrape_avg_ms"] = sum(costs) / len(costs) * 1000
+    exp = MetricsExporter(None)
+    n = 200_000
+    t0 = time.perf_counter()
+    for i in range(n):
+        exp.observe("nlp", 0.0, 0.01, 0.02)
+    out["observe_us"] = (time.perf_counter() - t0) / n * 1e6
+    return out
+
+
+def main_metrics_export():
+    results = {}
+    for mode in ("off", "idle", "scrape"):
+        r = results[mode] = bench_metrics_export(mode)
+        extra = (f" | {r['scrapes']} coletas, média {r['scrape_avg_ms']:.2f} ms" if "scrapes" in r else "")
+        print(f"{mode:6s} | makespan {r['makespan_s']:6.3f}s | {r['tasks_per_s']:8.0f} tarefas/s | "
+              f"observe {r['observe_us']:.2f} µs" + extra)
+    return results
+
+
+BENCHMARKS = {
+    "dispatch_latency": main_dispatch_latency,
+    "slot_scaling": main_slot_scaling,
+    "cpu_work": main_cpu_work,
+    "event_wire": main_event_wire,
+    "batching": main_batching,
+    "server_selection": main_server_selection,
+    "monitor_sampling": main_monitor_sampling,
+    "shared_state": main_shared_state,
+    "result_storage": main_result_storage,
+    "scheduler": main_scheduler,
+    "preemption": main_preemption,
+    "work_stealing": main_work_stealing,
+    "pool_reuse": main_pool_reuse,
+    "fault_recovery": main_fault_recovery,
+    "event_log": main_event_log,
+    "workload": main_workload,
+    "instrumentation": main_instrumentation,
+    "scaling": main_scaling,
+    "placement": main_placement,
+    "admission": main_admission,
+    "metrics_export": main_metrics_export,
+}
+
+def _run_meta():
+    try:
+        rev = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                             cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        rev = None
+    return {"timestamp": time.time(), "git": rev, "python": platform.python_version(),
+            "platform": platform.platform(), "cpus": os.cpu_count(), "quick": QUICK}
+
+
+def run_benchmarks(names, out=None, repeat=1):
+    """
+    Executa os benchmarks pedidos e grava {"meta", "results": {benchmark: {caso: métricas}}} em
+    'out'. Com repeat > 1 cada benchmark roda 'repeat' vezes e fica o melhor valor de cada
+    métrica, o que reduz o ruído da máquina na comparação.
+    """
+    results = {}
+    for name in names:
+        runs = []
+        for i in range(repeat):
+            print(f"== {name} ==" + (f" ({i + 1}/{repeat})" if repeat > 1 else ""))
+            runs.append(BENCHMARKS[name]())
+        results[name] = _best_of(runs)
+    meta = _run_meta()
+    meta["repeat"] = repeat
+    data = {"meta": meta, "results": results}
+    if out:
+        with open(out, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+        print(f"Resultados salvos em: {out}")
+    return data
+
+
+def metric_direction(name):
+    """
+    1 se maior é melhor (taxas: *per_s), -1 se menor é melhor (tempos e memória: *_s, *_ms, *_us,
+    *_mb), 0 se a métrica é só informativa (contagens, flags) e não entra na comparação.
+    """
+    if "per_s" in name:
+        return 1
+    if name.endswith(("_s", "_ms", "_us", "_mb")):
+        return -1
+    return 0
+
+
+def _best_of(runs):
+    """Junta repetições de um benchmark: por métrica, o máximo (taxas) ou o mínimo (tempos)."""
+    best = {}
+    for run in runs:
+        for case, metrics in run.items():
+            if case not in best or not isinstance(metrics, dict):
+                best[case] = metrics
+                continue
+            merged = best[case]
+            for metric, value in metrics.items():
+                old = merged.get(metric)
+                direction = metric_direction(metric)
+                if direction and isinstance(value, (int, float)) and isinstance(old, (int, float)):
+                    merged[metric] = max(old, value) if direction > 0 else min(old, value)
+                else:
+                    merged[metric] = value
+    return best
+
+
+def compare_results(base, new, threshold=REGRESSION_THRESHOLD):
+    """
+    Compara dois resultados de run_benchmarks métrica a métrica (só casos presentes nos dois).
+    Retorna linhas (benchmark, caso, métrica, base, novo, variação relativa, regressão), com
+    regressão = piora maior que 'threshold' numa métrica com direção.
+    """
+    rows = []
+    for bench, cases in new["results"].items():
+        base_cases = base["results"].get(bench) or {}
+        for case, metrics in cases.items():
+            base_metrics = base_cases.get(case)
+            if not isinstance(metrics, dict) or not isinstance(base_metrics, dict):
+                continue
+            for metric, value in metrics.items():
+                old = base_metrics.get(metric)
+                direction = metric_direction(metric)
+                if (not direction or isinstance(value, bool) or not isinstance(value, (int, float))
+                        or not isinstance(old, (int, float)) or old == 0):
+                    continue
+                change = (value - old) / abs(old)
+                rows.append((bench, case, metric, old, value, change, change * direction < -threshold))
+    return rows
+
+
+def main_compare(base_path, new_path, threshold=REGRESSION_THRESHOLD):
+    """Imprime a comparação e retorna o número de regressões."""
+    with open(base_path, encoding="utf-8") as f:
+        base = json.load(f)
+    with open(new_path, encoding="utf-8") as f:
+        new = json.load(f)
+    rows = compare_results(base, new, threshold)
+    print(f"base: {base_path} (git {base['meta'].get('git')}) | novo: {new_path} (git {new['meta'].get('git')}) | "
+          f"limite {threshold * 100:.0f}%")
+    host = ("platform", "cpus")
+    if [base["meta"].get(k) for k in host] != [new["meta"].get(k) for k in host]:
+        print("aviso: hosts diferentes (" + ", ".join(f"{k} {base['meta'].get(k)} -> {new['meta'].get(k)}" for k in host)
+              + "): as diferenças não indicam regressão do código")
+    for bench, case, metric, old, value, change, regression in rows:
+        flag = "  REGRESSÃO" if regression else ""
+        print(f"{bench:18s} | {case:40s} | {metric:18s} | {old:14.4f} -> {value:14.4f} | {change * 100:+7.1f}%{flag}")
+    regressions = sum(1 for r in rows if r[-1])
+    print(f"{len(rows)} métricas comparadas | {regressions} regressões")
+    return regressions
+
+
+if __name__ == "__main__":
+    # compatível com a forma antiga: 'python benchmarks.py nome1 nome2' equivale a 'run nome1 nome2'
+    argv = sys.argv[1:]
+    if not argv or argv[0] not in ("run", "compare", "-h", "--help"):
+        argv = ["run"] + argv
+    parser = argparse.ArgumentParser(description="Benchmarks do simulador")
+    sub = parser.add_subparsers(dest="command", required=True)
+    run_parser = sub.add_parser("run", help="executa benchmarks e grava os resultados em JSON")
+    run_parser.add_argument("names", nargs="*", metavar="nome",
+                            help="benchmarks a executar (padrão: todos): " + ", ".join(BENCHMARKS))
+    run_parser.add_argument("--out", help="arquivo JSON (padrão: benchmarks_<timestamp>.json)")
+    run_parser.add_argument("--repeat", type=int, default=1, help="repetições; fica o melhor valor de cada métrica")
+    run_parser.add_argument("--quick", action="store_true", help="versões menores dos benchmarks longos")
+    cmp_parser = sub.add_parser("compare", help="compara dois arquivos JSON e acusa regressões")
+    cmp_parser.add_argument("base")
+    cmp_parser.add_argument("new")
+    cmp_parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD,
+                            help="piora relativa tolerada (padrão: %(default)s)")
+    args = parser.parse_args(argv)
+
+    if args.command == "compare":
+        sys.exit(1 if main_compare(args.base, args.new, args.threshold) else 0)
+    unknown = [n for n in args.names if n not in BENCHMARKS]
+    if unknown:
+        run_parser.error("benchmarks desconhecidos: " + ", ".join(unknown))
+    QUICK = args.quick
+    run_benchmarks(args.names or list(BENCHMARKS), args.out or f"benchmarks_{int(time.time())}.json",
+                   max(1, args.repeat))
+    if CHECK_FAILURES:
+        print("Verificações que falharam:\n  " + "\n  ".join(CHECK_FAILURES))
+        sys.exit(1)
@@ -0,0 +1,183 @@
+# eventlog.py
+import json
+import sys
+import threading
+import time
+from collections import deque
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+LEVELS = {"DEBUG": DEBUG, "INFO": INFO, "WARNING": WARNING, "ERROR": ERROR}
+LEVEL_NAMES = {v: k for k, v in LEVELS.items()}
+
+FLUSH_INTERVAL = 0.05   # segundos entre descargas da fila pela thread escritora
+MAX_QUEUE = 100_000     # registros pendentes; além disso são descartados (quem registra nunca espera)
+
+
+class EventLog:
+    """
+    Log estruturado fora do caminho quente. log() só filtra (nível, limite de taxa) e põe o
+    registro numa fila; uma thread de fundo formata e escreve: uma linha JSON por registro em
+    'path' e/ou a mensagem legível no console. Se a saída não acompanha (ex.: terminal lento) a
+    fila enche e os registros excedentes são descartados e contados, sem bloquear o Master.
+    """
+
+    def __init__(self, path=None, level=INFO, console=True, rate=None, background=True,
+                 flush_interval=FLUSH_INTERVAL, max_queue=MAX_QUEUE, clock=time.time):
+        """
+        path: arquivo JSON lines (None = sem arquivo)
+        level: nível mínimo (DEBUG, INFO, WARNING, ERROR ou o nome)
+        console: escreve as mensagens no sys.stdout vigente em start()
+        rate: máximo de registros por segundo de cada evento (None = sem limite); o excedente é
+              contado em 'suppressed'
+        background: False escreve na própria chamada, como print (para comparação)
+        clock: relógio dos registros (SimMaster usa o relógio virtual)
+        """
+        self.path = path
+        self.level = LEVELS.get(level, level)
+        self.console = console
+        self.rate = rate
+        self.background = background
+        self.flush_interval = flush_interval
+        self.max_queue = max_queue
+        self.clock = clock
+        # sem destino nenhum, log() retorna logo após o teste de nível
+        self.enabled = bool(path or console)
+
+        self.records = deque()   # (instante, nível, evento, mensagem, campos)
+        self.buckets = {}        # evento -> [fichas, último instante] (limite de taxa)
+        self.written = 0
+        self.dropped = 0         # fila cheia
+        self.suppressed = {}     # evento -> registros acima do limite de taxa
+        self.start_at = None     # origem do [mm:ss] das mensagens
+        self.stream = None
+        self.file = None
+        self.thread = None
+        self.stopping = threading.Event()
+
+    def start(self, start_at=None):
+        """Abre os destinos e inicia a thread escritora (uma vez; chamadas seguintes só movem a origem)."""
+        self.start_at = start_at if start_at is not None else self.clock()
+        if self.stream is not None or self.file is not None or not self.enabled:
+            return self
+        if self.console:
+            self.stream = sys.stdout
+        if self.path:
+            self.file = open(self.path, "a", encoding="utf-8")
+        if self.background:
+            self.stopping.clear()
+            self.thread = threading.Thread(target=self._writer, daemon=True)
+            self.thread.start()
+        return self
+
+    # -------------------------
+    # caminho quente
+    # -------------------------
+    def log(self, level, event, msg=None, **fields):
+        """
+        Registra 'event' com 'fields'; 'msg' é a mensagem do console, um str.format sobre os
+        campos feito pela thread escritora. Retorna False se o registro foi filtrado ou descartado.
+        """
+        if level < self.level or not self.enabled:
+            return False
+        if self.rate is not None and not self._allow(event):
+            self.suppressed[event] = self.suppressed.get(event, 0) + 1
+            return False
+        record = (self.clock(), level, event, msg, fields)
+        if not self.background:
+            self._write(record)
+            return True
+        if len(self.records) >= self.max_queue:
+            self.dropped += 1
+            return False
+        self.records.append(record)
+        return True
+
+    def debug(self, event, msg=None, **fields):
+        return self.log(DEBUG, event, msg, **fields)
+
+    def info(self, event, msg=None, **fields):
+        return self.log(INFO, event, msg, **fields)
+
+    def warning(self, event, msg=None, **fields):
+        return self.log(WARNING, event, msg, **fields)
+
+    def error(self, event, msg=None, **fields):
+        return self.log(ERROR, event, msg, **fields)
+
+    def _allow(self, event):
+        # balde de fichas por evento: 'rate' fichas/s, rajada de até um segundo
+        now = time.monotonic()
+        bucket = self.buckets.get(event)
+        if bucket is None:
+            bucket = self.buckets[event] = [max(1.0, self.rate), now]
+        tokens = min(max(1.0, self.rate), bucket[0] + (now - bucket[1]) * self.rate)
+        bucket[1] = now
+        if tokens < 1.0:
+            bucket[0] = tokens
+            return False
+        bucket[0] = tokens - 1.0
+        return True
+
+    # -------------------------
+    # escrita
+    # -------------------------
+    def _writer(self):
+        while not self.stopping.wait(self.flush_interval):
+            self._drain()
+        self._drain()
+
+    def _drain(self):
+        records = self.records
+        if not records:
+            return
+        while records:
+            self._write(records.popleft())
+        if self.stream is not None:
+            self.stream.flush()
+        if self.file is not None:
+            self.file.flush()
+
+    def _write(self, record):
+        t, level, event, msg, fields = record
+        if self.file is not None:
+            line = {"t": t, "level": LEVEL_NAMES.get(level, level), "event": event}
+            line.update(fields)
+            self.file.write(json.dumps(line, default=str) + "\n")
+        if self.stream is not None and msg is not None:
+            self.stream.write(f"[{self._fmt_time(t)}] {msg.format(**fields)}\n")
+        self.written += 1
+
+    def _fmt_time(self, t):
+        elapsed = t - (self.start_at if self.start_at is not None else t)
+        return f"{int(elapsed // 60):02d}:{int(elapsed % 60):02d}"
+
+    def close(self):
+        """Escreve o que estiver na fila e fecha os destinos (relata descartes no console)."""
+        if self.thread is not None:
+            self.stopping.set()
+            self.thread.join()
+            self.thread = None
+        self._drain()
+        lost = self.dropped + sum(self.suppressed.values())
+        if self.stream is not None:
+            if lost:
+                self.stream.write(f"[log] {self.dropped} registros descartados (fila cheia), "
+                                  f"{lost - self.dropped} suprimidos (limite de taxa)\n")
+            self.stream.flush()
+            self.stream = None
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def stats(self):
+        return {"written": self.written, "dropped": self.dropped,
+                "suppressed": sum(self.suppressed.values())}
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,242 @@
+# exporter.py
+import threading
+import time
+import psutil
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from metrics import Histogram, LATENCY_BUCKETS
+
+# Endpoint local de métricas para execuções longas: um servidor HTTP numa thread de fundo do
+# Master responde /metrics no formato texto do Prometheus. O laço do Master só atualiza
+# histogramas de faixas fixas a cada conclusão; contadores, filas e o estado dos workers são
+# lidos na hora da coleta (contadores do Master e tabela de estado em memória compartilhada),
+# então uma coleta não para o laço nem agrega registros.
+
+METRICS_HOST = "127.0.0.1"
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+PREFIX = "so_"
+SERIES = ("response", "wait", "service")
+# coluna da tabela de estado -> (métrica por worker, tipo Prometheus, ajuda)
+WORKER_COLUMNS = {
+    "capacity": ("worker_capacity", "gauge", "Slots do worker"),
+    "busy": ("worker_busy_slots", "gauge", "Slots executando uma tarefa"),
+    "queued": ("worker_local_queue", "gauge", "Tarefas recebidas e ainda não iniciadas no worker"),
+    "threads": ("worker_threads", "gauge", "Threads do processo worker"),
+    "rss": ("worker_rss_bytes", "gauge", "Memória residente do worker"),
+    "cpu_time": ("worker_cpu_seconds_total", "counter", "CPU acumulada pelo worker e seus slots"),
+}
+
+
+class MetricsExporter:
+    """
+    Exporta as métricas de um Master em http://host:port/metrics (port=0 = porta livre, ver
+    self.port depois de start()). Expõe contadores de despacho/conclusão/preempção e as taxas
+    desde a coleta anterior, profundidade da scheduler (total e por prioridade), admissão,
+    estado por worker (CPU, RSS, slots, fila local, idade do heartbeat) e histogramas de
+    latência por tipo. Sem tabela de estado, CPU e RSS vêm do psutil na própria coleta.
+    """
+
+    def __init__(self, master, port=0, host=METRICS_HOST, buckets=LATENCY_BUCKETS):
+        self.master = master
+        self.host = host
+        self.port = port
+        self.buckets = tuple(buckets)
+        self.histograms = {}     # (série, tipo) -> Histogram, escrito só pelo laço do Master
+        self.lock = threading.Lock()   # entre coletas simultâneas (nunca com o laço do Master)
+        self.last = None         # (instante, despachadas, concluídas) da coleta anterior
+        self.scrapes = 0
+        self.handles = {}        # pid -> psutil.Process (sem tabela de estado)
+        self.server = None
+        self.thread = None
+
+    # -------------------------
+    # lado do Master
+    # -------------------------
+    def observe(self, tipo, arrival, start, end, service=None):
+        """
+        Conclusão de uma tarefa: uma amostra em cada histograma de latência do tipo. service:
+        tempo executando (soma das fatias); None = fim - início, tarefa sem preempção.
+        """
+        if service is None and start is not None:
+            service = end - start
+        for series, value in (("response", None if arrival is None else end - arrival),
+                              ("wait", None if (arrival is None or start is None) else start - arrival),
+                              ("service", service)):
+            if value is None:
+                continue
+            h = self.histograms.get((series, tipo))
+            if h is None:
+                h = self.histograms[(series, tipo)] = Histogram(self.buckets)
+            h.add(value)
+
+    def start(self):
+        exporter = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = exporter.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                # as coletas não vão para o terminal do Master
+                pass
+
+        self.server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+        self.thread = threading.Thread(target=self.server.serve_forever, kwargs={"poll_interval": 0.5},
+                                       daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+            self.thread = None
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}/metrics"
+
+    # -------------------------
+    # coleta (thread do servidor HTTP)
+    # -------------------------
+    def render(self):
+        with self.lock:
+            out = []
+            self._master_metrics(out)
+            self._worker_metrics(out)
+            self._latency_metrics(out)
+            self.scrapes += 1
+            return "\n".join(out) + "\n"
+
+    def _metric(self, out, name, kind, help_text, samples):
+        """samples: [(labels dict, valor)]."""
+        name = PREFIX + name
+        out.append(f"# HELP {name} {help_text}")
+        out.append(f"# TYPE {name} {kind}")
+        for labels, value in samples:
+            out.append(f"{name}{_labels(labels)} {_value(value)}")
+
+    def _master_metrics(self, out):
+        m = self.master
+        now = time.time()
+        # leituras de contadores do Master: cada uma é atômica sob o GIL
+        dispatched = len(m.assigned_log)
+        completed = m.completed_log.count()
+        started = m.start_time or now
+        prev = self.last or (started, 0, 0)
+        self.last = (now, dispatched, completed)
+        elapsed = max(now - prev[0], 1e-6)
+
+        self._metric(out, "uptime_seconds", "gauge", "Tempo desde o início da execução",
+                     [({}, now - started)])
+        self._metric(out, "tasks_dispatched_total", "counter", "Despachos de tarefas a workers",
+                     [({}, dispatched)])
+        self._metric(out, "tasks_completed_total", "counter", "Tarefas concluídas",
+                     [({}, completed)])
+        self._metric(out, "preemptions_total", "counter", "Execuções interrompidas pelo quantum",
+                     [({}, m.preemptions)])
+        self._metric(out, "tasks_reclaimed_total", "counter", "Tarefas recolhidas e redistribuídas",
+                     [({}, m.reclaimed)])
+        self._metric(out, "worker_failures_total", "counter", "Falhas de workers tratadas",
+                     [({}, len(m.failures))])
+        self._metric(out, "dispatch_rate", "gauge", "Despachos por segundo desde a coleta anterior",
+                     [({}, (dispatched - prev[1]) / elapsed)])
+        self._metric(out, "completion_rate", "gauge", "Conclusões por segundo desde a coleta anterior",
+                     [({}, (completed - prev[2]) / elapsed)])
+
+        counts = list(m.scheduler.counts.items())
+        self._metric(out, "scheduler_queue_depth", "gauge", "Tarefas na scheduler do Master",
+                     [({}, len(m.scheduler))])
+        self._metric(out, "scheduler_queue_depth_by_priority", "gauge", "Tarefas na scheduler por prioridade",
+                     [({"prioridade": p}, n) for p, n in sorted(counts, key=lambda x: str(x[0]))])
+
+        adm = m.admission
+        if adm is not None:
+            self._metric(out, "admission_admitted_total", "counter", "Chegadas aceitas", [({}, adm.admitted)])
+            self._metric(out, "admission_rejected_total", "counter", "Chegadas rejeitadas",
+                         [({"motivo": k}, v) for k, v in list(adm.rejected.items())])
+            self._metric(out, "admission_dropped_total", "counter", "Tarefas aceitas descartadas sem executar",
+                         [({"motivo": "shed"}, adm.shed_count), ({"motivo": "expired"}, adm.expired)])
+            self._metric(out, "admission_late_total", "counter", "Tarefas concluídas depois do prazo",
+                         [({}, adm.late)])
+            self._metric(out, "admission_pressure", "gauge", "Sinal de pressão para a fonte de chegadas",
+                         [({}, int(adm.pressure))])
+
+    def _worker_metrics(self, out):
+        m = self.master
+        in_flight = list(m.in_flight.items())
+        self._metric(out, "worker_in_flight", "gauge", "Tarefas enviadas ao worker e ainda não concluídas",
+                     [({"worker": sid}, n) for sid, n in in_flight])
+        state = m.state
+        rows = list(m.state_rows.items())
+        if state is not None and rows:
+            now = time.time()
+            for col, (name, kind, help_text) in WORKER_COLUMNS.items():
+                values = state.column(col)
+                self._metric(out, name, kind, help_text, [({"worker": sid}, values[row]) for sid, row in rows])
+            beats = state.column("heartbeat")
+            self._metric(out, "worker_heartbeat_age_seconds", "gauge", "Segundos desde o último heartbeat",
+                         [({"worker": sid}, max(0.0, now - beats[row])) for sid, row in rows])
+            return
+        # sem tabela de estado: CPU e RSS do processo worker pelo psutil, só na coleta
+        cpu, rss = [], []
+        for sid, proc in list(m.worker_procs.items()):
+            pid = getattr(proc, "pid", None)
+            if pid is None:
+                continue
+            try:
+                h = self.handles.get(pid)
+                if h is None:
+                    h = self.handles[pid] = psutil.Process(pid)
+                with h.oneshot():
+                    t = h.cpu_times()
+                    cpu.append(({"worker": sid}, t.user + t.system))
+                    rss.append(({"worker": sid}, h.memory_info().rss))
+            except psutil.Error:
+                self.handles.pop(pid, None)
+        _, kind, help_text = WORKER_COLUMNS["cpu_time"]
+        self._metric(out, "worker_cpu_seconds_total", kind, help_text, cpu)
+        _, kind, help_text = WORKER_COLUMNS["rss"]
+        self._metric(out, "worker_rss_bytes", kind, help_text, rss)
+
+    def _latency_metrics(self, out):
+        bounds = [_value(b) for b in self.buckets] + ["+Inf"]
+        hists = sorted(self.histograms.items(), key=lambda x: (x[0][0], str(x[0][1])))
+        for series in SERIES:
+            name = f"{PREFIX}task_{series}_seconds"
+            out.append(f"# HELP {name} Latência {series} das tarefas concluídas, por tipo")
+            out.append(f"# TYPE {name} histogram")
+            for (s, tipo), h in hists:
+                if s != series:
+                    continue
+                cumulative, total = h.snapshot()
+                for le, c in zip(bounds, cumulative):
+                    out.append(f"{name}_bucket{_labels({'tipo': tipo, 'le': le})} {c}")
+                out.append(f"{name}_sum{_labels({'tipo': tipo})} {_value(total)}")
+                out.append(f"{name}_count{_labels({'tipo': tipo})} {cumulative[-1]}")
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    parts = []
+    for k, v in labels.items():
+        v = str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        parts.append(f'{k}="{v}"')
+    return "{" + ",".join(parts) + "}"
+
+
+def _value(x):
+    if isinstance(x, int):
+        return str(x)
+    return repr(float(x))
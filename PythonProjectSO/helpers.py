@@ -1,9 +1,156 @@
 # utils.py
 import json
 import os
+import re
+
+STREAM_CHUNK = 1 << 16   # bytes lidos por vez no modo streaming
+NDJSON_EXTS = (".ndjson", ".jsonl")
+_SPACE = re.compile(r"[ \t\r\n]*")
+_SPACE_COMMA = re.compile(r"[ \t\r\n,]*")
 
 def load_input(path):
     # aceita caminho relativo ou absoluto
     path = os.path.abspath(path)
+    if path.endswith(NDJSON_EXTS):
+        servers, tasks = load_input_stream(path)
+        return {"servidores": servers, "requisicoes": list(tasks)}
     with open(path, "r", encoding="utf-8") as f:
         return json.load(f)
+
+def load_input_stream(path):
+    """
+    Versão streaming de load_input: retorna (servidores, gerador de requisições).
+    As requisições são lidas do disco sob demanda, então a memória não cresce com o arquivo.
+    Formatos aceitos:
+      - .ndjson/.jsonl: primeira linha {"servidores": [...]}, depois uma requisição por linha
+      - .json: o mesmo formato de load_input (o array "requisicoes" é lido incrementalmente)
+    """
+    path = os.path.abspath(path)
+    if path.endswith(NDJSON_EXTS):
+        with open(path, "r", encoding="utf-8") as f:
+            header = json.loads(f.readline())
+        return header["servidores"], _iter_ndjson(path)
+    servers = list(_iter_json_array(path, "servidores"))
+    return servers, _iter_json_array(path, "requisicoes")
+
+def _iter_ndjson(path):
+    with open(path, "r", encoding="utf-8") as f:
+        f.readline()  # cabeçalho com os servidores
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+def _iter_json_array(path, key):
+    """
+    Itera os elementos do array 'key' do objeto JSON de topo sem carregar o arquivo inteiro.
+    Só a chave do objeto de topo conta (o mesmo texto dentro de valores ou de objetos aninhados
+    é ignorado); os valores das outras chaves são pulados elemento a elemento.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        reader = _JsonReader(f, path)
+        reader.expect("{")
+        while True:
+            reader.skip(commas=True)
+            if reader.peek() == "}":
+                raise ValueError(f"Chave {key!r} não encontrada em {path}")
+            name = reader.decode()
+            reader.expect(":")
+            if name != key:
+                reader.skip_value()
+                continue
+            reader.expect("[")
+            yield from reader.items()
+            return
+
+class _JsonReader:
+    """Leitura incremental de JSON em blocos de STREAM_CHUNK: buffer, posição e refill."""
+
+    def __init__(self, f, path):
+        self.f = f
+        self.path = path
+        self.decoder = json.JSONDecoder()
+        self.buf = ""
+        self.pos = 0
+
+    def _fill(self):
+        chunk = self.f.read(STREAM_CHUNK)
+        if not chunk:
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def skip(self, commas=False):
+        """Pula espaços (e vírgulas) até o próximo caractere significativo."""
+        space = _SPACE_COMMA if commas else _SPACE
+        while True:
+            self.pos = space.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return
+            if not self._fill():
+                raise ValueError(f"JSON incompleto em {self.path}")
+
+    def peek(self):
+        self.skip()
+        return self.buf[self.pos]
+
+    def expect(self, ch):
+        if self.peek() != ch:
+            raise ValueError(f"JSON inválido em {self.path}: esperado {ch!r}, encontrado {self.buf[self.pos]!r}")
+        self.pos += 1
+
+    def decode(self):
+        """Decodifica o próximo valor completo (ex.: uma chave ou um elemento de array)."""
+        self.skip()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                # valor cortado no fim do bloco: ler mais e tentar de novo
+                if not self._fill():
+                    raise
+                continue
+            # um número no fim do bloco pode continuar no próximo
+            if end < len(self.buf) or not self._fill():
+                break
+        self.pos = end
+        if self.pos > STREAM_CHUNK:
+            self.buf, self.pos = self.buf[self.pos:], 0
+        return value
+
+    def items(self):
+        """Elementos do array cujo '[' acabou de ser lido, até o ']'."""
+        raw_decode = self.decoder.raw_decode
+        space = _SPACE_COMMA.match
+        while True:
+            # caminho rápido: elemento inteiro no buffer, sem chamadas de método por elemento
+            buf = self.buf
+            pos = space(buf, self.pos).end()
+            if pos < len(buf) and buf[pos] != "]":
+                try:
+                    item, end = raw_decode(buf, pos)
+                except json.JSONDecodeError:
+                    end = len(buf)
+                if end < len(buf):
+                    self.pos = end
+                    if end > STREAM_CHUNK:
+                        self.buf, self.pos = buf[end:], 0
+                    yield item
+                    continue
+            # fim do bloco (ou do array): com leitura de mais blocos
+            self.pos = pos
+            self.skip(commas=True)
+            if self.buf[self.pos] == "]":
+                self.pos += 1
+                return
+            yield self.decode()
+
+    def skip_value(self):
+        # arrays são pulados elemento a elemento (a memória fica limitada ao maior elemento)
+        if self.peek() == "[":
+            self.pos += 1
+            for _ in self.items():
+                pass
+        else:
+            self.decode()
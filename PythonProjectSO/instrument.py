@@ -0,0 +1,258 @@
+# instrument.py
+import cProfile
+import functools
+import io
+import os
+import pstats
+import sys
+import tempfile
+import threading
+import time
+from array import array
+
+# Instrumentação do caminho quente: contadores, tempos e histogramas de memória fixa, mais um
+# profiler opcional por processo. Desligada, o Master guarda instr = None e cada ponto
+# instrumentado custa só um teste 'is not None' (métodos embrulhados não são trocados).
+
+HIST_BUCKETS = 65        # bucket b = valores com bit_length b (0 .. 2**64)
+SAMPLE_INTERVAL = 0.005  # segundos entre amostras do SamplingProfiler
+PROFILE_TOP = 30         # funções/pilhas mantidas no relatório
+
+
+class Histogram:
+    """
+    Histograma de inteiros não negativos (ex.: ns, profundidade de fila) em buckets de potências
+    de 2: memória fixa e custo O(1) por amostra. Quantis interpolados dentro do bucket.
+    """
+
+    __slots__ = ("buckets", "count", "total", "min", "max")
+
+    def __init__(self):
+        self.buckets = array("q", bytes(8 * HIST_BUCKETS))
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = 0
+
+    def add(self, v):
+        v = int(v) if v > 0 else 0
+        self.buckets[v.bit_length()] += 1
+        self.count += 1
+        self.total += v
+        if self.min is None or v < self.min:
+            self.min = v
+        if v > self.max:
+            self.max = v
+
+    def quantile(self, p):
+        if not self.count:
+            return 0.0
+        rank = p * self.count
+        seen = 0
+        for b, n in enumerate(self.buckets):
+            if n and seen + n >= rank:
+                lo = 0 if b == 0 else 1 << (b - 1)
+                hi = min((1 << b) - 1, self.max)
+                lo = max(lo, self.min)
+                return lo + (hi - lo) * (rank - seen) / n
+            seen += n
+        return float(self.max)
+
+    def summary(self, scale=1.0):
+        """{count, mean, p50, p90, p99, max}, com os valores multiplicados por 'scale'."""
+        if not self.count:
+            return {"count": 0}
+        return {
+            "count": self.count,
+            "mean": self.total / self.count * scale,
+            "p50": self.quantile(0.50) * scale,
+            "p90": self.quantile(0.90) * scale,
+            "p99": self.quantile(0.99) * scale,
+            "max": self.max * scale,
+        }
+
+
+class SamplingProfiler:
+    """
+    Profiler por amostragem: uma thread lê as pilhas de todas as outras threads do processo a cada
+    'interval' segundos (sys._current_frames) e conta cada pilha. Cobre as threads de slot do
+    worker, que o cProfile (por thread) não vê. Saída no formato 'collapsed' (flamegraph.pl, speedscope).
+    """
+
+    def __init__(self, interval=SAMPLE_INTERVAL):
+        self.interval = interval
+        self.stacks = {}     # "f1;f2;f3" (raiz -> folha) -> amostras
+        self.samples = 0
+        self.stopping = threading.Event()
+        self.thread = None
+
+    def start(self):
+        self.stopping.clear()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        if self.thread is not None:
+            self.stopping.set()
+            self.thread.join()
+            self.thread = None
+        return self
+
+    def _run(self):
+        own = threading.get_ident()
+        stacks = self.stacks
+        while not self.stopping.wait(self.interval):
+            for tid, frame in sys._current_frames().items():
+                if tid == own:
+                    continue
+                names = []
+                while frame is not None:
+                    code = frame.f_code
+                    names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                key = ";".join(reversed(names))
+                stacks[key] = stacks.get(key, 0) + 1
+                self.samples += 1
+
+    def dump(self, path):
+        """Grava as pilhas em 'collapsed' (uma por linha: 'f1;f2;f3 amostras'), mais frequentes primeiro."""
+        with open(path, "w", encoding="utf-8") as f:
+            for key, n in sorted(self.stacks.items(), key=lambda kv: -kv[1]):
+                f.write(f"{key} {n}\n")
+
+
+def worker_profile_path(pid):
+    """Arquivo em que o worker 'pid' grava as pilhas amostradas ao receber CMD_PROFILE de parada."""
+    return os.path.join(tempfile.gettempdir(), f"projeto_so_profile_{pid}.txt")
+
+def read_collapsed(path, top=PROFILE_TOP):
+    """Lê um arquivo 'collapsed' e retorna {"samples", "stacks": [[pilha, amostras], ...]} (as 'top' maiores)."""
+    stacks = []
+    total = 0
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            key, _, n = line.rstrip("\n").rpartition(" ")
+            total += int(n)
+            if len(stacks) < top:
+                stacks.append([key, int(n)])
+    return {"samples": total, "stacks": stacks}
+
+
+class Instrumentation:
+    """
+    Superfície de instrumentação de uma execução:
+      count(nome)           contadores
+      time_ns(nome, ns)     tempos (histograma em ns); wrap() embrulha um método existente
+      observe(nome, valor)  histogramas de valores (ex.: profundidade de fila)
+    profile: None, "cprofile" (determinístico, só a thread do Master) ou "sample" (amostragem de
+    todas as threads). Os workers sempre usam amostragem (ver worker.py, CMD_PROFILE).
+    """
+
+    def __init__(self, profile=None):
+        if profile not in (None, "cprofile", "sample"):
+            raise ValueError("Unknown profile mode: " + str(profile))
+        self.profile = profile
+        self.counters = {}
+        self.timers = {}
+        self.hists = {}
+        self.profiler = None
+        self.profiles = {}   # nome do processo -> resultado do profiler
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def time_ns(self, name, ns):
+        h = self.timers.get(name)
+        if h is None:
+            h = self.timers[name] = Histogram()
+        h.add(ns)
+
+    def observe(self, name, value):
+        h = self.hists.get(name)
+        if h is None:
+            h = self.hists[name] = Histogram()
+        h.add(value)
+
+    def wrap(self, obj, method, name=None, per_item=False):
+        """
+        Troca obj.method por uma versão cronometrada (atributo da instância; a classe não muda).
+        per_item: o primeiro argumento é uma sequência e o tempo por item vai para 'nome.per_item'.
+        """
+        name = name or method
+        fn = getattr(obj, method)
+        clock = time.perf_counter_ns
+        record = self.time_ns
+
+        if per_item:
+            @functools.wraps(fn)
+            def timed(items, *args, **kwargs):
+                t0 = clock()
+                try:
+                    return fn(items, *args, **kwargs)
+                finally:
+                    ns = clock() - t0
+                    record(name, ns)
+                    if items:
+                        record(name + ".per_item", ns // len(items))
+        else:
+            @functools.wraps(fn)
+            def timed(*args, **kwargs):
+                t0 = clock()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    record(name, clock() - t0)
+        setattr(obj, method, timed)
+
+    # -------------------------
+    # profiler do processo atual
+    # -------------------------
+    def start_profile(self):
+        if self.profile == "cprofile":
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+        elif self.profile == "sample":
+            self.profiler = SamplingProfiler().start()
+
+    def stop_profile(self, name="master"):
+        if self.profiler is None:
+            return
+        if self.profile == "cprofile":
+            self.profiler.disable()
+            out = io.StringIO()
+            pstats.Stats(self.profiler, stream=out).sort_stats("cumulative").print_stats(PROFILE_TOP)
+            self.profiles[name] = {"cprofile": out.getvalue()}
+        else:
+            self.profiler.stop()
+            stacks = sorted(self.profiler.stacks.items(), key=lambda kv: -kv[1])[:PROFILE_TOP]
+            self.profiles[name] = {"samples": self.profiler.samples, "stacks": [list(s) for s in stacks]}
+        self.profiler = None
+
+    # -------------------------
+    # relatório
+    # -------------------------
+    def report(self, extra=None):
+        """Relatório da execução (dict serializável em JSON): tempos em µs, histogramas nas unidades originais."""
+        out = dict(extra or {})
+        out["counters"] = dict(self.counters)
+        out["timers_us"] = {k: h.summary(1e-3) for k, h in sorted(self.timers.items())}
+        out["histograms"] = {k: h.summary() for k, h in sorted(self.hists.items())}
+        if self.profiles:
+            out["profiles"] = self.profiles
+        return out
+
+    def format_report(self):
+        """Resumo legível dos tempos e histogramas (para o terminal)."""
+        lines = []
+        for k, h in sorted(self.timers.items()):
+            s = h.summary(1e-3)
+            lines.append(f"  {k:28s} n={s['count']:<8d} média {s['mean']:9.2f} µs | p50 {s['p50']:9.2f} | "
+                         f"p99 {s['p99']:9.2f} | máx {s['max']:9.2f}")
+        for k, h in sorted(self.hists.items()):
+            s = h.summary()
+            lines.append(f"  {k:28s} n={s['count']:<8d} média {s['mean']:9.2f}    | p50 {s['p50']:9.2f} | "
+                         f"p99 {s['p99']:9.2f} | máx {s['max']:9.2f}")
+        for k, v in sorted(self.counters.items()):
+            lines.append(f"  {k:28s} {v}")
+        return "\n".join(lines)
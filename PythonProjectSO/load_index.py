@@ -0,0 +1,105 @@
+# load_index.py
+import heapq
+
+
+class LoadIndex:
+    """
+    Índice dos servidores com slot livre, ordenados por carga relativa (carga / capacidade).
+
+    É um heap com invalidação preguiçosa: cada update empilha uma entrada nova com a versão
+    atual do servidor e as entradas antigas são descartadas quando chegam ao topo. Assim
+    update e least_loaded custam O(log S) em vez de reordenar todos os servidores a cada evento.
+    Empates são resolvidos pela ordem em que os servidores foram informados.
+    """
+
+    def __init__(self, capacities):
+        """
+        capacities: dict { server_id: capacidade } (a ordem do dict define o desempate)
+        """
+        self.capacity = {sid: max(1, int(c)) for sid, c in capacities.items()}
+        self.order = {sid: i for i, sid in enumerate(self.capacity)}
+        self.load = {sid: 0 for sid in self.capacity}
+        self.version = {sid: 0 for sid in self.capacity}
+        self.heap = [(0.0, self.order[sid], 0, sid) for sid in self.capacity]
+        heapq.heapify(self.heap)
+
+    def update(self, sid, load):
+        """Registra a nova carga (tarefas ocupando slots) do servidor sid."""
+        self.load[sid] = load
+        self.version[sid] += 1
+        cap = self.capacity[sid]
+        if load < cap:
+            heapq.heappush(self.heap, (load / cap, self.order[sid], self.version[sid], sid))
+        # entradas obsoletas demais: reconstrói o heap para manter o tamanho O(S)
+        if len(self.heap) > 4 * len(self.capacity) + 64:
+            self._rebuild()
+
+    def least_loaded(self):
+        """Servidor menos carregado que ainda tem slot livre, ou None se todos estão cheios."""
+        heap = self.heap
+        while heap:
+            _, _, ver, sid = heap[0]
+            if ver == self.version[sid]:
+                return sid
+            heapq.heappop(heap)
+        return None
+
+    def _rebuild(self):
+        self.heap = [(self.load[sid] / cap, self.order[sid], self.version[sid], sid)
+                     for sid, cap in self.capacity.items() if self.load[sid] < cap]
+        heapq.heapify(self.heap)
+
+
+class AffinityIndex(LoadIndex):
+    """
+    LoadIndex com colocação por tipo (best-fit ponderado): além do heap por carga, um heap por
+    tipo de tarefa ordenado pela pontuação speedup[tipo] * fração livre do servidor. Um servidor
+    duas vezes mais rápido para o tipo vale tanto quanto um servidor comum com o dobro de slots
+    livres, então cada tipo se concentra nos servidores que o executam melhor enquanto houver
+    folga neles. Sem perfil para o tipo, a escolha é a do LoadIndex (menos carregado).
+    update custa O(T log S), com T = tipos com perfil.
+    """
+
+    def __init__(self, capacities, speedups):
+        """
+        speedups: dict { server_id: { tipo: fator } } (fator ausente = 1.0)
+        """
+        super().__init__(capacities)
+        self.tipos = sorted({t for prof in speedups.values() for t in prof})
+        self.speedup = {t: {sid: float(speedups.get(sid, {}).get(t, 1.0)) for sid in self.capacity}
+                        for t in self.tipos}
+        self.type_heaps = {}
+        self._rebuild_types()
+
+    def update(self, sid, load):
+        super().update(sid, load)
+        cap = self.capacity[sid]
+        if load < cap:
+            free = (cap - load) / cap
+            ver = self.version[sid]
+            order = self.order[sid]
+            for t, heap in self.type_heaps.items():
+                heapq.heappush(heap, (-self.speedup[t][sid] * free, order, ver, sid))
+            # os heaps de tipo crescem juntos: basta olhar um
+            if self.tipos and len(self.type_heaps[self.tipos[0]]) > 4 * len(self.capacity) + 64:
+                self._rebuild_types()
+
+    def best_for(self, tipo):
+        """Servidor com slot livre de maior pontuação para 'tipo', ou None se todos estão cheios."""
+        heap = self.type_heaps.get(tipo)
+        if heap is None:
+            return self.least_loaded()
+        while heap:
+            _, _, ver, sid = heap[0]
+            if ver == self.version[sid]:
+                return sid
+            heapq.heappop(heap)
+        return None
+
+    def _rebuild_types(self):
+        for t in self.tipos:
+            sp = self.speedup[t]
+            heap = [(-sp[sid] * (cap - self.load[sid]) / cap, self.order[sid], self.version[sid], sid)
+                    for sid, cap in self.capacity.items() if self.load[sid] < cap]
+            heapq.heapify(heap)
+            self.type_heaps[t] = heap
@@ -1,37 +1,107 @@
 # main.py
+import json
+import time
 from master import Master
-from helpers import load_input
+from simulation import SimMaster
+from helpers import load_input_stream
+from workload import make_workload, replay_trace, BackpressureSource
+from admission import AdmissionControl
 
 def main():
-    INPUT_FILE = "example_input.json"  
-    POLICY = "RR"                 # opções: RR, SJF, PRIORITY
+    INPUT_FILE = "example_input.json"   # .json ou .ndjson (cabeçalho com servidores + 1 requisição/linha)
+    POLICY = "RR"                 # opções: RR, SJF, PRIORITY, SRPT, EDF, WFQ, MLFQ, AGING
     ARRIVAL_MEAN = 0              # 0 = chegada imediata
+    WORKLOAD = None               # None = requisições do INPUT_FILE com intervalos de ARRIVAL_MEAN;
+                                  # "trace" = INPUT_FILE reproduzido pelo campo timestamp;
+                                  # carga sintética: poisson, bursty, diurnal, heavy_tail
+    WORKLOAD_TASKS = 1000         # tarefas da carga sintética (geradas sob demanda)
     SEED = 42
+    ENGINE = "REAL"               # opções: REAL (processos + CPU real), SIM (eventos discretos)
+    EXEC_MODE = "THREAD"          # opções: THREAD (threads, limitado pelo GIL), PROCESS (um processo por slot)
+    CPU_KERNEL = "python"         # trabalho simulado: python (segura o GIL) ou hash (libera o GIL)
+    CPU_WORK = "time"             # time (tempo_exec de relógio) ou fixed (trabalho fixo, calibrado no host)
+    PLACEMENT = "load"            # load (menos carregado) ou affinity (speedup do tipo nos perfis dos servidores)
+    PIN_CPUS = False              # prende cada worker a um bloco de CPUs (os.sched_setaffinity)
+    BATCH_SIZE = 1                # eventos por lote worker -> master (1 = sem lote)
+    FLUSH_INTERVAL = 0.002        # atraso máximo (s) de um lote incompleto
+    QUANTUM = None                # fatia de tempo (s) por execução, com preempção (None = até o fim)
+    PREFETCH = 0                  # tarefas extras na fila local de cada worker (roubadas por workers ociosos)
+    MAX_BACKLOG = None            # tarefas na fila do Master (None = sem controle de admissão)
+    PRIORITY_LIMITS = None        # {prioridade: máximo na fila}, ex.: {3: 50}
+    SHED = False                  # fila cheia: chegada mais prioritária descarta uma de prioridade pior
+    DROP_EXPIRED = False          # descarta sem executar tarefas com 'deadline' vencido
+    OVERFLOW = "reject"           # reject (descarta a chegada) ou block (retém e desacelera a fonte)
+    LOG_FILE = None               # eventos em JSON lines (ex.: "events.jsonl")
+    LOG_RATE = None               # máximo de mensagens/s por tipo de evento (None = todas)
+    INSTRUMENT = False            # tempos/histogramas do caminho quente (relatório instrument_<ts>.json)
+    PROFILE = None                # None, "cprofile" ou "sample" (Master; workers sempre por amostragem)
+    METRICS_PORT = None           # /metrics (Prometheus) em 127.0.0.1:porta durante a execução (ex.: 9108)
 
-    # Carregar JSON
-    data = load_input(INPUT_FILE)
-    servers = data["servidores"]
-    tasks = data["requisicoes"]
+    # Carregar servidores; as requisições são lidas do arquivo (ou geradas) sob demanda
+    if WORKLOAD == "trace":
+        servers, tasks = replay_trace(INPUT_FILE)
+    else:
+        servers, tasks = load_input_stream(INPUT_FILE)
+        if WORKLOAD is not None:
+            tasks = make_workload(WORKLOAD, WORKLOAD_TASKS, seed=SEED,
+                                  arrival_mean=(ARRIVAL_MEAN if ARRIVAL_MEAN > 0 else 1.0))
 
     print("Iniciando simulação BSB Compute...")
     print(f"Arquivo de entrada: {INPUT_FILE}")
     print(f"Política: {POLICY}")
     print(f"Arrival mean: {ARRIVAL_MEAN}")
+    print(f"Workload: {WORKLOAD or 'arquivo'}")
+    print(f"Engine: {ENGINE}")
+    print(f"Exec mode: {EXEC_MODE}")
+    print(f"CPU kernel: {CPU_KERNEL} ({CPU_WORK})")
+    print(f"Placement: {PLACEMENT}" + (" (CPUs fixas)" if PIN_CPUS else ""))
+    print(f"Quantum: {QUANTUM}")
+
+    admission = None
+    if MAX_BACKLOG is not None or PRIORITY_LIMITS or DROP_EXPIRED:
+        admission = AdmissionControl(max_backlog=MAX_BACKLOG, priority_limits=PRIORITY_LIMITS, shed=SHED,
+                                     drop_expired=DROP_EXPIRED, overflow=OVERFLOW)
+        print(f"Admissão: backlog {MAX_BACKLOG} | limites {PRIORITY_LIMITS} | overflow {OVERFLOW}")
+        if OVERFLOW == "block":
+            tasks = BackpressureSource(tasks)
 
     # Criar Master
-    m = Master(
+    master_cls = SimMaster if ENGINE == "SIM" else Master
+    m = master_cls(
         servers,
         tasks,
         policy=POLICY,
         arrival_mean=(ARRIVAL_MEAN if ARRIVAL_MEAN > 0 else 0.01),
         seed=SEED,
-        realtime=(ARRIVAL_MEAN > 0)
+        realtime=(ARRIVAL_MEAN > 0 or WORKLOAD is not None),
+        exec_mode=EXEC_MODE,
+        cpu_kernel=CPU_KERNEL,
+        cpu_work=CPU_WORK,
+        placement=PLACEMENT,
+        pin_cpus=PIN_CPUS,
+        quantum=QUANTUM,
+        prefetch=PREFETCH,
+        admission=admission,
+        batch_size=BATCH_SIZE,
+        flush_interval=FLUSH_INTERVAL,
+        log_path=LOG_FILE,
+        log_rate=LOG_RATE,
+        instrument=INSTRUMENT,
+        profile=PROFILE,
+        metrics_port=METRICS_PORT
     )
 
     # Rodar simulação
     m.run()
     m.print_summary()
 
+    report = m.instrument_report()
+    if report is not None:
+        path = f"instrument_{int(time.time())}.json"
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Relatório de instrumentação salvo em: {path}")
+
 
 if __name__ == "__main__":
     main()
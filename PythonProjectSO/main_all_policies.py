@@ -1,133 +1,278 @@
 # main_all_policies.py
 import csv
+import json
 import time
 from helpers import load_input
 from master import Master
+from simulation import SimMaster
+from pool import WorkerPool
+from sweep import build_grid, run_sweep, aggregate_ci
 
 INPUT_FILE = "example_input.json"   # ajuste se necessário
 POLICIES = ["RR", "SJF", "PRIORITY"]  # políticas pedidas no PDF
+ENGINE = "REAL"                       # REAL (processos + CPU real) ou SIM (eventos discretos)
+EXEC_MODE = "THREAD"                  # THREAD (threads no worker) ou PROCESS (um processo por slot)
+QUANTUM = None                        # fatia de tempo (s) com preempção; None = cada tarefa roda até o fim
+INSTRUMENT = False                    # relatório de instrumentação por run (instrument_<ts>.jsonl)
+PROFILE = None                        # None, "cprofile" ou "sample": profiler do Master e dos workers
 
-def run_policy_once(servers, tasks, policy, realtime=False, seed=42):
+# varredura: cada combinação política × seed × arquivo × arrival_mean é um run independente
+INPUT_FILES = [INPUT_FILE]
+SEEDS = [42]
+ARRIVAL_MEANS = [0]                   # 0 = chegada imediata; > 0 = chegadas exponenciais em tempo real
+MAX_PARALLEL = None                   # runs simultâneos (None = núcleos disponíveis / núcleos por run)
+CI_METRICS = ["avg_response", "avg_wait", "p99_response", "throughput", "total_time"]
+
+TASK_KEYS = ["policy","seed","input_file","arrival_mean","task_id","worker_id","arrival","dispatch",
+             "start","end","wait","runtime","response","prioridade","tipo"]
+SUMMARY_KEYS = ["policy","seed","input_file","arrival_mean","num_tasks","avg_response","avg_wait","avg_service",
+                "p50_response","p90_response","p99_response","max_response","throughput","total_time",
+                "preemptions","avg_switch_ms"]
+LATENCY_KEYS = ["policy","seed","input_file","arrival_mean","dimension","name","count","mean_wait",
+                "mean_response","p50_response","p90_response","p99_response","max_response"]
+CI_KEYS = ["policy","metric","n","mean","ci_low","ci_high"]
+
+def run_policy_once(servers, tasks, policy, realtime=False, seed=42, engine="REAL", exec_mode="THREAD",
+                    arrival_mean=0, use_monitor=True, quantum=None, pool=None, instrument=False, profile=None):
     """
     Executa a simulação com a política escolhida e retorna o objeto Master
     (que contém completed_log, assigned_log, start/end times, etc).
+    engine: "REAL" usa workers em processos; "SIM" usa o relógio virtual (SimMaster).
+    pool: WorkerPool compartilhado entre execuções (None = processos criados só para esta).
+    instrument / profile: ver Master (relatório em m.instrument_report()).
     """
     print("\n" + "="*60)
-    print(f"Iniciando simulação: {policy}")
+    print(f"Iniciando simulação: {policy} ({engine})")
     print("="*60)
-    m = Master(
+    master_cls = SimMaster if engine == "SIM" else Master
+    m = master_cls(
         servers=servers,
         tasks=tasks,
         policy=policy,
-        arrival_mean=0,     # chegada imediata para comparação determinística
+        arrival_mean=arrival_mean,  # só usado em tempo real; 0 = chegada imediata
         seed=seed,
-        realtime=realtime
+        realtime=realtime,
+        exec_mode=exec_mode,
+        quantum=quantum,
+        pool=pool,
+        use_monitor=use_monitor,
+        instrument=instrument,
+        profile=profile
     )
     m.run()
     return m
 
-def write_task_csv(filename, records):
+class CsvAppender:
+    """CSV que fica aberto durante a varredura: cada run acrescenta suas linhas e faz flush."""
+
+    def __init__(self, filename, keys):
+        self.filename = filename
+        self.keys = keys
+        self.file = open(filename, "w", newline="", encoding="utf-8")
+        self.writer = csv.DictWriter(self.file, fieldnames=keys)
+        self.writer.writeheader()
+
+    def write(self, rows):
+        for r in rows:
+            self.writer.writerow({k: r.get(k, "") for k in self.keys})
+        self.file.flush()
+
+    def write_store(self, store, extra=None):
+        """Acrescenta as linhas de um ResultStore montadas coluna a coluna (sem dict por tarefa)."""
+        self.writer.writer.writerows(store.rows(self.keys, extra))
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def write_task_csv(filename, store, extra=None):
     """
-    records: lista de dicts com campos:
-      policy, task_id, worker_id, start, end, runtime, prioridade, tipo
+    store: ResultStore (master.completed_log) com task_id, worker_id, arrival, dispatch, start, end,
+    wait, runtime, response, prioridade, tipo; extra: colunas constantes (ex.: {"policy": "RR"})
     """
-    keys = ["policy","task_id","worker_id","start","end","runtime","prioridade","tipo"]
-    with open(filename, "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=keys)
-        writer.writeheader()
-        for r in records:
-            writer.writerow({k: r.get(k, "") for k in keys})
+    with CsvAppender(filename, TASK_KEYS) as out:
+        out.write_store(store, extra)
     print(f"CSV detalhado por tarefa salvo em: {filename}")
 
 def write_summary_csv(filename, summaries):
-    keys = ["policy","num_tasks","avg_response","throughput","total_time"]
-    with open(filename, "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=keys)
-        writer.writeheader()
-        for s in summaries:
-            writer.writerow({k: s.get(k,"") for k in keys})
+    with CsvAppender(filename, SUMMARY_KEYS) as out:
+        out.write(summaries)
     print(f"CSV resumo por política salvo em: {filename}")
 
+def write_latency_csv(filename, rows):
+    with CsvAppender(filename, LATENCY_KEYS) as out:
+        out.write(rows)
+    print(f"CSV de latência por worker/tipo salvo em: {filename}")
+
 def summarize_master(master_obj, policy_name):
     """
-    Extrai métricas e lista de registros por tarefa a partir do Master.
-    Retorna (per_task_records, summary_dict)
+    Extrai métricas e os registros por tarefa a partir do Master.
+    As latências vêm das colunas de completed_log (ou dos agregados em fluxo quando
+    keep_log=False), via master_obj.stats.
+    Retorna (per_task_store, summary_dict)
     """
-    per_task = []
-    resp_times = []
-    for rec in master_obj.completed_log:
-        task_id = rec.get("task_id") or rec.get("task", {}).get("id")
-        worker_id = rec.get("worker_id") or rec.get("worker")
-        start = rec.get("start") or rec.get("task", {}).get("start_time")
-        end = rec.get("end") or rec.get("time")
-        runtime = rec.get("runtime") or (end - start if start and end else None)
-        prioridade = rec.get("prioridade") or rec.get("task", {}).get("prioridade")
-        tipo = rec.get("tipo") or rec.get("task", {}).get("tipo")
-
-        per_task.append({
-            "policy": policy_name,
-            "task_id": task_id,
-            "worker_id": worker_id,
-            "start": start,
-            "end": end,
-            "runtime": runtime,
-            "prioridade": prioridade,
-            "tipo": tipo
-        })
-        if runtime is not None:
-            resp_times.append(runtime)
-
-    total_tasks = len(per_task)
-    avg_resp = (sum(resp_times) / len(resp_times)) if resp_times else 0.0
+    per_task = master_obj.completed_log
+
+    lat = master_obj.stats.summary()
+    total_tasks = master_obj.stats.count()
     total_time = (master_obj.end_time - master_obj.start_time) if (master_obj.start_time and master_obj.end_time) else 0.0
-    throughput = (len(resp_times) / total_time) if total_time > 0 else 0.0
+    throughput = (total_tasks / total_time) if total_time > 0 else 0.0
+    resp = lat.get("response", {})
 
     summary = {
         "policy": policy_name,
         "num_tasks": total_tasks,
-        "avg_response": avg_resp,
+        "avg_response": resp.get("mean", 0.0),
+        "avg_wait": lat.get("wait", {}).get("mean", 0.0),
+        "avg_service": lat.get("service", {}).get("mean", 0.0),
+        "p50_response": resp.get("p50", 0.0),
+        "p90_response": resp.get("p90", 0.0),
+        "p99_response": resp.get("p99", 0.0),
+        "max_response": resp.get("max", 0.0),
         "throughput": throughput,
-        "total_time": total_time
+        "total_time": total_time,
+        "preemptions": master_obj.preemptions,
+        "avg_switch_ms": master_obj.switch_cost.stats.mean * 1000
     }
 
     return per_task, summary
 
-def main():
-    data = load_input(INPUT_FILE)
-    servers = data["servidores"]
-    tasks = data["requisicoes"]
+def latency_rows(master_obj, policy_name):
+    """Linhas de latência por worker e por tipo para write_latency_csv."""
+    rows = []
+    for dimension in ("worker", "tipo"):
+        for name in master_obj.stats.names(dimension):
+            lat = master_obj.stats.summary(dimension, name)
+            resp = lat["response"]
+            rows.append({
+                "policy": policy_name,
+                "dimension": dimension,
+                "name": name,
+                "count": resp["count"],
+                "mean_wait": lat["wait"]["mean"],
+                "mean_response": resp["mean"],
+                "p50_response": resp["p50"],
+                "p90_response": resp["p90"],
+                "p99_response": resp["p99"],
+                "max_response": resp["max"]
+            })
+    return rows
 
-    all_task_records = []
-    all_summaries = []
+_pool = None   # WorkerPool do processo da varredura, reaproveitado entre os runs que ele executa
 
-    for policy in POLICIES:
-        m = run_policy_once(servers, tasks, policy, realtime=False, seed=42)
-        per_task, summary = summarize_master(m, policy)
-        all_task_records.extend(per_task)
-        all_summaries.append(summary)
+def shared_pool():
+    global _pool
+    if _pool is None:
+        _pool = WorkerPool()
+    return _pool
 
-    # salvar CSV detalhado por tarefa
+def close_shared_pool():
+    global _pool
+    if _pool is not None:
+        _pool.close()
+        _pool = None
+
+def run_config(config):
+    """
+    Executa uma configuração da varredura (no processo filho criado por sweep.run_sweep)
+    e devolve (registros por tarefa, resumo, linhas de latência, relatório de instrumentação ou
+    None), já marcados com a configuração.
+    """
+    data = load_input(config["input_file"])
+    arrival_mean = config["arrival_mean"]
+    m = run_policy_once(data["servidores"], data["requisicoes"], config["policy"],
+                        realtime=arrival_mean > 0, seed=config["seed"], engine=ENGINE,
+                        exec_mode=EXEC_MODE, arrival_mean=arrival_mean, use_monitor=False, quantum=QUANTUM,
+                        pool=shared_pool() if ENGINE == "REAL" else None,
+                        instrument=INSTRUMENT, profile=PROFILE)
+    per_task, summary = summarize_master(m, config["policy"])
+    rows = latency_rows(m, config["policy"])
+    report = m.instrument_report()
+    for r in rows + [summary] + ([report] if report else []):
+        r.update(config)
+    return per_task, summary, rows, report
+
+def cores_per_run():
+    """Núcleos que um run ocupa: 1 no modo SIM; um por worker (THREAD) ou por slot (PROCESS)."""
+    if ENGINE == "SIM":
+        return 1
+    cores = 1
+    for path in INPUT_FILES:
+        servers = load_input(path)["servidores"]
+        if EXEC_MODE == "PROCESS":
+            cores = max(cores, sum(int(s["capacidade"]) for s in servers))
+        else:
+            cores = max(cores, len(servers))
+    return cores
+
+def main():
+    configs = build_grid(POLICIES, SEEDS, INPUT_FILES, ARRIVAL_MEANS)
+
+    # CSVs gravados incrementalmente: cada run acrescenta suas linhas assim que termina
     ts = int(time.time())
     detail_csv = f"tasks_detail_{ts}.csv"
     summary_csv = f"policies_summary_{ts}.csv"
-    write_task_csv(detail_csv, all_task_records)
-    write_summary_csv(summary_csv, all_summaries)
+    latency_csv = f"latency_by_group_{ts}.csv"
+    ci_csv = f"policies_ci_{ts}.csv"
+    instrument_jsonl = f"instrument_{ts}.jsonl"
+    all_summaries = []
+
+    with CsvAppender(detail_csv, TASK_KEYS) as detail_out, \
+            CsvAppender(summary_csv, SUMMARY_KEYS) as summary_out, \
+            CsvAppender(latency_csv, LATENCY_KEYS) as latency_out:
+
+        def on_result(config, ok, result):
+            if not ok:
+                print(f"Falha no run {config}:\n{result}")
+                return
+            per_task, summary, rows, report = result
+            detail_out.write_store(per_task, config)
+            summary_out.write([summary])
+            latency_out.write(rows)
+            if report is not None:
+                # uma linha JSON por run, ao lado dos CSVs
+                with open(instrument_jsonl, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(report) + "\n")
+            all_summaries.append(summary)
+            print(f"[{len(all_summaries)}/{len(configs)}] {config['policy']} seed={config['seed']} "
+                  f"arquivo={config['input_file']} arrival_mean={config['arrival_mean']} | "
+                  f"resposta média {summary['avg_response']:.3f}s | throughput {summary['throughput']:.3f} tasks/s")
 
-    # imprimir tabela comparativa
+        print(f"Varredura: {len(configs)} runs ({ENGINE})")
+        run_sweep(configs, run_config, on_result, max_parallel=MAX_PARALLEL, cores_per_run=cores_per_run(),
+                  teardown=close_shared_pool)
+
+    ci_rows = aggregate_ci(all_summaries, CI_METRICS)
+    with CsvAppender(ci_csv, CI_KEYS) as out:
+        out.write(ci_rows)
+
+    # imprimir tabela comparativa (média e IC de 95% entre os runs de cada política)
     print("\n" + "="*80)
     print("COMPARAÇÃO ENTRE POLÍTICAS")
     print("="*80)
-    for s in all_summaries:
-        print(f"Política: {s['policy']}")
-        print(f"  Tarefas processadas : {s['num_tasks']}")
-        print(f"  Tempo total         : {s['total_time']:.3f}s")
-        print(f"  Tempo médio resposta: {s['avg_response']:.3f}s")
-        print(f"  Throughput          : {s['throughput']:.3f} tasks/s")
+    for policy in POLICIES:
+        rows = {r["metric"]: r for r in ci_rows if r["policy"] == policy}
+        if not rows:
+            continue
+        print(f"Política: {policy} ({rows[CI_METRICS[0]]['n']} runs)")
+        for metric in CI_METRICS:
+            r = rows[metric]
+            print(f"  {metric:20s}: {r['mean']:.3f}  [IC95% {r['ci_low']:.3f} .. {r['ci_high']:.3f}]")
         print("-"*60)
 
     print("\nArquivos gerados:")
     print(" - Detalhes por tarefa:", detail_csv)
-    print(" - Resumo políticas:   ", summary_csv)
+    print(" - Resumo por run:     ", summary_csv)
+    print(" - Latência por grupo: ", latency_csv)
+    print(" - IC por política:    ", ci_csv)
+    if INSTRUMENT or PROFILE:
+        print(" - Instrumentação:     ", instrument_jsonl)
     print("\nFim.")
 
 if __name__ == "__main__":
@@ -1,28 +1,94 @@
 # master.py
-import multiprocessing as mp
+import os
 import time
 import random
-import argparse
-import queue
+import itertools
+from multiprocessing.connection import wait
 from scheduler import Scheduler
 from monitor import SystemMonitor
-from helpers import load_input
-from worker import worker_process
+from worker import EXEC_THREAD, KERNELS, KERNEL_PYTHON, WORK_MODES, WORK_TIME
+from pool import WorkerPool
+from load_index import LoadIndex, AffinityIndex
+from metrics import LatencyTracker, StreamingSummary
+from results import ResultStore, AssignmentLog
+from eventlog import EventLog, INFO
+from admission import ADMITTED, REJECTED, BLOCKED
+from exporter import MetricsExporter
+from instrument import Instrumentation, worker_profile_path, read_collapsed
+from protocol import (CMD_RUN, CMD_PING, CMD_RECLAIM, CMD_PROFILE, EV_STARTED,
+                      EV_DONE, EV_PONG, EV_EXITING, EV_PREEMPTED, EV_RECLAIMED, EV_PROFILED, pack_command,
+                      unpack_events)
+
+BALANCE_INTERVAL = 2.0   # segundos entre verificações de carga
+HEARTBEAT_INTERVAL = 1.0 # segundos entre pings aos workers
+HEARTBEAT_TIMEOUT = 5.0  # worker sem nenhum evento por este tempo é considerado travado
+RESPAWN_LIMIT = 3        # recriações por worker; depois disso ele sai da execução
+PLACEMENTS = ("load", "affinity")
+STATE_POLL = 0.001       # com lotes de eventos e backlog, intervalo máximo entre leituras da tabela de estado
 
 class Master:
-    def __init__(self, servers, tasks, policy="RR", arrival_mean=1.0, seed=42, realtime=True, monitor_interval=0.8):
+    def __init__(self, servers, tasks, policy="RR", arrival_mean=1.0, seed=42, realtime=True, monitor_interval=0.8, poll_interval=None,
+                 exec_mode=EXEC_THREAD, batch_size=1, flush_interval=0.002, keep_log=True,
+                 use_monitor=True, results_path=None, quantum=None, prefetch=0, steal=True,
+                 pool=None, heartbeat_interval=HEARTBEAT_INTERVAL, heartbeat_timeout=HEARTBEAT_TIMEOUT,
+                 verbose=True, log=None, log_path=None, log_level=INFO, log_rate=None,
+                 instrument=False, profile=None, cpu_kernel=KERNEL_PYTHON, shared_state=True,
+                 placement="load", pin_cpus=False, admission=None, metrics_port=None, cpu_work=WORK_TIME):
         random.seed(seed)
-        # servidores: lista de dicts {"id":int, "capacidade": int}
-        self.servers_meta = {s["id"]: {"id": s["id"], "capacity": int(s["capacidade"])} for s in servers}
+        # servidores: lista de dicts {"id":int, "capacidade": int} e, opcionais, "speedup" (fator por
+        # tipo de tarefa: tempo_exec / fator neste servidor) e "cpus" (CPUs do worker)
+        self.servers_meta = {s["id"]: {"id": s["id"], "capacity": int(s["capacidade"]),
+                                       "speedup": {t: float(f) for t, f in (s.get("speedup") or {}).items()},
+                                       "cpus": s.get("cpus")}
+                             for s in servers}
+        # colocação: "load" = servidor menos carregado; "affinity" = best-fit ponderado pelo
+        # speedup do tipo da tarefa (load_index.AffinityIndex)
+        if placement not in PLACEMENTS:
+            raise ValueError("Unknown placement: " + str(placement))
+        self.placement = placement
+        self.speedup = {sid: meta["speedup"] for sid, meta in self.servers_meta.items()}
+        # pin_cpus: workers sem "cpus" próprias recebem blocos de CPUs consecutivos (ver _cpu_affinity)
+        self.pin_cpus = pin_cpus
         self.policy = policy
         self.scheduler = Scheduler(policy=policy)
-        self.raw_tasks = list(tasks)  # tarefas aguardando chegada
+        # tarefas aguardando chegada: lista ou iterável lido sob demanda (ex.: helpers.load_input_stream)
+        self.raw_tasks = tasks
         self.arrival_mean = arrival_mean
         self.realtime = realtime
+        # None = laço orientado a eventos; > 0 = polling legado com sleep fixo (para comparação)
+        self.poll_interval = poll_interval
+        # THREAD: slots são threads no processo worker; PROCESS: cada slot roda num processo filho
+        self.exec_mode = exec_mode
+        # lotes de eventos worker -> master: até batch_size eventos ou flush_interval segundos
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        # fatia de tempo (s) por execução; tarefas preemptadas voltam à scheduler (None = sem preempção)
+        self.quantum = quantum
+        # tarefas enviadas além da capacidade (ficam na fila local do worker, prontas para começar)
+        # e roubo: slots ociosos recebem tarefas ainda não iniciadas recolhidas de outros workers
+        self.prefetch = max(0, int(prefetch))
+        self.steal = steal
+        # kernel do trabalho simulado nos workers (worker.KERNELS): "python" segura o GIL, "hash" não
+        if cpu_kernel not in KERNELS:
+            raise ValueError("Unknown cpu kernel: " + str(cpu_kernel))
+        self.cpu_kernel = cpu_kernel
+        # o que cada tarefa fixa nos workers (worker.WORK_MODES): "time" = tempo de serviço
+        # (tempo_exec de relógio), "fixed" = trabalho (tempo_exec * taxa calibrada iterações)
+        if cpu_work not in WORK_MODES:
+            raise ValueError("Unknown cpu work mode: " + str(cpu_work))
+        self.cpu_work = cpu_work
+
+        # canais de comunicação (protocolo binário, ver protocol.py)
+        # processos e canais vêm de um WorkerPool: o informado em 'pool' é compartilhado com outros
+        # Masters e sobrevive a esta execução; sem ele, um pool próprio é criado e fechado no fim
+        self.pool = pool if pool is not None else WorkerPool()
+        self.owns_pool = pool is None
+        self.in_channels = {}    # server_id -> CommandChannel (Master => Worker)
+        self.out_channels = {}   # server_id -> EventChannel (Worker => Master)
 
-        # filas de comunicação
-        self.in_queues = {}   # server_id -> mp.Queue (Master => Worker)
-        self.out_queue = mp.Queue()  # todos workers escrevem aqui (events)
+        # corpo das tarefas despachadas, indexado pelo wire id que trafega nos registros
+        self.task_table = {}
+        self.wire_ids = itertools.count(1)
 
         # processos workers
         self.worker_procs = {}  # server_id -> mp.Process
@@ -31,278 +97,870 @@ class Master:
         self.sent_pending = {}   # tasks sent but not yet "started" (count)
         self.in_flight = {}      # tasks started and not yet done
         self.capacity = {}       # capacity per worker
+        self.reclaiming = {}     # CMD_RECLAIM sem resposta, por worker (tarefas pedidas)
+        self.reclaimed = 0       # tarefas recolhidas e redistribuídas
+        self.assigned = {}       # wire ids enviados e ainda não devolvidos, por worker
+        # tabela de estado em memória compartilhada (statetable.py), escrita pelos workers: a carga
+        # de cada worker é enviadas - finished da tabela, sem esperar os eventos; o heartbeat da
+        # tabela substitui os pings. shared_state=False volta à contagem só por eventos
+        self.shared_state = shared_state
+        self.state = None
+        self.state_rows = {}     # server_id -> linha do worker na tabela
+        self.sent_total = {}     # server_id -> tarefas enviadas (base: 'finished' da tabela no início)
+
+        # supervisão: pings periódicos, último evento recebido de cada worker e falhas tratadas
+        # (heartbeat_interval=None desliga os pings; mortes continuam detectadas pelo sentinel)
+        self.heartbeat_interval = heartbeat_interval
+        self.heartbeat_timeout = heartbeat_timeout
+        self.last_seen = {}      # server_id -> time.monotonic() do último evento
+        # o que _wait_events espera: leitor de eventos -> ("events", sid), sentinel -> ("proc", sid)
+        self.waitables = {}
+        self.respawns = {}       # server_id -> recriações feitas
+        self.down = set()        # workers que passaram do RESPAWN_LIMIT
+        self.failures = []       # {worker, reason, detected_at, requeued, respawn_s, respawned}
 
         # logs / metrics
-        self.assigned_log = []   # (timestamp, task_id, server_id)
-        self.completed_log = []  # result events (dict with start,end,runtime,...)
+        # registros em colunas (results.py); results_path grava as colunas em fluxo num arquivo
+        self.assigned_log = AssignmentLog()   # (timestamp, task_id, server_id)
+        self.completed_log = ResultStore(path=results_path, keep=keep_log)
+        # com keep_log=False (modo streaming) os registros não ficam em memória e as latências
+        # por worker/tipo são agregadas em fluxo pelo LatencyTracker
+        self.latency = LatencyTracker()
+        self.keep_log = keep_log
+        # fonte dos agregados de latência (count/names/summary): colunas ou agregados em fluxo
+        self.stats = self.completed_log if keep_log else self.latency
+        # preempções e custo (s) de cada troca: slot parado entre a preempção e a próxima tarefa
+        self.preemptions = 0
+        self.switch_cost = StreamingSummary()
         self.start_time = None
         self.end_time = None
 
+        # log de eventos (eventlog.py): escrito por uma thread de fundo, o laço nunca espera por I/O.
+        # verbose = mensagens no console; log_path = linhas JSON; o log informado em 'log' é do chamador
+        self.log = log if log is not None else EventLog(path=log_path, level=log_level, console=verbose,
+                                                        rate=log_rate)
+        self.owns_log = log is None
+
+        # instrumentação (instrument.py): tempos de Scheduler.push/pop, despacho e tratamento de
+        # eventos, espera na fila local dos workers e profundidade das filas. Desligada = None.
+        # profile ("cprofile" ou "sample") também liga o profiler do Master e dos workers
+        self.instr = Instrumentation(profile) if (instrument or profile) else None
+        self.sent_at = {}        # wire id -> envio ao worker (só com instrumentação)
+        self.profiled = {}       # server_id -> amostras gravadas pelo worker (EV_PROFILED)
+        if self.instr is not None:
+            self.instr.wrap(self.scheduler, "push", "scheduler.push")
+            self.instr.wrap(self.scheduler, "pop", "scheduler.pop")
+            self.instr.wrap(self, "dispatch_if_possible", "dispatch")
+            self.instr.wrap(self, "_handle_events", "handle_events", per_item=True)
+
+        # controle de admissão (admission.AdmissionControl): limites de backlog, shed, descarte por
+        # prazo e sinal de pressão para a fonte de chegadas. None = aceita tudo, como antes
+        self.admission = admission
+
+        # endpoint de métricas (exporter.py): /metrics em formato Prometheus numa thread de fundo,
+        # em 127.0.0.1:metrics_port (0 = porta livre). None = desligado
+        self.metrics_port = metrics_port
+        self.exporter = None
+
         # monitor
         self.monitor = None
         self.monitor_interval = monitor_interval
+        self.use_monitor = use_monitor
 
         # init workers bookkeeping
         for sid, meta in self.servers_meta.items():
             self.sent_pending[sid] = 0
             self.in_flight[sid] = 0
             self.capacity[sid] = meta["capacity"]
+            self.reclaiming[sid] = 0
+            self.assigned[sid] = set()
+            self.respawns[sid] = 0
+
+        # servidores com slot livre, ordenados por (in_flight + sent_pending) / (capacity + prefetch)
+        slots = {sid: cap + self.prefetch for sid, cap in self.capacity.items()}
+        if placement == "affinity":
+            self.load_index = AffinityIndex(slots, self.speedup)
+        else:
+            self.load_index = LoadIndex(slots)
 
     # -------------------------
     # worker lifecycle
     # -------------------------
     def spawn_workers(self):
-        for sid, meta in self.servers_meta.items():
-            in_q = mp.Queue()
-            self.in_queues[sid] = in_q
-            p = mp.Process(target=worker_process, args=(sid, meta["capacity"], in_q, self.out_queue), daemon=True)
-            p.start()
-            self.worker_procs[sid] = p
-            # small sleep to avoid race of processes starting at same instant
-            time.sleep(0.02)
+        # cria (ou reaproveita e reconfigura) um worker por servidor
+        self.in_channels, self.out_channels, self.worker_procs = self.pool.configure(
+            self.capacity, self.exec_mode, self.batch_size, self.flush_interval, self.quantum,
+            self.cpu_kernel, self._cpu_affinity(), self.cpu_work)
+        # índice do worker nos eventos (pool.worker_index) -> id do servidor
+        self.index_sid = {self.pool.worker_index[sid]: sid for sid in self.worker_procs}
+        now = time.monotonic()
+        for sid in self.worker_procs:
+            self.last_seen[sid] = now
+        if self.shared_state:
+            self.state = self.pool.state
+            for sid in self.worker_procs:
+                self.state_rows[sid] = self.pool.rows[sid]
+                # worker reaproveitado: o acumulado de execuções anteriores já está em 'finished'
+                self.sent_total[sid] = self.state.get("finished", self.state_rows[sid])
+        self._refresh_waitables()
 
     def stop_workers(self):
-        # send shutdown (None) to each worker's in_queue and join
-        for sid, q in self.in_queues.items():
-            try:
-                q.put(None)
-            except Exception:
-                pass
-        for sid, p in self.worker_procs.items():
-            try:
-                p.join(timeout=2.0)
-            except Exception:
-                pass
+        # pool próprio: encerra os workers; compartilhado: só a barreira para a próxima execução
+        if self.owns_pool:
+            self.pool.close()
+        else:
+            self.pool.reset()
 
     # -------------------------
     # scheduler / dispatch
     # -------------------------
     def dispatch_if_possible(self):
         """
-        Tenta enviar tarefas do scheduler para workers que tenham (in_flight + sent_pending) < capacity.
-        Mantemos a propriedade PULL-like: só enviamos até preencher a capacidade.
+        Tenta enviar tarefas do scheduler para workers que tenham (in_flight + sent_pending) < capacity + prefetch.
+        Mantemos a propriedade PULL-like: só enviamos até preencher a capacidade (mais o prefetch).
+        Todas as tarefas de um mesmo worker nesta rodada vão num único envio (lote).
         """
-        # tentar para cada servidor enquanto existirem tarefas
-        # heurística: iterar servidores ordenados por carga (prefira menos ocupados)
-        server_ids = sorted(self.servers_meta.keys(), key=lambda s: (self.in_flight[s] + self.sent_pending[s]) / max(1, self.capacity[s]))
-        dispatched = 0
+        instr = self.instr
+        if instr is not None:
+            instr.observe("backlog", len(self.scheduler))
+        if self.state is not None:
+            self._sync_loads()
+        # heurística: cada tarefa vai para o servidor menos ocupado com slot livre (O(log S)) ou,
+        # com placement="affinity", para o de melhor speedup do tipo ponderado pela folga
+        affinity = self.placement == "affinity"
+        batches = {}
+        while len(self.scheduler) > 0:
+            sid = self.load_index.least_loaded()
+            if sid is None:
+                break
+            task = self.scheduler.pop()
+            if task is None:
+                break
+            if self.admission is not None and not self.admission.on_pop(task, time.time()):
+                # descartada (shed ou prazo vencido): não ocupa slot
+                self.log.info("dropped", "Requisição {task} (P{prioridade}) descartada sem executar",
+                              task=task["id"], prioridade=task.get("prioridade"))
+                continue
+            if affinity:
+                sid = self.load_index.best_for(task.get("tipo"))
+            # só id + parâmetros de execução vão ao worker; o corpo fica na task_table
+            batches.setdefault(sid, []).append((next(self.wire_ids), task))
+            self.sent_pending[sid] += 1
+            if self.state is not None:
+                self.sent_total[sid] += 1
+            self._update_load(sid)
 
-        for sid in server_ids:
-            # enquanto houver espaço e tarefas no scheduler
-            while (self.in_flight[sid] + self.sent_pending[sid]) < self.capacity[sid] and len(self.scheduler) > 0:
-                task = self.scheduler.pop()
-                if task is None:
-                    break
-                # send to worker
-                msg = {"cmd": "run", "task": task}
-                try:
-                    self.in_queues[sid].put(msg)
-                    self.sent_pending[sid] += 1
-                    dispatched += 1
-                    self.assigned_log.append((time.time(), task["id"], sid))
-                    print(f"[{self._fmt_time()}] Requisição {task['id']} (P{task.get('prioridade')}) atribuída ao Servidor {sid}")
-                except Exception as e:
-                    # se falhar, re-push na scheduler para tentar depois
-                    print("Falha ao enviar tarefa ao worker:", e)
+        dispatched = 0
+        for sid, batch in batches.items():
+            t0 = time.perf_counter_ns() if instr is not None else 0
+            msg = b"".join(pack_command(CMD_RUN, wire_id, self._run_time(sid, task),
+                                        float(task.get("peso_cpu", 1)))
+                           for wire_id, task in batch)
+            try:
+                if instr is not None:
+                    t1 = time.perf_counter_ns()
+                    instr.time_ns("pack_commands", t1 - t0)
+                    self.in_channels[sid].send(msg)
+                    instr.time_ns("send", time.perf_counter_ns() - t1)
+                else:
+                    self.in_channels[sid].send(msg)
+            except Exception as e:
+                # se falhar, re-push na scheduler para tentar depois
+                self.log.error("send_failed", "Falha ao enviar tarefas ao worker {server}: {error}",
+                               server=sid, error=str(e))
+                for _, task in batch:
                     self.scheduler.push(task)
-                    break
+                self.sent_pending[sid] -= len(batch)
+                if self.state is not None:
+                    self.sent_total[sid] -= len(batch)
+                self._update_load(sid)
+                continue
+
+            now = time.time()
+            assigned = self.assigned[sid]
+            for wire_id, task in batch:
+                # tarefa preemptada mantém o primeiro despacho
+                task.setdefault("dispatch_time", now)
+                self.task_table[wire_id] = task
+                assigned.add(wire_id)
+                self.assigned_log.append((now, task["id"], sid))
+                self.log.info("dispatch", "Requisição {task} (P{prioridade}) atribuída ao Servidor {server}",
+                              task=task["id"], prioridade=task.get("prioridade"), server=sid)
+            if instr is not None:
+                instr.count("dispatched", len(batch))
+                instr.observe("batch_size", len(batch))
+                # tarefas na fila local do worker ainda não iniciadas
+                instr.observe("worker_queue", self.sent_pending[sid])
+                for wire_id, _ in batch:
+                    self.sent_at[wire_id] = now
+            dispatched += len(batch)
         return dispatched
 
+    def _load(self, sid):
+        """Tarefas ocupando o worker sid: executando, na fila local ou ainda no canal."""
+        if self.state is not None:
+            return self.sent_total[sid] - self.state.get("finished", self.state_rows[sid])
+        return self.in_flight[sid] + self.sent_pending[sid]
+
+    def _run_time(self, sid, task):
+        """Tempo de execução da tarefa (ou do que resta dela) no servidor sid, com o speedup do tipo."""
+        remaining = float(task.get("remaining", task["tempo_exec"]))
+        return remaining / self.speedup[sid].get(task.get("tipo"), 1.0)
+
+    def _cpu_affinity(self):
+        """
+        CPUs de cada worker: as "cpus" do servidor ou, com pin_cpus, um bloco de min(capacidade,
+        CPUs) CPUs consecutivas, em ciclo pelas CPUs disponíveis para o processo: workers vizinhos
+        não disputam os mesmos núcleos (e caches) enquanto houver CPUs sobrando.
+        """
+        affinity = {sid: meta["cpus"] for sid, meta in self.servers_meta.items() if meta["cpus"]}
+        if not self.pin_cpus or not hasattr(os, "sched_getaffinity"):
+            return affinity
+        cpus = sorted(os.sched_getaffinity(0))
+        nxt = 0
+        for sid, cap in self.capacity.items():
+            if sid in affinity:
+                continue
+            size = min(cap, len(cpus))
+            affinity[sid] = [cpus[(nxt + k) % len(cpus)] for k in range(size)]
+            nxt += size
+        return affinity
+
+    def _update_load(self, sid):
+        self.load_index.update(sid, self._load(sid))
+
+    def _sync_loads(self):
+        # slots liberados desde o último evento já aparecem na tabela: uma leitura da coluna
+        # 'finished' inteira e update só dos servidores cuja carga mudou
+        finished = self.state.column("finished")
+        current = self.load_index.load
+        for sid, row in self.state_rows.items():
+            if sid in self.down:
+                continue
+            load = self.sent_total[sid] - finished[row]
+            if load != current[sid]:
+                self.load_index.update(sid, load)
+
     # -------------------------
     # main loop
     # -------------------------
     def run(self):
         self.start_time = time.time()
+        self.log.start(self.start_time)
         # spawn workers
         self.spawn_workers()
+        if self.instr is not None and self.instr.profile:
+            self._start_profiles()
 
         # iniciar monitor se realtime
-        if self.realtime:
+        if self.realtime and self.use_monitor:
             try:
-                self.monitor = SystemMonitor(self.worker_procs, interval=self.monitor_interval)
+                self.monitor = SystemMonitor(self.worker_procs, interval=self.monitor_interval,
+                                             state=self.state, rows=self.state_rows)
                 self.monitor.start()
             except Exception as e:
-                print("Falha ao iniciar monitor:", e)
+                self.log.error("monitor_failed", "Falha ao iniciar monitor: {error}", error=str(e))
                 self.monitor = None
+        self._start_exporter()
 
-        # preparar chegadas
-        arrivals = list(self.raw_tasks)
-        total_tasks = len(arrivals)
-        waiting_count = 0
+        # preparar chegadas: a fonte é consumida uma tarefa por vez, quando a chegada vence
+        arrivals = iter(self.raw_tasks)
+        admitted = 0
+        next_task = None
+        held = False   # next_task retida pelo controle de admissão (overflow="block")
         if not self.realtime:
-            # chegada imediata: empilhar tudo na scheduler
+            # chegada imediata: empilhar tudo na scheduler (com overflow="block" o restante vira
+            # chegada contínua, admitida conforme abre espaço)
             for t in arrivals:
                 # adicionar timestamp de arrival (opcional)
                 t["arrival_time"] = time.time()
-                self.scheduler.push(t)
-            arrivals = []
+                status = self._admit(t)
+                if status == BLOCKED:
+                    next_task, held = t, True
+                    arrivals_start = next_arrival_at = time.time()
+                    offset = 0.0
+                    break
+                if status == ADMITTED:
+                    admitted += 1
         else:
-            # primeiro chegada
-            next_arrival_at = time.time() + max(0.0001, random.expovariate(1.0 / max(1e-6, self.arrival_mean)))
+            # primeira chegada; instantes em segundos desde arrivals_start
+            next_task = next(arrivals, None)
+            arrivals_start = time.time()
+            offset = self._arrival_offset(next_task, 0.0) if next_task is not None else 0.0
+            next_arrival_at = arrivals_start + offset
 
         completed = 0
         last_balance_check = time.time()
+        next_heartbeat = time.time() + (self.heartbeat_interval or 0.0)
 
         try:
             # logo após spawn, tentar preencher inicialmente as capacidades (se tasks já chegaram)
             self.dispatch_if_possible()
 
-            while completed < total_tasks:
+            while next_task is not None or completed + self._dropped() < admitted:
                 now = time.time()
-                # process arrivals
-                if self.realtime and arrivals and now >= next_arrival_at:
-                    t = arrivals.pop(0)
-                    t["arrival_time"] = now
-                    self.scheduler.push(t)
-                    print(f"[{self._fmt_time()}] Nova requisição {t['id']} chegou (P{t.get('prioridade')})")
+                # process arrivals (todas as que já venceram)
+                while next_task is not None and now >= next_arrival_at:
+                    t = next_task
+                    if not held:
+                        t["arrival_time"] = now
+                    status = self._admit(t)
+                    held = status == BLOCKED
+                    if held:
+                        # sem espaço: a fonte não é lida até a chegada retida caber
+                        break
+                    if status == ADMITTED:
+                        admitted += 1
                     # schedule next
-                    inter = random.expovariate(1.0 / max(1e-6, self.arrival_mean))
-                    next_arrival_at = now + inter
+                    next_task = next(arrivals, None)
+                    if next_task is not None:
+                        if self.realtime:
+                            offset = self._arrival_offset(next_task, offset)
+                        else:
+                            offset = now - arrivals_start
+                        next_arrival_at = arrivals_start + offset
 
                 # dispatch tasks where possible
                 if len(self.scheduler) > 0:
                     self.dispatch_if_possible()
-
-                # process events from workers (non-blocking)
-                try:
-                    while True:
-                        ev = self.out_queue.get_nowait()
-                        self._handle_event(ev)
-                        # count completions
-                        if isinstance(ev, dict) and ev.get("type") == "done":
-                            completed += 1
-                except queue.Empty:
-                    pass
-                except Exception:
-                    # mp.Queue may raise different Empty; try safe get with timeout 0
-                    try:
-                        ev = self.out_queue.get(timeout=0)
-                        if ev is not None:
-                            self._handle_event(ev)
-                            if isinstance(ev, dict) and ev.get("type") == "done":
-                                completed += 1
-                    except Exception:
-                        pass
+                if self.admission is not None:
+                    self._signal_pressure()
 
                 # periodic balancing / migration heuristics (simple)
-                if time.time() - last_balance_check > 2.0:
+                if now - last_balance_check > BALANCE_INTERVAL:
                     self._balance_check()
-                    last_balance_check = time.time()
+                    last_balance_check = now
+
+                # supervisão: ping aos workers e verificação de mortos/travados
+                if self.heartbeat_interval and now >= next_heartbeat:
+                    self._supervise()
+                    next_heartbeat = now + self.heartbeat_interval
 
-                time.sleep(0.02)
+                # esperar pelo que vier primeiro: evento de worker, próxima chegada, balance check ou heartbeat
+                deadline = last_balance_check + BALANCE_INTERVAL
+                if next_task is not None and not held:
+                    deadline = min(deadline, next_arrival_at)
+                if self.heartbeat_interval:
+                    deadline = min(deadline, next_heartbeat)
+                if self.state is not None and self.batch_size > 1 and len(self.scheduler) > 0:
+                    # backlog à espera de slot: a tabela mostra o slot liberado antes do evento,
+                    # que pode passar até flush_interval num lote ainda não enviado
+                    deadline = min(deadline, now + STATE_POLL)
+                completed += self._wait_events(max(0.0, deadline - time.time()))
         finally:
             self.end_time = time.time()
             # teardown
-            self.stop_workers()
+            if self.instr is not None and self.instr.profile:
+                self._collect_profiles()
+            # monitor e exporter param antes dos workers: eles leem a tabela de estado que o pool fecha
+            self._stop_exporter()
             if self.monitor:
                 self.monitor.stop()
                 self.monitor_summary = self.monitor.get_final_metrics()
+                self.monitor_cost = self.monitor.get_sampling_cost()
             else:
                 self.monitor_summary = {}
+                self.monitor_cost = None
+            self.stop_workers()
+            self.state = None
+            self.completed_log.close()
+            if self.owns_log:
+                self.log.close()
+
+    def _wait_events(self, timeout):
+        """
+        Bloqueia nos canais de eventos até chegar um evento, um worker morrer ou vencer 'timeout'
+        e então drena os canais prontos. Retorna quantas tarefas foram concluídas.
+        Com poll_interval definido, reproduz o laço antigo (leitura não bloqueante + sleep fixo).
+        """
+        completed = 0
+        if self.poll_interval:
+            time.sleep(min(self.poll_interval, timeout))
+            timeout = 0
+        dead = False
+        for obj in wait(list(self.waitables), timeout):
+            kind, sid = self.waitables[obj]
+            if kind == "proc":
+                # sentinel pronto = processo worker terminou; eventos já enviados são lidos antes
+                dead = True
+                continue
+            ch = self.out_channels[sid]
+            buf = ch.recv(0)
+            while buf is not None:
+                completed += self._handle_events(unpack_events(buf))
+                buf = ch.recv(0)
+        if dead:
+            self._check_workers()
+        return completed
+
+    def _handle_events(self, events):
+        """
+        Processa um lote de eventos dos workers e retorna quantas tarefas foram concluídas.
+        Eventos esperados do worker (protocol.Event: type, worker, task_id, time, value):
+          - EV_STARTED: tarefa task_id começou no instante time
+          - EV_DONE: tarefa task_id terminou no instante time
+          - EV_PREEMPTED: quantum esgotado; value = tempo restante (a tarefa volta à scheduler)
+          - EV_RECLAIMED: tarefa devolvida sem executar (resposta a CMD_RECLAIM)
+          - EV_PONG: resposta a CMD_PING
+          - EV_EXITING: worker encerrando
+        Eventos de tarefas que não estão mais atribuídas ao worker (ex.: enviados por um processo
+        que morreu e já teve as tarefas redistribuídas) são ignorados.
+        """
+        completed = 0
+        requeued = 0
+        seen = time.monotonic()
+        for ev in events:
+            etype = ev.type
+            wid = self.index_sid.get(ev.worker)
+            if wid is None:
+                continue
+            self.last_seen[wid] = seen
+            if ev.task_id and etype in (EV_STARTED, EV_DONE, EV_PREEMPTED, EV_RECLAIMED):
+                assigned = self.assigned.get(wid)
+                if assigned is None or ev.task_id not in assigned:
+                    continue
+                if etype != EV_STARTED:
+                    assigned.discard(ev.task_id)
+            if etype == EV_STARTED:
+                # task começou: converte sent_pending -> in_flight
+                if self.sent_pending.get(wid, 0) > 0:
+                    self.sent_pending[wid] -= 1
+                self.in_flight[wid] += 1
+                task = self.task_table.get(ev.task_id)
+                if task is not None:
+                    # início = primeira fatia executada (primeira resposta); a fatia atual vai
+                    # para service_time quando terminar
+                    task.setdefault("start_time", ev.time)
+                    task["slice_start"] = ev.time
+                if ev.value > 0:
+                    self.switch_cost.add(ev.value)
+                if self.instr is not None:
+                    sent = self.sent_at.pop(ev.task_id, None)
+                    if sent is not None:
+                        # espera na fila local do worker (mais a latência do canal)
+                        self.instr.time_ns("worker_queue_wait", (ev.time - sent) * 1e9)
+                self.log.debug("started", "Worker {server} iniciou task {wire_id}", server=wid, wire_id=ev.task_id)
+            elif etype == EV_DONE:
+                # tarefa finalizada: decrementar in_flight
+                if self.in_flight.get(wid, 0) > 0:
+                    self.in_flight[wid] -= 1
+                    self._update_load(wid)
+                # registrar resultado para métricas
+                task = self.task_table.pop(ev.task_id, {})
+                self._end_slice(task, ev.time)
+                self._record_completion(task, wid, task.get("start_time"), ev.time)
+                self.log.info("done", "Servidor {server} concluiu Requisição {task}", server=wid, task=task.get("id"))
+                completed += 1
+            elif etype == EV_PREEMPTED:
+                # fatia esgotada: slot livre e tarefa de volta à scheduler com o tempo restante
+                if self.in_flight.get(wid, 0) > 0:
+                    self.in_flight[wid] -= 1
+                    self._update_load(wid)
+                task = self.task_table.pop(ev.task_id, None)
+                if task is not None:
+                    self._end_slice(task, ev.time)
+                    # o worker devolve o tempo restante nele; a fila guarda o tempo sem speedup
+                    task["remaining"] = ev.value * self.speedup[wid].get(task.get("tipo"), 1.0)
+                    task["preemptions"] = task.get("preemptions", 0) + 1
+                    self.scheduler.push(task)
+                    self.preemptions += 1
+                    requeued += 1
+            elif etype == EV_RECLAIMED:
+                if ev.task_id == 0:
+                    # fim da resposta ao CMD_RECLAIM
+                    self.reclaiming[wid] = 0
+                    continue
+                # nunca começou: sai de sent_pending e volta à scheduler para outro worker
+                if self.sent_pending.get(wid, 0) > 0:
+                    self.sent_pending[wid] -= 1
+                    self._update_load(wid)
+                task = self.task_table.pop(ev.task_id, None)
+                if task is not None:
+                    if "start_time" not in task:
+                        task.pop("dispatch_time", None)
+                    self.scheduler.push(task)
+                    self.reclaimed += 1
+                    requeued += 1
+            elif etype == EV_PONG:
+                # worker respondeu a ping
+                pass
+            elif etype == EV_PROFILED:
+                self.profiled[wid] = int(ev.value)
+            elif etype == EV_EXITING:
+                self.log.info("exiting", "Worker {server} exiting", server=wid)
+            else:
+                # evento desconhecido — ignora
+                pass
+
+        # após done/preempção, tentar dispatch imediato (worker(s) liberaram slot)
+        if completed or requeued:
+            self.dispatch_if_possible()
+            self._steal()
+        return completed
 
-    def _handle_event(self, ev):
+    def _steal(self):
         """
-        Eventos esperados do worker:
-          - {"type":"started","task":..., "worker":id, "time":t}
-          - {"type":"done","task":..., "worker":id, "time":t}
-          - {"type":"pong","worker":id, "time":t}
-          - {"type":"exiting","worker":id, "time":t}
+        Com a scheduler vazia e slots ociosos, pede aos workers com tarefas paradas na fila local
+        (enviadas além dos slots livres, via prefetch) que as devolvam; elas voltam à scheduler e
+        o próximo dispatch as entrega aos slots ociosos.
         """
-        if not isinstance(ev, dict):
+        if not (self.prefetch and self.steal) or len(self.scheduler) > 0:
             return
+        idle = 0
+        queued = []
+        for sid, cap in self.capacity.items():
+            if sid in self.down:
+                continue
+            load = self._load(sid)
+            if load < cap:
+                idle += cap - load
+            elif not self.reclaiming[sid]:
+                # tarefas na fila local que não têm slot livre para começar já
+                stuck = load - cap
+                if stuck > 0:
+                    queued.append((stuck, sid))
+        if not idle or not queued:
+            return
+        for stuck, sid in sorted(queued, reverse=True):
+            n = min(stuck, idle)
+            try:
+                self.in_channels[sid].send(pack_command(CMD_RECLAIM, n))
+            except Exception:
+                continue
+            self.reclaiming[sid] = n
+            idle -= n
+            if not idle:
+                break
+
+    def _arrival_offset(self, task, last):
+        """
+        Instante de chegada de 'task' (s desde o início das chegadas): o campo 'arrival' da tarefa
+        (cargas de workload.py, traces) ou, sem ele, 'last' + intervalo exponencial de média arrival_mean.
+        """
+        if "arrival" in task:
+            return max(last, float(task["arrival"]))
+        return last + random.expovariate(1.0 / max(1e-6, self.arrival_mean))
+
+    def _start_exporter(self):
+        if self.metrics_port is None:
+            return
+        try:
+            self.exporter = MetricsExporter(self, port=self.metrics_port).start()
+            self.log.info("metrics", "Métricas em {url}", url=self.exporter.url)
+        except OSError as e:
+            self.log.error("metrics_failed", "Falha ao iniciar endpoint de métricas: {error}", error=str(e))
+            self.exporter = None
+
+    def _stop_exporter(self):
+        if self.exporter is not None:
+            self.exporter.stop()
+
+    def _admit(self, task):
+        """Chegada passa pelo controle de admissão; admitida vai para a scheduler. Retorna o status."""
+        adm = self.admission
+        status = ADMITTED if adm is None else adm.admit(task, self.scheduler)
+        if status == ADMITTED:
+            self.scheduler.push(task)
+            self.log.info("arrival", "Nova requisição {task} chegou (P{prioridade})",
+                          task=task["id"], prioridade=task.get("prioridade"))
+        elif status == REJECTED:
+            self.log.info("rejected", "Requisição {task} (P{prioridade}) rejeitada: backlog {backlog}",
+                          task=task["id"], prioridade=task.get("prioridade"), backlog=len(self.scheduler))
+        if adm is not None:
+            self._signal_pressure()
+        return status
+
+    def _dropped(self):
+        return self.admission.dropped if self.admission is not None else 0
+
+    def _signal_pressure(self):
+        """
+        Sinal de pressão para a fonte de chegadas: quando muda, chama raw_tasks.backpressure(ligado)
+        se a fonte oferece esse método (ex.: workload.BackpressureSource) e registra no log.
+        """
+        adm = self.admission
+        if not adm.update_pressure(self.scheduler):
+            return
+        self.log.warning("backpressure", "Pressão de admissão {state}: backlog {backlog}",
+                         state="ligada" if adm.pressure else "desligada", backlog=adm.backlog(self.scheduler))
+        signal = getattr(self.raw_tasks, "backpressure", None)
+        if signal is not None:
+            signal(adm.pressure)
+
+    @staticmethod
+    def _end_slice(task, t_end):
+        """Fim de uma fatia executada (EV_PREEMPTED/EV_DONE): soma a duração em service_time."""
+        t_slice = task.pop("slice_start", None)
+        if t_slice is not None:
+            task["service_time"] = task.get("service_time", 0.0) + (t_end - t_slice)
 
-        etype = ev.get("type")
-        wid = ev.get("worker")
-        if etype == "started":
-            # task começou: converte sent_pending -> in_flight
-            if self.sent_pending.get(wid, 0) > 0:
-                self.sent_pending[wid] -= 1
-            self.in_flight[wid] += 1
-            # log optional
-            # print(f"[{self._fmt_time()}] Worker {wid} iniciou task {ev['task']['id']}")
-        elif etype == "done":
-            # tarefa finalizada: decrementar in_flight
-            if self.in_flight.get(wid, 0) > 0:
-                self.in_flight[wid] -= 1
-            # registrar resultado para métricas
-            task = ev.get("task", {})
-            t_end = ev.get("time", time.time())
-            # tentar montar um registro de start/end/runtime se possível
-            record = {
-                "task_id": task.get("id"),
+    def _record_completion(self, task, wid, t_start, t_end):
+        """
+        Registra o ciclo de vida da tarefa (chegada, despacho, início, fim) e o tempo executando
+        (service_time, soma das fatias) nas colunas de completed_log; as latências derivadas
+        (wait = início - chegada, response = fim - chegada) são calculadas a partir delas. Com
+        preempção, fim - início inclui as esperas na fila entre as fatias; runtime não.
+        """
+        arrival = task.get("arrival_time")
+        runtime = task.get("service_time")
+        if self.admission is not None:
+            self.admission.completed(task, t_end)
+        self.completed_log.append(task.get("id"), wid, arrival, task.get("dispatch_time"),
+                                  t_start, t_end, task.get("prioridade"), task.get("tipo"), runtime)
+        if self.exporter is not None:
+            self.exporter.observe(task.get("tipo"), arrival, t_start, t_end, runtime)
+        if not self.keep_log:
+            self.latency.add({
                 "worker_id": wid,
-                "start": task.get("start_time", None),
-                "end": t_end,
-                "runtime": ev.get("time", None) - task.get("start_time", ev.get("time", None)) if task.get("start_time") else None,
+                "tipo": task.get("tipo"),
                 "prioridade": task.get("prioridade"),
-                "tipo": task.get("tipo")
-            }
-            self.completed_log.append(record)
-            print(f"[{self._fmt_time()}] Servidor {wid} concluiu Requisição {task.get('id')}")
-            # após done, tentar dispatch imediato (worker liberou slot)
-            self.dispatch_if_possible()
-        elif etype == "pong":
-            # worker respondeu a ping
-            pass
-        elif etype == "exiting":
-            print(f"[{self._fmt_time()}] Worker {wid} exiting")
+                "wait": t_start - arrival if (t_start is not None and arrival is not None) else None,
+                "runtime": runtime,
+                "response": t_end - arrival if arrival is not None else None,
+            })
+
+    # -------------------------
+    # supervision
+    # -------------------------
+    def _refresh_waitables(self):
+        self.waitables = {}
+        for sid, p in self.worker_procs.items():
+            if sid not in self.down:
+                self.waitables[self.out_channels[sid].reader] = ("events", sid)
+                self.waitables[p.sentinel] = ("proc", sid)
+
+    def _supervise(self):
+        """
+        Heartbeat: ping a cada worker (qualquer evento conta como sinal de vida) e verificação.
+        Com a tabela compartilhada, o heartbeat que cada worker escreve nela dispensa os pings.
+        """
+        if self.state is not None:
+            self._check_workers()
+            return
+        ping = pack_command(CMD_PING)
+        for sid, ch in self.in_channels.items():
+            if sid in self.down:
+                continue
+            try:
+                ch.send(ping)
+            except Exception:
+                # canal quebrado: o processo morreu; _check_workers trata
+                pass
+        self._check_workers()
+
+    def _check_workers(self):
+        now = time.monotonic()
+        wall = time.time()
+        for sid, p in list(self.worker_procs.items()):
+            if sid in self.down:
+                continue
+            if not p.is_alive():
+                self._worker_failed(sid, "crash")
+                continue
+            if not self.heartbeat_interval:
+                continue
+            # silêncio desde o último evento ou, com a tabela, desde a última volta do laço de
+            # comandos do worker (o heartbeat que ele escreve nela)
+            silent = now - self.last_seen[sid]
+            if self.state is not None:
+                beat = self.state.get("heartbeat", self.state_rows[sid])
+                if beat:
+                    silent = min(silent, wall - beat)
+            if silent > self.heartbeat_timeout:
+                self._worker_failed(sid, "hung")
+
+    def _worker_failed(self, sid, reason):
+        """
+        Worker morto ou travado: as tarefas enviadas a ele (na fila ou em execução) voltam à
+        scheduler, o processo é recriado pelo pool (até RESPAWN_LIMIT vezes) e o despacho continua.
+        """
+        detected_at = time.time()
+        wires = self.assigned[sid]
+        self.assigned[sid] = set()
+        for wire_id in wires:
+            task = self.task_table.pop(wire_id, None)
+            if task is not None:
+                task["retries"] = task.get("retries", 0) + 1
+                self.scheduler.push(task)
+        self.sent_pending[sid] = 0
+        self.in_flight[sid] = 0
+        self.reclaiming[sid] = 0
+        self.log.warning("worker_failed", "Worker {server} falhou ({reason}); {requeued} tarefas voltaram à fila",
+                         server=sid, reason=reason, requeued=len(wires))
+
+        respawned = self.respawns[sid] < RESPAWN_LIMIT
+        if respawned:
+            self.respawns[sid] += 1
+            self.in_channels[sid], self.out_channels[sid], self.worker_procs[sid] = \
+                self.pool.respawn(sid, self.quantum, self.cpu_kernel, self.cpu_work)
+            self.last_seen[sid] = time.monotonic()
+            if self.state is not None:
+                self.state_rows[sid] = self.pool.rows[sid]
+                self.sent_total[sid] = 0
+            self._update_load(sid)
         else:
-            # evento desconhecido — ignora
-            pass
+            # fora da execução: nunca mais escolhido pelo índice de carga
+            self.down.add(sid)
+            self.load_index.update(sid, self.capacity[sid] + self.prefetch)
+            if len(self.down) == len(self.capacity):
+                raise RuntimeError("todos os workers falharam")
+        self._refresh_waitables()
+        self.failures.append({
+            "worker": sid,
+            "reason": reason,
+            "detected_at": detected_at,
+            "requeued": len(wires),
+            "respawn_s": time.time() - detected_at,
+            "respawned": respawned,
+        })
+        self.dispatch_if_possible()
+
+    # -------------------------
+    # instrumentation
+    # -------------------------
+    def _start_profiles(self):
+        self.instr.start_profile()
+        self.profiled = {}
+        start = pack_command(CMD_PROFILE, 1)
+        for sid, ch in self.in_channels.items():
+            if sid not in self.down:
+                ch.send(start)
+
+    def _collect_profiles(self, timeout=5.0):
+        """Para o profiler do Master e o dos workers e junta as pilhas de cada worker ao relatório."""
+        self.instr.stop_profile("master")
+        stop = pack_command(CMD_PROFILE, 0)
+        waiting = set()
+        for sid, ch in self.in_channels.items():
+            if sid in self.down:
+                continue
+            try:
+                ch.send(stop)
+                waiting.add(sid)
+            except Exception:
+                pass
+        deadline = time.monotonic() + timeout
+        while waiting - set(self.profiled) and time.monotonic() < deadline:
+            self._wait_events(0.05)
+        for sid in waiting:
+            if not self.profiled.get(sid):
+                continue
+            path = worker_profile_path(self.worker_procs[sid].pid)
+            try:
+                self.instr.profiles[f"worker {sid}"] = read_collapsed(path)
+                os.remove(path)
+            except OSError:
+                pass
+
+    def instrument_report(self):
+        """Relatório da instrumentação desta execução (None se desligada), para gravar junto dos CSVs."""
+        if self.instr is None:
+            return None
+        total_time = (self.end_time - self.start_time) if (self.start_time and self.end_time) else 0.0
+        return self.instr.report({
+            "policy": self.policy,
+            "engine": type(self).__name__,
+            "num_tasks": self.stats.count(),
+            "total_time": total_time,
+        })
 
     def _balance_check(self):
         """
         Heurística simples: se algum worker está ocioso e existe backlog, priorizar envio para ele.
-        Como todas as tasks estão no scheduler central, 'migração' é natural — o master decide para quem enviar.
+        Tarefas na scheduler central migram naturalmente (o master decide para quem enviar); as que
+        já estão na fila local de um worker são recolhidas por _steal quando outro worker fica ocioso.
         """
-        # apenas uma nota/print do estado atual
+        self._steal()
+        if self.state is not None:
+            # slots ocupados / fila local lidos da tabela, como o worker os vê agora
+            loads = {sid: (self.state.get("busy", row), self.state.get("queued", row))
+                     for sid, row in self.state_rows.items()}
+            self.log.info("balance", "Estado cargas (ocupados, fila): {loads}", loads=loads)
+            return
         loads = {sid: self.in_flight[sid] + self.sent_pending[sid] for sid in self.servers_meta}
-        print(f"[{self._fmt_time()}] Estado cargas (in_flight+pending): {loads}")
+        self.log.info("balance", "Estado cargas (in_flight+pending): {loads}", loads=loads)
 
     # -------------------------
     # summary
     # -------------------------
     def print_summary(self):
-        total = len(self.completed_log)
+        total = self.stats.count()
         if total == 0:
             print("Nenhuma tarefa completada.")
             return
 
-        # calcular tempos de resposta
-        resp_times = []
-        for r in self.completed_log:
-            start = r.get("start")
-            end = r.get("end")
-            if start and end:
-                resp_times.append(end - start)
-            else:
-                # fallback
-                rt = r.get("runtime")
-                if rt:
-                    resp_times.append(rt)
-
-        avg_resp = sum(resp_times) / max(1, len(resp_times))
+        lat = self.stats.summary()
         total_time = (self.end_time - self.start_time) if (self.start_time and self.end_time) else 0
-        throughput = len(resp_times) / max(total_time, 1e-6)
+        throughput = total / max(total_time, 1e-6)
 
         print("\n" + "-" * 60)
         print("RESUMO FINAL")
         print("-" * 60)
-        print(f"Tarefas processadas: {len(resp_times)}")
+        print(f"Tarefas processadas: {total}")
         print(f"Tempo total de simulação: {total_time:.2f}s")
-        print(f"Tempo médio de resposta: {avg_resp:.2f}s")
+        print(f"Tempo médio de resposta: {lat['response']['mean']:.2f}s")
+        print(f"Tempo médio de espera: {lat['wait']['mean']:.2f}s")
+        print(f"Tempo médio de execução: {lat['service']['mean']:.2f}s")
         print(f"Throughput: {throughput:.2f} tarefas/s")
+        if self.placement != "load" or self.pin_cpus:
+            print(f"Colocação: {self.placement}" + (" | workers presos a CPUs" if self.pin_cpus else ""))
+        print(f"Resposta (s): {self._fmt_percentiles(lat['response'])}")
+        if self.quantum:
+            sw = self.switch_cost.summary()
+            print(f"Preempções (quantum {self.quantum}s): {self.preemptions} | custo da troca "
+                  f"médio {sw['mean'] * 1000:.2f} ms | p99 {sw['p99'] * 1000:.2f} ms")
+        if self.prefetch:
+            print(f"Prefetch: {self.prefetch} por worker | tarefas recolhidas e redistribuídas: {self.reclaimed}")
+        if self.failures:
+            respawn = sum(f["respawn_s"] for f in self.failures) / len(self.failures)
+            print(f"Falhas de workers: {len(self.failures)} | tarefas redistribuídas "
+                  f"{sum(f['requeued'] for f in self.failures)} | recriação média {respawn * 1000:.1f} ms")
+        if self.admission is not None:
+            a = self.admission.summary(total_time)
+            print(f"Admissão: aceitas {a['admitted']} | rejeitadas {a['rejected']} (backlog {a['rejected_backlog']}, "
+                  f"prioridade {a['rejected_priority']}) | retidas {a['blocked']} | shed {a['shed']} | "
+                  f"expiradas {a['expired']}")
+            print(f"No prazo: {a['on_time']} | atrasadas {a['late']} | goodput {a['goodput']:.2f} tarefas/s | "
+                  f"mudanças de pressão {a['pressure_changes']}")
+
+        print("-" * 60)
+        print("Throughput e latência de resposta por tipo:")
+        for tipo in self.stats.names("tipo"):
+            r = self.stats.summary("tipo", tipo)
+            n = r['response']['count']
+            print(f"  {str(tipo):20s} n={n:<6d} {n / max(total_time, 1e-6):7.2f} tarefas/s | "
+                  f"execução média {r['service']['mean']:.2f}s | espera média {r['wait']['mean']:.2f}s | "
+                  f"{self._fmt_percentiles(r['response'])}")
+        if len(self.stats.names("prioridade")) > 1:
+            print("Latência de resposta por prioridade:")
+            for p in self.stats.names("prioridade"):
+                r = self.stats.summary("prioridade", p)
+                print(f"  P{p}: n={r['response']['count']:<6d} {self._fmt_percentiles(r['response'])}")
+        print("Latência de resposta por worker:")
+        for wid in self.stats.names("worker"):
+            r = self.stats.summary("worker", wid)
+            print(f"  Worker {wid}: n={r['response']['count']:<6d} {self._fmt_percentiles(r['response'])}")
 
         print("-" * 60)
         if hasattr(self, "monitor_summary") and self.monitor_summary:
             print("Utilização média dos Workers:")
             for wid, m in self.monitor_summary.items():
                 print(f"  Worker {wid}: CPU {m['cpu_avg']:.1f}% | Mem {m['mem_avg']:.1f} MB")
+                if "cpu" in m:
+                    c, r, t = m["cpu"], m["mem"], m["threads"]
+                    print(f"    CPU %   p50 {c['p50']:5.1f} | p95 {c['p95']:5.1f} | p99 {c['p99']:5.1f} | máx {c['max']:5.1f}")
+                    print(f"    RSS MB  p50 {r['p50']:5.1f} | p95 {r['p95']:5.1f} | p99 {r['p99']:5.1f} | máx {r['max']:5.1f}")
+                    print(f"    Threads p50 {t['p50']:5.0f} | p95 {t['p95']:5.0f} | p99 {t['p99']:5.0f} | máx {t['max']:5.0f}")
+        if getattr(self, "monitor_cost", None):
+            c = self.monitor_cost
+            print(f"Custo do monitor: {c['samples']} amostras | média {c['avg_ms']:.2f} ms | máx {c['max_ms']:.2f} ms")
+        if self.instr is not None:
+            print("-" * 60)
+            print("Instrumentação (tempos em µs):")
+            print(self.instr.format_report())
         print("-" * 60)
 
     # -------------------------
-    def _fmt_time(self):
-        t = time.time() - (self.start_time or time.time())
-        mm = int(t // 60)
-        ss = int(t % 60)
-        return f"{mm:02d}:{ss:02d}"
+    @staticmethod
+    def _fmt_percentiles(s):
+        return f"p50 {s['p50']:.2f} | p90 {s['p90']:.2f} | p99 {s['p99']:.2f} | máx {s['max']:.2f}"
@@ -0,0 +1,248 @@
+# metrics.py
+import math
+from array import array
+from bisect import bisect_left
+
+# Estruturas de memória fixa para métricas de execuções longas: histórico em buffer circular
+# e agregados calculados em fluxo (sem guardar todas as amostras).
+
+DEFAULT_QUANTILES = (0.50, 0.95, 0.99)
+LATENCY_QUANTILES = (0.50, 0.90, 0.99)
+EXACT_LIMIT = 256   # até quantas amostras os quantis são exatos (P² é impreciso com poucas amostras)
+# limites superiores (s) das faixas de Histogram para latências, de 1 ms a 5 min
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+                   10.0, 25.0, 60.0, 300.0)
+
+
+class RingBuffer:
+    """Buffer circular de floats sobre array('d'): guarda só as 'capacity' amostras mais recentes."""
+
+    def __init__(self, capacity, typecode="d"):
+        self.capacity = max(1, int(capacity))
+        self.data = array(typecode, bytes(array(typecode).itemsize * self.capacity))
+        self.start = 0
+        self.size = 0
+
+    def append(self, x):
+        if self.size < self.capacity:
+            self.data[(self.start + self.size) % self.capacity] = x
+            self.size += 1
+        else:
+            self.data[self.start] = x
+            self.start = (self.start + 1) % self.capacity
+
+    def values(self):
+        """Amostras em ordem cronológica (cópia)."""
+        end = self.start + self.size
+        if end <= self.capacity:
+            return self.data[self.start:end]
+        return self.data[self.start:] + self.data[:end - self.capacity]
+
+    def __iter__(self):
+        return iter(self.values())
+
+    def __len__(self):
+        return self.size
+
+
+class RunningStats:
+    """Média, variância (Welford), mínimo e máximo em O(1) de memória."""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, x):
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (x - self.mean)
+        if x < self.min:
+            self.min = x
+        if x > self.max:
+            self.max = x
+
+    @property
+    def variance(self):
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def std(self):
+        return math.sqrt(self.variance)
+
+
+class P2Quantile:
+    """
+    Estimador de quantil P² (Jain & Chlamtac, 1985): mantém 5 marcadores e ajusta suas alturas
+    por interpolação parabólica a cada amostra, sem armazenar as amostras.
+    Enquanto houver até EXACT_LIMIT amostras, elas também são guardadas e o quantil é exato.
+    """
+
+    def __init__(self, p):
+        self.p = p
+        self.n = 0
+        self.exact = []
+        self.q = []                                        # alturas dos marcadores
+        self.pos = [1, 2, 3, 4, 5]                         # posições reais
+        self.desired = [1, 1 + 2 * p, 1 + 4 * p, 3 + 2 * p, 5]
+        self.incr = [0, p / 2, p, (1 + p) / 2, 1]
+
+    def add(self, x):
+        if self.n < EXACT_LIMIT:
+            self.exact.append(x)
+        elif self.exact:
+            self.exact = []
+        q = self.q
+        if self.n < 5:
+            q.append(x)
+            self.n += 1
+            if self.n == 5:
+                q.sort()
+            return
+        self.n += 1
+
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = 0
+            while x >= q[k + 1]:
+                k += 1
+        pos = self.pos
+        for i in range(k + 1, 5):
+            pos[i] += 1
+        for i in range(5):
+            self.desired[i] += self.incr[i]
+
+        for i in (1, 2, 3):
+            d = self.desired[i] - pos[i]
+            if (d >= 1 and pos[i + 1] - pos[i] > 1) or (d <= -1 and pos[i - 1] - pos[i] < -1):
+                d = 1 if d > 0 else -1
+                qp = q[i] + d / (pos[i + 1] - pos[i - 1]) * (
+                    (pos[i] - pos[i - 1] + d) * (q[i + 1] - q[i]) / (pos[i + 1] - pos[i])
+                    + (pos[i + 1] - pos[i] - d) * (q[i] - q[i - 1]) / (pos[i] - pos[i - 1]))
+                if not q[i - 1] < qp < q[i + 1]:
+                    # parábola saiu do intervalo: interpolação linear
+                    qp = q[i] + d * (q[i + d] - q[i]) / (pos[i + d] - pos[i])
+                q[i] = qp
+                pos[i] += d
+
+    def value(self):
+        if self.n == 0:
+            return 0.0
+        if self.n <= EXACT_LIMIT:
+            # nearest-rank
+            values = sorted(self.exact)
+            return values[max(0, math.ceil(self.p * self.n) - 1)]
+        return self.q[2]
+
+
+class Histogram:
+    """
+    Contagens por faixa fixa (limites superiores em 'bounds', mais uma faixa aberta) e soma.
+    add é um bisect e dois incrementos; snapshot copia as contagens, então outra thread pode
+    ler enquanto a dona continua escrevendo, sem lock e sem parar quem escreve.
+    """
+
+    def __init__(self, bounds=LATENCY_BUCKETS):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.sum = 0.0
+
+    def add(self, x):
+        # faixa i: bounds[i-1] < x <= bounds[i] (limite inclusivo, como o 'le' do Prometheus)
+        self.counts[bisect_left(self.bounds, x)] += 1
+        self.sum += x
+
+    def snapshot(self):
+        """(contagens acumuladas por limite, com a faixa aberta por último, soma)."""
+        total = 0
+        cumulative = []
+        for c in self.counts[:]:
+            total += c
+            cumulative.append(total)
+        return cumulative, self.sum
+
+
+class StreamingSummary:
+    """RunningStats + quantis P² de uma série (ex.: CPU de um worker)."""
+
+    def __init__(self, quantiles=DEFAULT_QUANTILES):
+        self.stats = RunningStats()
+        self.quantiles = {p: P2Quantile(p) for p in quantiles}
+
+    def add(self, x):
+        self.stats.add(x)
+        for est in self.quantiles.values():
+            est.add(x)
+
+    @property
+    def count(self):
+        return self.stats.count
+
+    def summary(self):
+        """dict com count, mean, std, min, max e pXX para cada quantil."""
+        s = self.stats
+        out = {
+            "count": s.count,
+            "mean": s.mean,
+            "std": s.std,
+            "min": s.min if s.count else 0.0,
+            "max": s.max if s.count else 0.0,
+        }
+        for p, est in self.quantiles.items():
+            out[f"p{int(round(p * 100))}"] = est.value()
+        return out
+
+
+class LatencyTracker:
+    """
+    Latências por tarefa agregadas em fluxo, no total e por worker e por tipo.
+    Cada registro contribui com três séries: response (fim - chegada), wait (início - chegada)
+    e service (tempo executando, soma das fatias; chave "runtime" do registro). Não guarda os
+    registros, então serve também no modo streaming.
+    """
+
+    # série -> chave no registro
+    SERIES = {"response": "response", "wait": "wait", "service": "runtime"}
+
+    def __init__(self, quantiles=LATENCY_QUANTILES):
+        self.quantiles = quantiles
+        self.groups = {}   # (dimensão, valor) -> {série: StreamingSummary}
+
+    def _group(self, key):
+        g = self.groups.get(key)
+        if g is None:
+            g = self.groups[key] = {name: StreamingSummary(self.quantiles) for name in self.SERIES}
+        return g
+
+    def add(self, record):
+        """record: dict com worker_id, tipo, prioridade e os campos de SERIES (valores None são ignorados)."""
+        for key in (("all", None), ("worker", record.get("worker_id")), ("tipo", record.get("tipo")),
+                    ("prioridade", record.get("prioridade"))):
+            g = self._group(key)
+            for name, field in self.SERIES.items():
+                value = record.get(field)
+                if value is not None:
+                    g[name].add(value)
+
+    def count(self):
+        g = self.groups.get(("all", None))
+        return g["response"].count if g else 0
+
+    def names(self, dimension):
+        """Valores conhecidos de uma dimensão ("worker", "tipo" ou "prioridade")."""
+        return sorted((k[1] for k in self.groups if k[0] == dimension), key=str)
+
+    def summary(self, dimension="all", name=None):
+        """{série: resumo} do grupo pedido (ver StreamingSummary.summary)."""
+        g = self.groups.get((dimension, name))
+        if g is None:
+            return {}
+        return {series: stats.summary() for series, stats in g.items()}
@@ -2,65 +2,192 @@
 import time
 import psutil
 import threading
-import os
 import shutil
+import sys
+from metrics import RingBuffer, StreamingSummary
+
+# ANSI: cursor para o topo + limpar até o fim da tela (sem criar processo como os.system("clear"))
+ANSI_HOME_CLEAR = "\x1b[H\x1b[J"
+CHILDREN_REFRESH = 10   # a cada quantos ciclos a lista de processos filhos é relida
+HISTORY_SIZE = 1200     # amostras recentes guardadas por worker (memória fixa)
+
+
+def _cpu_field(cpu):
+    # None = sem leitura anterior do worker (primeira amostra ou recriado): uso ainda desconhecido
+    return "   -- " if cpu is None else f"{cpu:5.1f}%"
 
 
 class SystemMonitor:
-    def __init__(self, worker_procs, interval=0.5):
+    def __init__(self, worker_procs, interval=0.5, history_size=HISTORY_SIZE, state=None, rows=None):
         """
         worker_procs: dict { worker_id: multiprocessing.Process }
+        history_size: quantas amostras recentes ficam no histórico de cada worker
+        state / rows: statetable.WorkerStateTable e {worker_id: linha}; com eles CPU, RSS, threads,
+        slots ocupados e fila vêm da tabela que os workers escrevem, sem chamadas psutil
         """
         self.worker_procs = worker_procs
+        self.state = state
+        self.rows = rows if rows is not None else {}
+        self.last_cpu = {}    # wid -> (pid, cpu_time, instante) da leitura anterior da tabela
         self.interval = interval
         self.running = False
         self.thread = None
-        self.cpu_history = {wid: [] for wid in worker_procs}
-        self.mem_history = {wid: [] for wid in worker_procs}
-
-    def _clear(self):
-        os.system("cls" if os.name == "nt" else "clear")
+        # histórico recente em buffers circulares + agregados de toda a execução em fluxo
+        self.cpu_history = {wid: RingBuffer(history_size) for wid in worker_procs}
+        self.mem_history = {wid: RingBuffer(history_size) for wid in worker_procs}
+        self.cpu_stats = {wid: StreamingSummary() for wid in worker_procs}
+        self.mem_stats = {wid: StreamingSummary() for wid in worker_procs}
+        self.thread_stats = {wid: StreamingSummary() for wid in worker_procs}
+        self.cpu_count = psutil.cpu_count(logical=True) or 1
+
+        # handles psutil reaproveitados entre ciclos (cpu_percent(None) mede o delta desde a última leitura)
+        self.handles = {}     # wid -> psutil.Process do worker
+        self.children = {}    # wid -> {pid: psutil.Process} dos filhos (modo PROCESS)
+        self.ticks = 0
+
+        # custo de amostragem (segundos por ciclo)
+        self.sample_count = 0
+        self.sample_total = 0.0
+        self.sample_max = 0.0
 
     def _terminal_width(self):
         return shutil.get_terminal_size((80, 20)).columns
 
+    def _handle(self, wid, proc):
+        """Handle psutil do worker e se ele já tinha uma leitura de CPU (False = acabou de ser armado)."""
+        h = self.handles.get(wid)
+        if h is None or h.pid != proc.pid:
+            h = psutil.Process(proc.pid)
+            h.cpu_percent(interval=None)   # primeira leitura só arma o contador
+            self.handles[wid] = h
+            self.children[wid] = {}
+            return h, False
+        return h, True
+
+    def _child_cpu(self, wid, h):
+        kids = self.children[wid]
+        if self.ticks % CHILDREN_REFRESH == 0:
+            current = {c.pid: c for c in h.children(recursive=True)}
+            for pid, c in current.items():
+                if pid not in kids:
+                    c.cpu_percent(interval=None)
+                    kids[pid] = c
+            for pid in list(kids):
+                if pid not in current:
+                    del kids[pid]
+        cpu = 0.0
+        for pid, c in list(kids.items()):
+            try:
+                cpu += c.cpu_percent(interval=None)
+            except psutil.NoSuchProcess:
+                del kids[pid]
+        return cpu
+
+    def sample(self):
+        """
+        Lê todos os workers numa única passada não bloqueante e retorna as linhas da tabela.
+        """
+        if self.state is not None:
+            return self._sample_state()
+        lines = []
+        for wid, proc in self.worker_procs.items():
+            try:
+                h, armed = self._handle(wid, proc)
+                with h.oneshot():
+                    # inclui os processos filhos (slots do modo PROCESS) no uso de CPU do worker
+                    cpu = h.cpu_percent(interval=None) + self._child_cpu(wid, h)
+                    mem = h.memory_info().rss / (1024 * 1024)
+                    threads = h.num_threads()
+                cpu = cpu / self.cpu_count if armed else None
+
+                self._record(wid, cpu, mem, threads)
+                lines.append(
+                    f"Worker {wid:02d} | "
+                    f"CPU: {_cpu_field(cpu)} | RAM: {mem:6.1f} MB | Threads: {threads} | "
+                    f"Procs: {1 + len(self.children[wid])}"
+                )
+            except psutil.NoSuchProcess:
+                lines.append(f"Worker {wid} finalizado.")
+        self.ticks += 1
+        return lines
+
+    def _sample_state(self):
+        cols = {c: self.state.column(c) for c in ("pid", "capacity", "busy", "queued", "threads",
+                                                   "rss", "cpu_time")}
+        now = time.monotonic()
+        lines = []
+        for wid, proc in self.worker_procs.items():
+            row = self.rows.get(wid)
+            if row is None or not proc.is_alive():
+                lines.append(f"Worker {wid} finalizado.")
+                continue
+            pid = cols["pid"][row]
+            cpu_time = cols["cpu_time"][row]
+            prev = self.last_cpu.get(wid)
+            self.last_cpu[wid] = (pid, cpu_time, now)
+            if prev is None or prev[0] != pid or now <= prev[2]:
+                # primeira leitura (ou worker recriado) só arma o contador, como cpu_percent(None)
+                cpu = None
+            else:
+                cpu = max(0.0, cpu_time - prev[1]) / (now - prev[2]) * 100 / self.cpu_count
+            mem = cols["rss"][row] / (1024 * 1024)
+            threads = cols["threads"][row]
+
+            self._record(wid, cpu, mem, threads)
+            lines.append(
+                f"Worker {wid:02d} | "
+                f"CPU: {_cpu_field(cpu)} | RAM: {mem:6.1f} MB | Threads: {threads} | "
+                f"Slots: {cols['busy'][row]}/{cols['capacity'][row]} | Fila: {cols['queued'][row]}"
+            )
+        self.ticks += 1
+        return lines
+
+    def _record(self, wid, cpu, mem, threads):
+        # a amostra sem CPU conhecida (cpu None) só fica fora do histórico e das estatísticas de CPU
+        if cpu is not None:
+            self.cpu_history[wid].append(cpu)
+            self.cpu_stats[wid].add(cpu)
+        self.mem_history[wid].append(mem)
+        self.mem_stats[wid].add(mem)
+        self.thread_stats[wid].add(threads)
+
     def _run(self):
         self.running = True
 
         while self.running:
-            self._clear()
+            t0 = time.perf_counter()
+            lines = self.sample()
+            cost = time.perf_counter() - t0
+            self.sample_count += 1
+            self.sample_total += cost
+            self.sample_max = max(self.sample_max, cost)
+
             width = self._terminal_width()
+            frame = [
+                "=" * width,
+                " MONITORAMENTO EM TEMPO REAL (psutil + multiprocessing) ",
+                "=" * width,
+                *lines,
+                "=" * width,
+                f"[Atualizando a cada {self.interval} s | amostragem: {cost * 1000:.2f} ms]",
+                "=" * width,
+            ]
+            # um único write por quadro
+            sys.stdout.write(ANSI_HOME_CLEAR + "\n".join(frame) + "\n")
+            sys.stdout.flush()
 
-            print("=" * width)
-            print(" MONITORAMENTO EM TEMPO REAL (psutil + multiprocessing) ")
-            print("=" * width)
+            time.sleep(self.interval)
 
+    def start(self):
+        # arma os contadores de CPU antes do primeiro quadro
+        if self.state is not None:
+            self._sample_state()
+        else:
             for wid, proc in self.worker_procs.items():
                 try:
-                    p = psutil.Process(proc.pid)
-                    p.cpu_percent(interval=None)
-
-                    cpu = p.cpu_percent(interval=0.1) / psutil.cpu_count(logical=True)
-                    mem = p.memory_info().rss / (1024 * 1024)
-                    threads = p.num_threads()
-
-                    self.cpu_history[wid].append(cpu)
-                    self.mem_history[wid].append(mem)
-
-                    print(
-                        f"Worker {wid:02d} | "
-                        f"CPU: {cpu:5.1f}% | RAM: {mem:6.1f} MB | Threads: {threads}"
-                    )
+                    self._handle(wid, proc)
                 except psutil.NoSuchProcess:
-                    print(f"Worker {wid} finalizado.")
-
-            print("=" * width)
-            print("[Atualizando a cada", self.interval, "s]")
-            print("=" * width)
-
-            time.sleep(self.interval)
-
-    def start(self):
+                    pass
         self.thread = threading.Thread(target=self._run, daemon=True)
         self.thread.start()
 
@@ -69,14 +196,29 @@ class SystemMonitor:
         if self.thread:
             self.thread.join()
 
+    def get_sampling_cost(self):
+        """Custo médio/máximo (ms) de um ciclo de amostragem."""
+        return {
+            "samples": self.sample_count,
+            "avg_ms": self.sample_total / max(self.sample_count, 1) * 1000,
+            "max_ms": self.sample_max * 1000,
+        }
+
     def get_final_metrics(self):
+        """
+        Por worker: médias (cpu_avg, mem_avg) e os agregados completos (mean/std/min/max/p50/p95/p99)
+        de CPU (%), RSS (MB) e número de threads, calculados sobre toda a execução.
+        """
         summary = {}
-        for wid in self.cpu_history:
-            cpu_avg = sum(self.cpu_history[wid]) / max(len(self.cpu_history[wid]), 1)
-            mem_avg = sum(self.mem_history[wid]) / max(len(self.mem_history[wid]), 1)
+        for wid in self.cpu_stats:
+            cpu = self.cpu_stats[wid].summary()
+            mem = self.mem_stats[wid].summary()
 
             summary[wid] = {
-                "cpu_avg": cpu_avg,
-                "mem_avg": mem_avg
+                "cpu_avg": cpu["mean"],
+                "mem_avg": mem["mean"],
+                "cpu": cpu,
+                "mem": mem,
+                "threads": self.thread_stats[wid].summary()
             }
         return summary
@@ -0,0 +1,189 @@
+# pool.py
+import time
+import psutil
+import multiprocessing as mp
+from multiprocessing.connection import wait
+from statetable import WorkerStateTable, TABLE_ROWS
+from worker import (worker_process, calibrated_rates, configure_code, EXEC_THREAD, EXEC_PROCESS, KERNEL_PYTHON,
+                    WORK_TIME)
+from protocol import (CommandChannel, EventChannel, CMD_STOP, CMD_PING, CMD_CONFIGURE, EV_PONG,
+                      pack_command, unpack_events)
+
+RESET_TIMEOUT = 5.0   # segundos para todos os workers responderem à barreira de reset
+
+
+class WorkerPool:
+    """
+    Processos worker reutilizáveis entre execuções: vários Masters (ex.: uma política após a outra)
+    usam os mesmos processos e canais em vez de criá-los e destruí-los a cada run.
+
+    configure() garante um worker por servidor com a capacidade pedida: workers existentes são
+    reconfigurados (CMD_CONFIGURE), os que mudaram de modo de execução (ou de capacidade no modo
+    PROCESS, cujo pool de slots é fixo) são recriados, e os que faltam são criados juntos, sem espera.
+    reset() é a barreira entre execuções: descarta eventos atrasados da execução anterior.
+    Os kernels de simulate_cpu_work são calibrados uma vez, aqui, e as taxas vão para cada worker
+    criado: dezenas de workers calibrando juntos disputariam a CPU e mediriam taxas baixas demais.
+    Cada worker escreve seu estado (slots ocupados, fila, heartbeat, CPU) numa linha de 'state'
+    (statetable.WorkerStateTable), criada na primeira criação de worker com até 'max_workers' linhas.
+    """
+
+    def __init__(self, max_workers=TABLE_ROWS):
+        self.in_channels = {}               # server_id -> CommandChannel (Master => Worker)
+        # um canal de eventos por worker: um processo que morre ou trava segurando o lock do
+        # canal não bloqueia os demais, e o recriado recebe um canal novo
+        self.out_channels = {}              # server_id -> EventChannel (Worker => Master)
+        self.procs = {}                     # server_id -> mp.Process
+        self.config = {}                    # server_id -> (capacidade, exec_mode, batch_size, flush_interval, cpus)
+        self.rates = None                   # kernel -> iterações/s (worker.calibrate), na primeira criação
+        self.max_workers = max_workers
+        self.state = None                   # WorkerStateTable compartilhada com os workers
+        self.rows = {}                      # server_id -> linha do worker em 'state'
+        self.free_rows = []
+        # o registro de eventos leva o worker como int32 (protocol.EVENT): cada servidor ganha um
+        # índice pequeno, estável entre recriações, e o id do servidor (qualquer valor) nunca
+        # passa pelo pipe; o Master traduz de volta com worker_index
+        self.worker_index = {}              # server_id -> índice do worker nos eventos
+
+    def configure(self, capacities, exec_mode=EXEC_THREAD, batch_size=1, flush_interval=0.002, quantum=None,
+                  kernel=KERNEL_PYTHON, affinity=None, work=WORK_TIME):
+        """
+        capacities: dict { server_id: capacidade }.
+        affinity: dict { server_id: CPUs } para prender os workers (os.sched_setaffinity); a
+        máscara vale para todas as threads do worker, então mudar as CPUs recria o processo.
+        Retorna (in_channels, out_channels, procs) só desses servidores.
+        """
+        affinity = affinity or {}
+        for sid, cap in capacities.items():
+            cpus = tuple(affinity[sid]) if affinity.get(sid) else None
+            p = self.procs.get(sid)
+            old = self.config.get(sid)
+            if p is not None and p.is_alive():
+                same_mode = old[1:] == (exec_mode, batch_size, flush_interval, cpus)
+                if same_mode and (exec_mode != EXEC_PROCESS or old[0] == cap):
+                    self.in_channels[sid].send(pack_command(CMD_CONFIGURE, cap, quantum or 0.0,
+                                                            configure_code(kernel, work)))
+                    self.config[sid] = (cap, exec_mode, batch_size, flush_interval, cpus)
+                    continue
+                self._stop([sid])
+            self._spawn(sid, cap, exec_mode, batch_size, flush_interval, cpus, quantum, kernel, work)
+        return ({sid: self.in_channels[sid] for sid in capacities},
+                {sid: self.out_channels[sid] for sid in capacities},
+                {sid: self.procs[sid] for sid in capacities})
+
+    def _spawn(self, sid, capacity, exec_mode, batch_size, flush_interval, cpus, quantum, kernel, work):
+        if self.rates is None:
+            self.rates = calibrated_rates()
+        if self.state is None:
+            self.state = WorkerStateTable(self.max_workers)
+            self.free_rows = list(range(self.max_workers - 1, -1, -1))
+        if not self.free_rows:
+            raise RuntimeError(f"WorkerPool: mais de {self.max_workers} workers (aumente max_workers)")
+        row = self.free_rows.pop()
+        # linha zerada antes do processo existir: quem lê nunca vê contadores do worker anterior
+        self.state.clear(row)
+        in_ch = CommandChannel()
+        out_ch = EventChannel()
+        # processos daemon não podem ter filhos, então no modo PROCESS o worker não é daemon
+        # (close garante o encerramento)
+        index = self.worker_index.get(sid)
+        if index is None:
+            index = self.worker_index[sid] = len(self.worker_index) + 1
+        p = mp.Process(target=worker_process,
+                       args=(index, capacity, in_ch, out_ch, exec_mode,
+                             batch_size, flush_interval, quantum, kernel, self.rates, self.state, row,
+                             cpus, work),
+                       daemon=(exec_mode != EXEC_PROCESS))
+        p.start()
+        self.in_channels[sid] = in_ch
+        self.out_channels[sid] = out_ch
+        self.procs[sid] = p
+        self.rows[sid] = row
+        self.config[sid] = (capacity, exec_mode, batch_size, flush_interval, cpus)
+
+    def _stop(self, sids):
+        # send shutdown (CMD_STOP) to each worker's channel and join
+        for sid in sids:
+            try:
+                self.in_channels[sid].send(pack_command(CMD_STOP))
+            except Exception:
+                pass
+        for sid in sids:
+            p = self.procs[sid]
+            try:
+                p.join(timeout=2.0)
+            except Exception:
+                pass
+            self._kill(sid)
+
+    def _kill(self, sid):
+        """Encerra o worker e seus processos filhos (slots do modo PROCESS) sem esperar resposta."""
+        p = self.procs.pop(sid)
+        self.in_channels.pop(sid).close()
+        self.out_channels.pop(sid).close()
+        del self.config[sid]
+        self.free_rows.append(self.rows.pop(sid))
+        if not p.is_alive():
+            p.join()
+            return
+        try:
+            children = psutil.Process(p.pid).children(recursive=True)
+        except psutil.NoSuchProcess:
+            children = []
+        # SIGKILL também encerra um processo parado (SIGSTOP), que ignoraria SIGTERM
+        p.kill()
+        p.join(timeout=1.0)
+        for c in children:
+            try:
+                c.kill()
+            except psutil.NoSuchProcess:
+                pass
+
+    def respawn(self, sid, quantum=None, kernel=KERNEL_PYTHON, work=WORK_TIME):
+        """Substitui o worker sid (morto ou travado) por um processo novo com a mesma configuração."""
+        config = self.config[sid]
+        self._kill(sid)
+        self._spawn(sid, *config, quantum, kernel, work)
+        return self.in_channels[sid], self.out_channels[sid], self.procs[sid]
+
+    def reset(self, timeout=RESET_TIMEOUT):
+        """
+        Barreira entre execuções: cada worker responde a um CMD_PING depois de tratar todos os
+        comandos anteriores, então os eventos lidos até o último EV_PONG são restos da execução
+        anterior e são descartados. Workers que não respondem a tempo são encerrados.
+        """
+        waiting = set()
+        for sid, p in list(self.procs.items()):
+            if not p.is_alive():
+                self._stop([sid])
+                continue
+            self.in_channels[sid].send(pack_command(CMD_PING))
+            waiting.add(sid)
+        deadline = time.monotonic() + timeout
+        while waiting:
+            readers = {self.out_channels[sid].reader: sid for sid in waiting}
+            ready = wait(list(readers), max(0.0, deadline - time.monotonic()))
+            if not ready:
+                break
+            for reader in ready:
+                sid = readers[reader]
+                ch = self.out_channels[sid]
+                buf = ch.recv(0)
+                while buf is not None:
+                    for ev in unpack_events(buf):
+                        if ev.type == EV_PONG:
+                            waiting.discard(sid)
+                    buf = ch.recv(0)
+        if waiting:
+            self._stop(list(waiting))
+
+    def close(self):
+        self._stop(list(self.procs))
+        if self.state is not None:
+            self.state.close()
+            self.state = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
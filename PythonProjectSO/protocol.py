@@ -0,0 +1,165 @@
+# protocol.py
+import struct
+import threading
+import time
+import multiprocessing as mp
+from collections import namedtuple
+
+# Protocolo binário Master <-> Worker: registros de tamanho fixo empacotados com struct e
+# enviados com Connection.send_bytes (sem pickle). O corpo das tarefas fica só no Master,
+# numa tabela indexada pelo wire id; o worker recebe apenas o que precisa para executar.
+
+# comandos Master -> Worker
+CMD_RUN = 1
+CMD_PING = 2
+CMD_STOP = 3
+CMD_RECLAIM = 4    # devolver até task_id tarefas ainda não iniciadas da fila local do worker
+CMD_CONFIGURE = 5  # nova capacidade (task_id), quantum (tempo_exec, 0 = sem preempção) e kernel de CPU
+                   # (peso_cpu = índice em worker.KERNELS) de um worker reutilizado
+CMD_PROFILE = 6    # task_id 1 = inicia o profiler por amostragem; 0 = para e grava as pilhas (ver instrument.py)
+
+# eventos Worker -> Master
+EV_STARTED = 1
+EV_DONE = 2
+EV_PONG = 3
+EV_EXITING = 4
+EV_PREEMPTED = 5   # quantum esgotado: value = tempo_exec restante; o Master recoloca a tarefa na fila
+EV_RECLAIMED = 6   # tarefa task_id devolvida sem executar; task_id 0 encerra o CMD_RECLAIM (value = total)
+EV_PROFILED = 7    # pilhas gravadas em instrument.worker_profile_path(pid) (value = amostras)
+
+# comando: cmd, wire id, tempo_exec, peso_cpu
+COMMAND = struct.Struct("<Bqdd")
+# evento: tipo, worker, wire id, timestamp, valor auxiliar
+# (EV_STARTED: intervalo ocioso do slot desde a última preempção; EV_PREEMPTED: tempo restante)
+EVENT = struct.Struct("<Biqdd")
+
+Command = namedtuple("Command", "cmd task_id tempo_exec peso_cpu")
+Event = namedtuple("Event", "type worker task_id time value")
+
+
+def pack_command(cmd, task_id=0, tempo_exec=0.0, peso_cpu=0.0):
+    return COMMAND.pack(cmd, task_id, tempo_exec, peso_cpu)
+
+
+def unpack_commands(buf):
+    """Decodifica um buffer com um ou mais comandos concatenados."""
+    return [Command._make(fields) for fields in COMMAND.iter_unpack(buf)]
+
+
+def pack_event(etype, worker, task_id=0, t=0.0, value=0.0):
+    return EVENT.pack(etype, worker, task_id, t, value)
+
+
+def unpack_events(buf):
+    """Decodifica um buffer com um ou mais eventos concatenados."""
+    return [Event._make(fields) for fields in EVENT.iter_unpack(buf)]
+
+
+class CommandChannel:
+    """Canal Master -> um worker (um único escritor, então não precisa de lock)."""
+
+    def __init__(self):
+        self.reader, self.writer = mp.Pipe(duplex=False)
+
+    def send(self, buf):
+        self.writer.send_bytes(buf)
+
+    def recv(self, timeout=None):
+        """Próximo buffer de comandos; com 'timeout', None se nada chegar nesse tempo."""
+        if timeout is not None and not self.reader.poll(timeout):
+            return None
+        return self.reader.recv_bytes()
+
+    def close(self):
+        self.reader.close()
+        self.writer.close()
+
+
+class EventChannel:
+    """
+    Canal Worker -> Master, um por worker (compartilhado pelas threads do worker).
+    Escritas são serializadas por um lock; só o Master lê.
+    """
+
+    def __init__(self):
+        self.reader, self.writer = mp.Pipe(duplex=False)
+        self.lock = mp.Lock()
+
+    def send(self, buf):
+        with self.lock:
+            self.writer.send_bytes(buf)
+
+    def recv(self, timeout=None):
+        """Retorna o próximo buffer de eventos ou None se nada chegar dentro de 'timeout'."""
+        if not self.reader.poll(timeout):
+            return None
+        return self.reader.recv_bytes()
+
+    def close(self):
+        self.reader.close()
+        self.writer.close()
+
+
+class BatchingEventSender:
+    """
+    Acumula eventos de várias threads do worker e os envia juntos ao EventChannel: um único
+    send_bytes (e uma aquisição do lock entre processos) por lote. O lote é descarregado ao
+    atingir 'batch_size' eventos ou, no máximo, 'flush_interval' segundos após o primeiro evento.
+    Com batch_size <= 1 cada evento é enviado imediatamente.
+    """
+
+    def __init__(self, channel, batch_size=1, flush_interval=0.002):
+        self.channel = channel
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.buffer = bytearray()
+        self.pending = 0
+        self.first_at = 0.0       # instante (monotonic) do primeiro evento do lote atual
+        self.lock = threading.Lock()
+        self.has_data = threading.Condition(self.lock)
+        self.running = batch_size > 1
+        self.thread = None
+        if self.running:
+            self.thread = threading.Thread(target=self._flush_loop, daemon=True)
+            self.thread.start()
+
+    def send(self, buf):
+        if not self.running:
+            self.channel.send(buf)
+            return
+        with self.lock:
+            self.buffer += buf
+            self.pending += 1
+            if self.pending >= self.batch_size:
+                self._flush_locked()
+            elif self.pending == 1:
+                self.first_at = time.monotonic()
+                self.has_data.notify()
+
+    def _flush_locked(self):
+        if self.pending:
+            self.channel.send(bytes(self.buffer))
+            self.buffer.clear()
+            self.pending = 0
+
+    def _flush_loop(self):
+        with self.lock:
+            while self.running:
+                if not self.pending:
+                    self.has_data.wait()
+                    continue
+                # espera o prazo do lote; se ele for descarregado por tamanho antes, recalcula
+                remaining = self.first_at + self.flush_interval - time.monotonic()
+                if remaining > 0:
+                    self.has_data.wait(remaining)
+                    continue
+                self._flush_locked()
+
+    def close(self):
+        """Descarrega o que restou e encerra a thread de flush."""
+        with self.lock:
+            self.running = False
+            self._flush_locked()
+            self.has_data.notify()
+        if self.thread:
+            self.thread.join(timeout=1.0)
@@ -0,0 +1,393 @@
+# results.py
+import json
+import math
+import struct
+from array import array
+from itertools import compress
+from operator import sub
+from metrics import LATENCY_QUANTILES
+
+# Armazenamento colunar dos resultados: uma array por campo em vez de um dict por tarefa
+# (~70 bytes por tarefa em vez de centenas). Os campos derivados (wait, response) são
+# calculados sob demanda a partir das colunas, e as colunas podem ser gravadas em fluxo
+# num arquivo binário só de acréscimo, em grupos de linhas.
+# task_id, worker_id e prioridade guardam inteiros direto; qualquer outro valor (ids "t1",
+# prioridade 1.5...) entra num dicionário de rótulos e a coluna guarda o código, como "tipo".
+
+MISSING_INT = -(2 ** 63)   # valor ausente (None) nas colunas inteiras; nas de float é NaN
+LABEL_BASE = -(2 ** 62)    # códigos de rótulo: LABEL_BASE - código (inteiros <= isso também viram rótulo)
+NAN = float("nan")
+ROW_GROUP = 4096           # linhas por grupo gravado no arquivo
+FILE_MAGIC = b"SORES3\n"
+FILE_MAGIC_V2 = b"SORES2\n"   # sem a coluna runtime (era fim - início)
+FILE_MAGIC_V1 = b"SORES1\n"   # idem, e sem rótulos: o JSON do grupo é só a lista de tipos novos
+GROUP_HEADER = struct.Struct("<II")   # linhas do grupo, tamanho do JSON de tipos/rótulos novos
+
+# colunas armazenadas: nome -> typecode ("tipo" guarda o código no dicionário de tipos)
+COLUMNS = {
+    "task_id": "q",
+    "worker_id": "q",
+    "arrival": "d",
+    "dispatch": "d",
+    "start": "d",
+    "end": "d",
+    "runtime": "d",        # tempo executando: soma das fatias (com preempção, menor que fim - início)
+    "prioridade": "q",
+    "tipo": "i",
+}
+# colunas derivadas: nome -> (minuendo, subtraendo)
+DERIVED = {
+    "wait": ("start", "arrival"),
+    "response": ("end", "arrival"),
+}
+# ordem dos campos de um registro (a mesma dos dicts usados antes)
+FIELDS = ("task_id", "worker_id", "arrival", "dispatch", "start", "end",
+          "wait", "runtime", "response", "prioridade", "tipo")
+# série de latência -> coluna (mesmos nomes de metrics.LatencyTracker)
+SERIES = {"response": "response", "wait": "wait", "service": "runtime"}
+DIMENSIONS = {"worker": "worker_id", "tipo": "tipo", "prioridade": "prioridade"}
+LABELED = ("task_id", "worker_id", "prioridade")   # colunas "q" que aceitam rótulos
+
+
+class Labels:
+    """
+    Valores não inteiros de colunas "q" -> código. encode devolve o próprio inteiro quando ele
+    cabe na coluna, MISSING_INT para None e LABEL_BASE - código para o resto.
+    """
+
+    def __init__(self):
+        self.values = []   # código -> valor
+        self.codes = {}    # (tipo, valor) -> código (1 e 1.0 e True são rótulos distintos)
+
+    def encode(self, x):
+        if x is None:
+            return MISSING_INT
+        if type(x) is int and LABEL_BASE < x < 2 ** 63:
+            return x
+        key = (type(x), x)
+        code = self.codes.get(key)
+        if code is None:
+            code = self.codes[key] = len(self.values)
+            self.values.append(x)
+        return LABEL_BASE - code
+
+    def lookup(self, x):
+        """Como encode, sem criar rótulo: None se o valor nunca foi gravado."""
+        if x is None:
+            return MISSING_INT
+        if type(x) is int and LABEL_BASE < x < 2 ** 63:
+            return x
+        code = self.codes.get((type(x), x))
+        return None if code is None else LABEL_BASE - code
+
+    def decode(self, v):
+        if v == MISSING_INT:
+            return None
+        if v <= LABEL_BASE:
+            return self.values[LABEL_BASE - v]
+        return v
+
+
+def _float(x):
+    return NAN if x is None else x
+
+
+def quantile_summary(values, quantiles=LATENCY_QUANTILES):
+    """count, mean, std, min, max e pXX (nearest-rank) de uma sequência de floats; NaN é ignorado."""
+    values = sorted(x for x in values if x == x)
+    n = len(values)
+    out = {"count": n, "mean": 0.0, "std": 0.0, "min": 0.0, "max": 0.0}
+    if n:
+        mean = math.fsum(values) / n
+        out["mean"] = mean
+        out["std"] = math.sqrt(math.fsum((x - mean) ** 2 for x in values) / (n - 1)) if n > 1 else 0.0
+        out["min"] = values[0]
+        out["max"] = values[-1]
+    for p in quantiles:
+        out[f"p{int(round(p * 100))}"] = values[max(0, math.ceil(p * n) - 1)] if n else 0.0
+    return out
+
+
+class TaskRecord:
+    """
+    Visão de uma linha do ResultStore: acessa as colunas sem copiar. Funciona como um dict
+    somente leitura (rec["end"], rec.get("tipo"), dict(rec)) e também por atributo (rec.end).
+    """
+
+    __slots__ = ("store", "index")
+
+    def __init__(self, store, index):
+        self.store = store
+        self.index = index
+
+    def __getitem__(self, key):
+        return self.store.value(key, self.index)
+
+    def __getattr__(self, key):
+        try:
+            return self.store.value(key, self.index)
+        except KeyError:
+            raise AttributeError(key) from None
+
+    def get(self, key, default=None):
+        try:
+            return self.store.value(key, self.index)
+        except KeyError:
+            return default
+
+    def keys(self):
+        return FIELDS
+
+    def to_dict(self):
+        return {k: self[k] for k in FIELDS}
+
+    def __repr__(self):
+        return f"TaskRecord({self.to_dict()})"
+
+
+class ResultStore:
+    """
+    Registros de tarefas concluídas em colunas array.
+
+    path: se informado, as linhas são gravadas em grupos de 'row_group' no arquivo (só acréscimo;
+          ver read_results). keep=False descarta as colunas da memória após gravar cada grupo
+          (modo streaming); nesse caso count() continua valendo, mas summary() só vê o grupo atual.
+    """
+
+    def __init__(self, path=None, keep=True, row_group=ROW_GROUP):
+        self.columns = {name: array(code) for name, code in COLUMNS.items()}
+        self.tipos = []          # código -> nome do tipo
+        self.tipo_codes = {}     # nome -> código
+        self.labels = Labels()   # ids e prioridades não inteiros (ver LABELED)
+        self.total = 0           # linhas acrescentadas desde o início (inclusive as já descartadas)
+        self.keep = keep
+        self.path = path
+        self.row_group = row_group
+        self.file = None
+        self.flushed = 0         # linhas da memória já gravadas
+        self.tipos_flushed = 0   # tipos do dicionário já gravados
+        self.labels_flushed = 0  # rótulos já gravados
+        if path:
+            self.file = open(path, "ab")
+            if self.file.tell() == 0:
+                self.file.write(FILE_MAGIC)
+
+    # -------------------------
+    # escrita
+    # -------------------------
+    def _tipo_code(self, tipo):
+        code = self.tipo_codes.get(tipo)
+        if code is None:
+            code = self.tipo_codes[tipo] = len(self.tipos)
+            self.tipos.append(tipo)
+        return code
+
+    def append(self, task_id, worker_id, arrival, dispatch, start, end, prioridade=None, tipo=None,
+               runtime=None):
+        """runtime: tempo executando; None = fim - início (tarefa executada numa fatia só)."""
+        if not self.keep and not self.file:
+            self.total += 1
+            return
+        c = self.columns
+        encode = self.labels.encode
+        c["task_id"].append(encode(task_id))
+        c["worker_id"].append(encode(worker_id))
+        c["arrival"].append(_float(arrival))
+        c["dispatch"].append(_float(dispatch))
+        c["start"].append(_float(start))
+        c["end"].append(_float(end))
+        c["runtime"].append(c["end"][-1] - c["start"][-1] if runtime is None else runtime)
+        c["prioridade"].append(encode(prioridade))
+        c["tipo"].append(self._tipo_code(tipo))
+        self.total += 1
+        if self.file and len(c["task_id"]) - self.flushed >= self.row_group:
+            self.flush()
+
+    def flush(self):
+        """Grava no arquivo as linhas ainda não gravadas (um grupo)."""
+        if not self.file:
+            return
+        n = len(self.columns["task_id"]) - self.flushed
+        if n:
+            new = json.dumps({"tipos": self.tipos[self.tipos_flushed:],
+                              "labels": self.labels.values[self.labels_flushed:]}).encode("utf-8")
+            self.file.write(GROUP_HEADER.pack(n, len(new)))
+            self.file.write(new)
+            for col in self.columns.values():
+                col[self.flushed:].tofile(self.file)
+            self.tipos_flushed = len(self.tipos)
+            self.labels_flushed = len(self.labels.values)
+            self.flushed += n
+        if not self.keep:
+            for col in self.columns.values():
+                del col[:]
+            self.flushed = 0
+        self.file.flush()
+
+    def close(self):
+        if self.file:
+            self.flush()
+            self.file.close()
+            self.file = None
+
+    def __getstate__(self):
+        # o arquivo fica no processo que o abriu; o que vai para outro processo são as colunas
+        state = self.__dict__.copy()
+        state["file"] = None
+        state["path"] = None
+        return state
+
+    # -------------------------
+    # leitura
+    # -------------------------
+    def __len__(self):
+        return len(self.columns["task_id"])
+
+    def __iter__(self):
+        return (TaskRecord(self, i) for i in range(len(self)))
+
+    def __getitem__(self, index):
+        if not -len(self) <= index < len(self):
+            raise IndexError(index)
+        return TaskRecord(self, index % len(self))
+
+    def count(self):
+        return self.total
+
+    def column(self, name):
+        """
+        Coluna como array (tipo: códigos, ver self.tipos; LABELED: rótulos codificados, ver
+        self.labels). Derivadas são calculadas aqui.
+        """
+        if name in DERIVED:
+            a, b = DERIVED[name]
+            return array("d", map(sub, self.columns[a], self.columns[b]))
+        return self.columns[name]
+
+    def value(self, key, index):
+        if key in DERIVED:
+            a, b = DERIVED[key]
+            v = self.columns[a][index] - self.columns[b][index]
+        else:
+            v = self.columns[key][index]
+            if key == "tipo":
+                return self.tipos[v]
+            if key in LABELED:
+                return self.labels.decode(v)
+        if v != v:
+            return None
+        return v
+
+    def values(self, name):
+        """Coluna com None no lugar de ausentes e nomes de tipo decodificados."""
+        if name == "tipo":
+            tipos = self.tipos
+            return [tipos[c] for c in self.columns["tipo"]]
+        col = self.column(name)
+        if col.typecode == "d":
+            return [None if x != x else x for x in col]
+        return list(map(self.labels.decode, col))
+
+    def rows(self, fields=FIELDS, extra=None):
+        """
+        Tuplas na ordem de 'fields', montadas coluna a coluna. Campos fora das colunas
+        são lidos de 'extra' (constantes, ex.: a política) ou ficam vazios.
+        """
+        extra = extra or {}
+        n = len(self)
+        cols = []
+        for f in fields:
+            if f in COLUMNS or f in DERIVED:
+                cols.append(self.values(f))
+            else:
+                cols.append([extra.get(f, "")] * n)
+        return zip(*cols)
+
+    # -------------------------
+    # agregados (mesma interface de metrics.LatencyTracker)
+    # -------------------------
+    def names(self, dimension):
+        col = self.columns[DIMENSIONS[dimension]]
+        if dimension == "tipo":
+            return sorted((self.tipos[c] for c in set(col)), key=str)
+        return sorted(map(self.labels.decode, set(col)), key=str)
+
+    def _selector(self, dimension, name):
+        col = self.columns[DIMENSIONS[dimension]]
+        if dimension == "tipo":
+            key = self.tipo_codes.get(name, -1)
+        else:
+            key = self.labels.lookup(name)
+        return [x == key for x in col]
+
+    def summary(self, dimension="all", name=None, quantiles=LATENCY_QUANTILES):
+        """{série: resumo} do grupo pedido, calculado sobre as colunas (quantis exatos)."""
+        if not len(self):
+            return {}
+        selector = None if dimension == "all" else self._selector(dimension, name)
+        if selector is not None and not any(selector):
+            return {}
+        out = {}
+        for series, field in SERIES.items():
+            col = self.column(field)
+            if selector is not None:
+                col = compress(col, selector)
+            out[series] = quantile_summary(col, quantiles)
+        return out
+
+
+def read_results(path):
+    """Lê um arquivo gravado por ResultStore(path=...) de volta para um ResultStore em memória."""
+    store = ResultStore()
+    with open(path, "rb") as f:
+        magic = f.read(len(FILE_MAGIC))
+        if magic not in (FILE_MAGIC, FILE_MAGIC_V2, FILE_MAGIC_V1):
+            raise ValueError(f"{path}: não é um arquivo de resultados")
+        columns = store.columns
+        if magic != FILE_MAGIC:
+            # versões antigas: runtime não foi gravado, sai de fim - início depois da leitura
+            columns = {name: col for name, col in columns.items() if name != "runtime"}
+        while True:
+            header = f.read(GROUP_HEADER.size)
+            if len(header) < GROUP_HEADER.size:
+                break
+            n, new_len = GROUP_HEADER.unpack(header)
+            new = json.loads(f.read(new_len))
+            if magic == FILE_MAGIC_V1:
+                new = {"tipos": new, "labels": []}
+            for tipo in new["tipos"]:
+                store._tipo_code(tipo)
+            for label in new["labels"]:
+                # códigos na ordem de gravação: encode repete a numeração do arquivo
+                store.labels.encode(label)
+            for col in columns.values():
+                col.fromfile(f, n)
+            store.total += n
+    if magic != FILE_MAGIC:
+        c = store.columns
+        c["runtime"] = array("d", map(sub, c["end"], c["start"]))
+    return store
+
+
+class AssignmentLog:
+    """assigned_log em colunas: (instante, task_id, server_id) por despacho."""
+
+    def __init__(self):
+        self.time = array("d")
+        self.task_id = array("q")
+        self.server_id = array("q")
+        self.labels = Labels()   # ids não inteiros
+
+    def append(self, entry):
+        t, task_id, sid = entry
+        encode = self.labels.encode
+        self.time.append(t)
+        self.task_id.append(encode(task_id))
+        self.server_id.append(encode(sid))
+
+    def __len__(self):
+        return len(self.time)
+
+    def __iter__(self):
+        decode = self.labels.decode
+        return zip(self.time, map(decode, self.task_id), map(decode, self.server_id))
@@ -1,24 +1,50 @@
 # scheduler.py
 import heapq
 import itertools
+import math
 from collections import deque
 
+POLICIES = ("RR", "SJF", "PRIORITY", "SRPT", "EDF", "WFQ", "MLFQ", "AGING")
+
+AGING_INTERVAL = 5.0   # AGING: segundos de espera que valem um nível de prioridade
+MLFQ_LEVELS = 3        # MLFQ: número de filas
+
 class Scheduler:
-    def __init__(self, policy="RR"):
+    def __init__(self, policy="RR", weights=None, aging_interval=AGING_INTERVAL, levels=MLFQ_LEVELS):
+        """
+        weights: WFQ, peso por tipo ({tipo: peso}; tipos ausentes têm peso 1)
+        aging_interval: AGING, espera (s) equivalente a subir um nível de prioridade
+        levels: MLFQ, número de filas
+        """
         self.policy = policy
         self.counter = itertools.count()   # contador para desempate
+        self.counts = {}                   # prioridade -> tarefas na fila (controle de admissão)
 
         if policy == "RR":
             self.queue = deque()
-        elif policy in ("SJF", "PRIORITY"):
+        elif policy in ("SJF", "PRIORITY", "SRPT", "EDF", "AGING"):
             self.queue = []
+        elif policy == "WFQ":
+            self.queue = []
+            self.weights = weights or {}
+            self.virtual_time = 0.0   # tag de término da última tarefa servida (SCFQ)
+            self.last_finish = {}     # tipo -> tag de término da última tarefa enfileirada
+        elif policy == "MLFQ":
+            self.levels = [deque() for _ in range(max(1, levels))]
+            self.size = 0
         else:
             raise ValueError("Unknown policy: " + str(policy))
+        self.aging_interval = aging_interval
 
     def push(self, task):
         """
         task: { id, tipo, prioridade, tempo_exec, arrival_time, ... }
+        campos opcionais: remaining (SRPT, tempo restante após preempção), deadline (EDF, segundos
+        após a chegada), preemptions (MLFQ, quantas vezes a tarefa já foi preemptada)
         """
+        p = task.get("prioridade")
+        self.counts[p] = self.counts.get(p, 0) + 1
+
         if self.policy == "RR":
             self.queue.append(task)
 
@@ -36,18 +62,83 @@ class Scheduler:
                 (task["prioridade"], next(self.counter), task)
             )
 
+        elif self.policy == "SRPT":
+            # menor tempo restante (igual a tempo_exec até a tarefa ser preemptada)
+            heapq.heappush(
+                self.queue,
+                (task.get("remaining", task["tempo_exec"]), next(self.counter), task)
+            )
+
+        elif self.policy == "EDF":
+            # prazo absoluto mais cedo; tarefas sem prazo vão para o fim, em ordem de chegada
+            if "deadline_at" not in task:
+                deadline = task.get("deadline")
+                task["deadline_at"] = (task.get("arrival_time", 0.0) + deadline) if deadline is not None else math.inf
+            heapq.heappush(
+                self.queue,
+                (task["deadline_at"], next(self.counter), task)
+            )
+
+        elif self.policy == "WFQ":
+            # fair queueing auto-cronometrado: cada tipo é um fluxo; a tarefa recebe uma tag de
+            # término virtual = max(V, término anterior do fluxo) + tempo restante / peso (uma
+            # tarefa preemptada volta cobrando só o que falta, como no SRPT)
+            tipo = task.get("tipo")
+            start = max(self.virtual_time, self.last_finish.get(tipo, 0.0))
+            finish = start + task.get("remaining", task["tempo_exec"]) / self.weights.get(tipo, 1.0)
+            self.last_finish[tipo] = finish
+            heapq.heappush(
+                self.queue,
+                (finish, next(self.counter), task)
+            )
+
+        elif self.policy == "MLFQ":
+            # nível = vezes que a tarefa foi preemptada (rebaixada a cada quantum consumido)
+            level = min(task.get("preemptions", 0), len(self.levels) - 1)
+            self.levels[level].append(task)
+            self.size += 1
+
+        elif self.policy == "AGING":
+            # prioridade efetiva = prioridade - espera / aging_interval. Para quaisquer duas tarefas
+            # a ordem entre elas não muda com o tempo, então a chave fixa
+            # prioridade * aging_interval + chegada ordena pela prioridade efetiva em qualquer instante
+            heapq.heappush(
+                self.queue,
+                (task["prioridade"] * self.aging_interval + task.get("arrival_time", 0.0),
+                 next(self.counter), task)
+            )
+
     def pop(self):
+        task = self._pop()
+        if task is not None:
+            self.counts[task.get("prioridade")] -= 1
+        return task
+
+    def _pop(self):
         if self.is_empty():
             return None
 
         if self.policy == "RR":
             return self.queue.popleft()
 
-        # para SJF e PRIORITY
+        if self.policy == "MLFQ":
+            self.size -= 1
+            for level in self.levels:
+                if level:
+                    return level.popleft()
+
+        if self.policy == "WFQ":
+            finish, _, task = heapq.heappop(self.queue)
+            self.virtual_time = finish
+            return task
+
+        # para SJF, PRIORITY, SRPT, EDF e AGING
         return heapq.heappop(self.queue)[-1]
 
     def is_empty(self):
-        return len(self.queue) == 0
+        return len(self) == 0
 
     def __len__(self):
+        if self.policy == "MLFQ":
+            return self.size
         return len(self.queue)
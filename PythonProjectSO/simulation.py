@@ -0,0 +1,175 @@
+# simulation.py
+import heapq
+import itertools
+import time
+from master import Master
+from admission import BLOCKED
+
+# tipos de evento (a ordem define o desempate quando dois eventos caem no mesmo instante:
+# conclusões são tratadas antes de chegadas para que o slot liberado já esteja disponível)
+EV_DONE = 0
+EV_PREEMPTED = 1
+EV_ARRIVAL = 2
+
+
+class SimMaster(Master):
+    """
+    Simulação por eventos discretos (relógio virtual) do mesmo sistema modelado por Master.
+
+    Usa as mesmas entradas (servidores/requisições), o mesmo Scheduler e o mesmo modelo de
+    capacidade (cada servidor executa até 'capacidade' tarefas ao mesmo tempo, cada uma levando
+    'tempo_exec' segundos), mas sem processos nem consumo real de CPU: o tempo avança direto
+    para o próximo evento de um heap. Produz completed_log/assigned_log no mesmo formato.
+    Com quantum, cada execução dura no máximo uma fatia e a tarefa volta à scheduler
+    (a troca de contexto não tem custo no modelo).
+    """
+
+    def __init__(self, servers, tasks, **kwargs):
+        # demais parâmetros iguais aos do Master (os específicos de processos são ignorados;
+        # no modelo discreto a tarefa começa ao ser atribuída, então não há fila local/prefetch)
+        kwargs["prefetch"] = 0
+        super().__init__(servers, tasks, **kwargs)
+        self.now = 0.0            # relógio virtual (segundos desde o início)
+        self.events = []          # heap de (instante, tipo, seq, payload)
+        self.event_seq = itertools.count()
+        self.monitor_summary = {}
+
+    # -------------------------
+    # fila de eventos
+    # -------------------------
+    def _schedule(self, at, etype, payload):
+        heapq.heappush(self.events, (at, etype, next(self.event_seq), payload))
+
+    def _ts(self, t):
+        # converte instante virtual em timestamp absoluto, no mesmo formato do modo real
+        return self.start_time + t
+
+    # -------------------------
+    # scheduler / dispatch
+    # -------------------------
+    def dispatch_if_possible(self):
+        """
+        Mesma heurística do Master: cada tarefa vai para o servidor menos ocupado com slot livre
+        (ou, com placement="affinity", o de melhor speedup do tipo ponderado pela folga).
+        No modelo discreto a tarefa começa no mesmo instante em que é atribuída.
+        """
+        affinity = self.placement == "affinity"
+        dispatched = 0
+        while len(self.scheduler) > 0:
+            sid = self.load_index.least_loaded()
+            if sid is None:
+                break
+            task = self.scheduler.pop()
+            if task is None:
+                break
+            if self.admission is not None and not self.admission.on_pop(task, self._ts(self.now)):
+                self.log.info("dropped", "Requisição {task} (P{prioridade}) descartada sem executar",
+                              task=task["id"], prioridade=task.get("prioridade"))
+                continue
+            if affinity:
+                sid = self.load_index.best_for(task.get("tipo"))
+            self.in_flight[sid] += 1
+            self._update_load(sid)
+            # tarefa preemptada mantém o primeiro despacho/início
+            task.setdefault("dispatch_time", self._ts(self.now))
+            task.setdefault("start_time", self._ts(self.now))
+            dispatched += 1
+            self.assigned_log.append((self._ts(self.now), task["id"], sid))
+            self.log.info("dispatch", "Requisição {task} (P{prioridade}) atribuída ao Servidor {server}",
+                          task=task["id"], prioridade=task.get("prioridade"), server=sid)
+            # tempo neste servidor (speedup do tipo); o restante volta à fila sem o speedup
+            speedup = self.speedup[sid].get(task.get("tipo"), 1.0)
+            run = float(task.get("remaining", task["tempo_exec"])) / speedup
+            # a fatia é conhecida já no despacho: entra direto em service_time
+            if self.quantum and run > self.quantum:
+                task["service_time"] = task.get("service_time", 0.0) + self.quantum
+                self._schedule(self.now + self.quantum, EV_PREEMPTED,
+                               (sid, task, (run - self.quantum) * speedup))
+            else:
+                task["service_time"] = task.get("service_time", 0.0) + run
+                self._schedule(self.now + run, EV_DONE, (sid, task, self.now))
+        return dispatched
+
+    def _schedule_next_arrival(self, arrivals):
+        # sem realtime a fonte só é lida aqui depois de uma retenção: a chegada é imediata
+        nxt = next(arrivals, None)
+        if nxt is not None:
+            at = self._arrival_offset(nxt, self.now) if self.realtime else self.now
+            self._schedule(at, EV_ARRIVAL, nxt)
+
+    # -------------------------
+    # main loop
+    # -------------------------
+    def run(self):
+        self.start_time = time.time()
+        self.now = 0.0
+        if self.owns_log:
+            # registros com o instante virtual
+            self.log.clock = lambda: self._ts(self.now)
+        self.log.start(self.start_time)
+        if self.instr is not None:
+            self.instr.start_profile()
+        self._start_exporter()
+
+        arrivals = iter(self.raw_tasks)
+        held = None   # chegada retida pelo controle de admissão (overflow="block")
+        if not self.realtime:
+            # chegada imediata: empilhar tudo na scheduler (retida = a fonte para até abrir espaço)
+            for t in arrivals:
+                t["arrival_time"] = self._ts(0.0)
+                if self._admit(t) == BLOCKED:
+                    held = t
+                    break
+        else:
+            # só a próxima chegada fica no heap; as demais são lidas sob demanda
+            first = next(arrivals, None)
+            if first is not None:
+                self._schedule(self._arrival_offset(first, 0.0), EV_ARRIVAL, first)
+
+        self.dispatch_if_possible()
+
+        while self.events:
+            self.now, etype, _, payload = heapq.heappop(self.events)
+
+            if etype == EV_ARRIVAL:
+                t = payload
+                t["arrival_time"] = self._ts(self.now)
+                if self._admit(t) == BLOCKED:
+                    # a próxima chegada só é lida quando a retida couber
+                    held = t
+                else:
+                    self._schedule_next_arrival(arrivals)
+
+            elif etype == EV_DONE:
+                sid, task, _ = payload
+                self.in_flight[sid] -= 1
+                self._update_load(sid)
+                self._record_completion(task, sid, task["start_time"], self._ts(self.now))
+                self.log.info("done", "Servidor {server} concluiu Requisição {task}", server=sid, task=task.get("id"))
+
+            elif etype == EV_PREEMPTED:
+                sid, task, remaining = payload
+                self.in_flight[sid] -= 1
+                self._update_load(sid)
+                task["remaining"] = remaining
+                task["preemptions"] = task.get("preemptions", 0) + 1
+                self.preemptions += 1
+                self.scheduler.push(task)
+
+            if len(self.scheduler) > 0:
+                self.dispatch_if_possible()
+            if self.admission is not None:
+                self._signal_pressure()
+            if held is not None and etype != EV_ARRIVAL and self._admit(held) != BLOCKED:
+                held = None
+                self._schedule_next_arrival(arrivals)
+                if len(self.scheduler) > 0:
+                    self.dispatch_if_possible()
+
+        self.end_time = self._ts(self.now)
+        self._stop_exporter()
+        if self.instr is not None:
+            self.instr.stop_profile("master")
+        self.completed_log.close()
+        if self.owns_log:
+            self.log.close()
@@ -0,0 +1,174 @@
+# statetable.py
+import os
+import threading
+import time
+import psutil
+from multiprocessing import shared_memory
+
+# Tabela de estado dos workers em memória compartilhada: uma linha por worker, escrita só pelo
+# próprio worker e lida diretamente pelo Master e pelo SystemMonitor, sem mensagens nem psutil.
+# Layout em colunas (todas as linhas de um campo contíguas), cada célula com 8 bytes alinhados:
+# a escrita de uma célula é um único store, então o leitor nunca vê um valor pela metade.
+# Contadores são monotônicos ou têm um único escritor por processo (lock local, nunca entre processos).
+
+INT_COLUMNS = ("pid", "capacity", "busy", "queued", "finished", "threads", "rss")
+FLOAT_COLUMNS = ("heartbeat", "cpu_time")
+COLUMNS = INT_COLUMNS + FLOAT_COLUMNS
+TABLE_ROWS = 1024        # workers simultâneos de um WorkerPool
+STATE_INTERVAL = 0.25    # segundos entre atualizações de heartbeat/CPU/RSS pela thread do worker
+
+
+class WorkerStateTable:
+    """
+    Tabela de 'rows' linhas sobre um bloco multiprocessing.shared_memory. Colunas:
+      pid, capacity          processo e slots atuais do worker
+      busy                   slots executando uma tarefa
+      queued                 tarefas recebidas e ainda não iniciadas (fila local)
+      finished               tarefas que saíram do worker (concluídas, preemptadas ou devolvidas),
+                             acumulado: o Master sabe quantas enviou, então enviadas - finished é a
+                             carga exata do worker, inclusive o que ainda está no canal
+      threads, rss           threads e memória residente (bytes) do processo worker
+      heartbeat              time.time() da última volta do laço de comandos do worker (sinal de
+                             vida: laço travado ou processo parado = heartbeat congelado)
+      cpu_time               CPU (s) acumulada pelo worker e pelos processos de slot (modo PROCESS)
+    Quem cria (create=True) é o dono e remove o bloco em close(); os workers herdam o objeto no fork.
+    """
+
+    def __init__(self, rows=TABLE_ROWS, name=None, create=True):
+        self.rows = rows
+        self.owner = create
+        self.shm = shared_memory.SharedMemory(name=name, create=create, size=len(COLUMNS) * rows * 8)
+        if create:
+            self.shm.buf[:] = bytes(self.shm.size)
+        self.cols = {}
+        for i, col in enumerate(COLUMNS):
+            view = self.shm.buf[i * rows * 8:(i + 1) * rows * 8]
+            self.cols[col] = view.cast("q" if col in INT_COLUMNS else "d")
+
+    @classmethod
+    def attach(cls, name, rows):
+        return cls(rows, name=name, create=False)
+
+    def __reduce__(self):
+        # processos criados por spawn reabrem o bloco pelo nome
+        return (WorkerStateTable.attach, (self.shm.name, self.rows))
+
+    def clear(self, row):
+        for view in self.cols.values():
+            view[row] = 0
+
+    def get(self, col, row):
+        return self.cols[col][row]
+
+    def column(self, col):
+        """Valores de uma coluna inteira (uma cópia feita em C, barata mesmo com muitas linhas)."""
+        return self.cols[col].tolist()
+
+    def snapshot(self, row):
+        return {col: view[row] for col, view in self.cols.items()}
+
+    def close(self):
+        # as views precisam ser liberadas antes de fechar o mapeamento
+        for view in self.cols.values():
+            view.release()
+        self.cols = {}
+        self.shm.close()
+        if self.owner:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+
+
+class WorkerState:
+    """
+    Lado do worker: atualiza a linha 'row' da tabela. Slots e o laço principal chamam os
+    métodos de contagem (lock local do processo); uma thread de fundo escreve CPU, threads e RSS
+    a cada 'interval' segundos. O heartbeat é escrito pelo próprio laço de comandos (alive), que
+    acorda pelo menos a cada 'interval' s: a thread de fundo continua viva com o laço travado
+    num deadlock e não pode servir de sinal de vida.
+    """
+
+    def __init__(self, table, row, capacity, interval=STATE_INTERVAL):
+        self.table = table
+        self.row = row
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.child_cpu = 0.0      # CPU dos processos de slot, devolvida por cada execução
+        self.stopping = threading.Event()
+        self.thread = None
+        cols = table.cols
+        self.busy_col = cols["busy"]
+        self.queued_col = cols["queued"]
+        self.finished_col = cols["finished"]
+        table.clear(row)
+        cols["pid"][row] = os.getpid()
+        cols["capacity"][row] = capacity
+
+    def start(self):
+        self.beat()
+        self.alive()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stopping.set()
+        if self.thread is not None:
+            self.thread.join(timeout=1.0)
+            self.thread = None
+
+    def _run(self):
+        while not self.stopping.wait(self.interval):
+            self.beat()
+
+    def beat(self):
+        cols = self.table.cols
+        row = self.row
+        cols["cpu_time"][row] = time.process_time() + self.child_cpu
+        cols["threads"][row] = threading.active_count()
+        cols["rss"][row] = _rss()
+
+    def alive(self):
+        """Sinal de vida do laço de comandos (chamado a cada volta dele)."""
+        self.table.cols["heartbeat"][self.row] = time.time()
+
+    # -------------------------
+    # contagens (chamadas pelo laço principal e pelos slots)
+    # -------------------------
+    def set_capacity(self, capacity):
+        self.table.cols["capacity"][self.row] = capacity
+
+    def received(self, n=1):
+        with self.lock:
+            self.queued_col[self.row] += n
+
+    def started(self):
+        row = self.row
+        with self.lock:
+            self.queued_col[row] -= 1
+            self.busy_col[row] += 1
+
+    def ended(self, cpu=0.0):
+        """Slot terminou uma execução (concluída ou preemptada); cpu = CPU gasta num processo de slot."""
+        row = self.row
+        with self.lock:
+            self.busy_col[row] -= 1
+            self.finished_col[row] += 1
+            self.child_cpu += cpu
+
+    def returned(self, n=1):
+        """Tarefas devolvidas da fila local sem executar (CMD_RECLAIM)."""
+        row = self.row
+        with self.lock:
+            self.queued_col[row] -= n
+            self.finished_col[row] += n
+
+
+def _rss():
+    # /proc/self/statm: páginas residentes no segundo campo (sem psutil no caminho periódico)
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return psutil.Process().memory_info().rss
@@ -0,0 +1,162 @@
+# sweep.py
+import contextlib
+import itertools
+import math
+import os
+import queue
+import statistics
+import traceback
+import multiprocessing as mp
+
+# t de Student bicaudal (95%) por graus de liberdade; acima de 30 usa a normal
+T_95 = [12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228,
+        2.201, 2.179, 2.160, 2.145, 2.131, 2.120, 2.110, 2.101, 2.093, 2.086,
+        2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045, 2.042]
+Z_95 = 1.96
+
+
+def build_grid(policies, seeds, input_files, arrival_means):
+    """Produto cartesiano política × seed × arquivo × arrival_mean (uma configuração por run)."""
+    return [
+        {"policy": p, "seed": s, "input_file": f, "arrival_mean": a}
+        for f, a, s, p in itertools.product(input_files, arrival_means, seeds, policies)
+    ]
+
+
+def cpu_sets(max_parallel, cores_per_run):
+    """
+    Divide os núcleos disponíveis em 'max_parallel' conjuntos disjuntos de até 'cores_per_run'
+    núcleos, um por run simultâneo. Retorna Nones onde não há afinidade de CPU (ex.: Windows/macOS).
+    """
+    if not hasattr(os, "sched_getaffinity"):
+        return [None] * max_parallel
+    cores = sorted(os.sched_getaffinity(0))
+    size = max(1, min(cores_per_run, len(cores) // max_parallel))
+    sets = []
+    for i in range(max_parallel):
+        chunk = cores[i * size:(i + 1) * size]
+        sets.append(set(chunk) if chunk else None)
+    return sets
+
+
+def default_parallelism(cores_per_run):
+    """Quantos runs cabem lado a lado sem disputar núcleos."""
+    if hasattr(os, "sched_getaffinity"):
+        cores = len(os.sched_getaffinity(0))
+    else:
+        cores = os.cpu_count() or 1
+    return max(1, cores // max(1, cores_per_run))
+
+
+def _sweep_child(fn, configs, cpus, jobs, results, quiet, teardown):
+    """
+    Processo persistente da varredura: executa as configurações que receber em 'jobs' até ler
+    None, mantendo o estado do processo entre elas (ex.: um WorkerPool reutilizado).
+    """
+    if cpus and hasattr(os, "sched_setaffinity"):
+        # herdado pelos processos worker que o run criar
+        os.sched_setaffinity(0, cpus)
+    try:
+        with open(os.devnull, "w") as devnull, \
+                (contextlib.redirect_stdout(devnull) if quiet else contextlib.nullcontext()):
+            while True:
+                index = jobs.get()
+                if index is None:
+                    break
+                try:
+                    results.put((index, True, fn(configs[index])))
+                except Exception:
+                    results.put((index, False, traceback.format_exc()))
+    finally:
+        if teardown is not None:
+            teardown()
+
+
+def run_sweep(configs, fn, on_result, max_parallel=None, cores_per_run=1, quiet=True, teardown=None):
+    """
+    Executa fn(config) para cada configuração em até 'max_parallel' processos persistentes, cada um
+    preso ao seu conjunto de núcleos e reaproveitado de um run para o outro. on_result(config, ok,
+    result) é chamado no processo pai assim que cada run termina (ok=False traz o traceback),
+    permitindo gravar resultados incrementalmente. teardown() roda em cada processo ao final
+    (ex.: fechar o WorkerPool). Um processo que morre é substituído e seu run é reportado como falha.
+    """
+    if max_parallel is None:
+        max_parallel = default_parallelism(cores_per_run)
+    max_parallel = max(1, min(max_parallel, len(configs)))
+    results = mp.Queue()
+    pending = list(range(len(configs)))
+    pending.reverse()
+    children = []   # [Process, fila de jobs, cpus, índice em execução ou None]
+
+    def start_child(cpus):
+        jobs = mp.Queue()
+        # não daemon: o run cria seus próprios processos worker
+        p = mp.Process(target=_sweep_child, args=(fn, configs, cpus, jobs, results, quiet, teardown))
+        p.start()
+        return [p, jobs, cpus, None]
+
+    def assign(child):
+        if pending:
+            child[3] = pending.pop()
+            child[1].put(child[3])
+
+    for cpus in cpu_sets(max_parallel, cores_per_run):
+        child = start_child(cpus)
+        children.append(child)
+        assign(child)
+
+    while any(c[3] is not None for c in children):
+        try:
+            index, ok, result = results.get(timeout=1.0)
+        except queue.Empty:
+            # run que morreu sem reportar (ex.: sinal) não pode travar a varredura
+            for i, child in enumerate(children):
+                p = child[0]
+                if child[3] is not None and not p.is_alive():
+                    p.join()
+                    on_result(configs[child[3]], False, f"processo terminou com código {p.exitcode}")
+                    children[i] = start_child(child[2])
+                    assign(children[i])
+            continue
+
+        child = next(c for c in children if c[3] == index)
+        child[3] = None
+        on_result(configs[index], ok, result)
+        assign(child)
+
+    for p, jobs, _, _ in children:
+        jobs.put(None)
+    for p, _, _, _ in children:
+        p.join()
+
+
+def confidence_interval(values):
+    """(média, meia-largura do IC de 95%) usando t de Student."""
+    n = len(values)
+    if n == 0:
+        return 0.0, 0.0
+    mean = statistics.fmean(values)
+    if n == 1:
+        return mean, 0.0
+    t = T_95[n - 2] if n - 1 <= len(T_95) else Z_95
+    return mean, t * statistics.stdev(values) / math.sqrt(n)
+
+
+def aggregate_ci(summaries, metrics, group_key="policy"):
+    """Uma linha por (grupo, métrica) com n, média e intervalo de confiança de 95%."""
+    groups = {}
+    for s in summaries:
+        groups.setdefault(s[group_key], []).append(s)
+    rows = []
+    for name, items in groups.items():
+        for metric in metrics:
+            mean, half = confidence_interval([s[metric] for s in items])
+            rows.append({
+                group_key: name,
+                "metric": metric,
+                "n": len(items),
+                "mean": mean,
+                "ci_low": mean - half,
+                "ci_high": mean + half,
+            })
+    return rows
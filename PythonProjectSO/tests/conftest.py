@@ -0,0 +1,6 @@
+# conftest.py
+import os
+import sys
+
+# os módulos do projeto ficam na pasta acima (scripts rodam de dentro dela)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
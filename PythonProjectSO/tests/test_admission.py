@@ -0,0 +1,162 @@
+# test_admission.py
+import threading
+import pytest
+from admission import AdmissionControl, ADMITTED, REJECTED, BLOCKED
+from master import Master
+from scheduler import Scheduler
+from workload import BackpressureSource
+
+
+def _task(tid, prioridade=1, tempo_exec=0.02, **extra):
+    return {"id": tid, "tipo": "nlp", "prioridade": prioridade, "tempo_exec": tempo_exec, **extra}
+
+
+def _admit(adm, s, task):
+    status = adm.admit(task, s)
+    if status == ADMITTED:
+        s.push(task)
+    return status
+
+
+def _requeue(s, task):
+    # como o Master faz com uma tarefa preemptada
+    task["start_time"] = 0.0
+    task["preemptions"] = task.get("preemptions", 0) + 1
+    s.push(task)
+
+
+def test_shed_drops_the_worst_new_arrival():
+    s = Scheduler("PRIORITY")
+    adm = AdmissionControl(max_backlog=2, shed=True)
+    assert _admit(adm, s, _task(0, prioridade=3)) == ADMITTED
+    assert _admit(adm, s, _task(1, prioridade=2)) == ADMITTED
+    assert _admit(adm, s, _task(2, prioridade=1)) == ADMITTED   # descarta uma P3
+    assert _admit(adm, s, _task(3, prioridade=3)) == REJECTED   # nada pior que P3 para descartar
+    kept = [t["id"] for t in iter(s.pop, None) if adm.on_pop(t, 0.0)]
+    assert kept == [2, 1]
+    assert adm.shed_count == adm.dropped == 1
+    assert adm.rejected["backlog"] == 1
+
+
+def test_shed_never_drops_a_started_task():
+    s = Scheduler("PRIORITY")
+    adm = AdmissionControl(max_backlog=2, shed=True)
+    a, b = _task("a", prioridade=2), _task("b", prioridade=2)
+    _admit(adm, s, a)
+    assert s.pop() is a and adm.on_pop(a, 0.0)
+    _requeue(s, a)
+    _admit(adm, s, b)   # a sai da fila antes de b
+    # a chegada P1 marca uma P2 para descarte: tem que ser b (nova), não a (já começou)
+    assert _admit(adm, s, _task("c", prioridade=1)) == ADMITTED
+    kept = [t["id"] for t in iter(s.pop, None) if adm.on_pop(t, 0.0)]
+    assert kept == ["c", "a"]
+    assert adm.shed_count == 1 and adm.pending_shed == 0
+
+
+def test_shed_rejects_when_only_started_tasks_are_worse():
+    s = Scheduler("PRIORITY")
+    adm = AdmissionControl(max_backlog=1, shed=True)
+    a = _task("a", prioridade=3)
+    _admit(adm, s, a)
+    adm.on_pop(s.pop(), 0.0)
+    _requeue(s, a)
+    assert _admit(adm, s, _task("b", prioridade=1)) == REJECTED
+    assert adm.on_pop(s.pop(), 0.0)
+    assert adm.dropped == 0
+
+
+def test_expired_deadline_only_drops_new_arrivals():
+    s = Scheduler("RR")
+    adm = AdmissionControl(drop_expired=True)
+    a = _task("a", deadline=1.0, arrival_time=0.0)
+    b = _task("b", deadline=1.0, arrival_time=0.0)
+    _admit(adm, s, a)
+    _admit(adm, s, b)
+    assert adm.on_pop(s.pop(), 0.5)
+    _requeue(s, a)
+    assert not adm.on_pop(s.pop(), 2.0)   # b venceu na fila
+    assert adm.on_pop(s.pop(), 2.0)       # a já executou uma fatia: vai até o fim
+    assert adm.expired == 1
+
+
+def test_block_holds_the_arrival_until_it_fits():
+    s = Scheduler("RR")
+    adm = AdmissionControl(max_backlog=1, overflow="block")
+    held = _task(1)
+    assert _admit(adm, s, _task(0)) == ADMITTED
+    assert _admit(adm, s, held) == BLOCKED
+    assert _admit(adm, s, held) == BLOCKED
+    assert adm.held is held and adm.blocked == 1
+    adm.on_pop(s.pop(), 0.0)
+    assert _admit(adm, s, held) == ADMITTED
+    assert adm.held is None and adm.blocked == 1 and adm.rejected["backlog"] == 0
+
+
+def test_backpressure_hysteresis_and_source():
+    s = Scheduler("RR")
+    adm = AdmissionControl(max_backlog=10)
+    changes = []
+    for i in range(9):
+        _admit(adm, s, _task(i))
+        if adm.update_pressure(s):
+            changes.append((len(s), adm.pressure))
+    while len(s) > 4:
+        adm.on_pop(s.pop(), 0.0)
+        if adm.update_pressure(s):
+            changes.append((len(s), adm.pressure))
+    assert changes == [(9, True), (5, False)]
+    assert adm.pressure_changes == 2
+
+    # com pressão, os intervalos entre chegadas ficam 'slowdown' vezes maiores
+    src = BackpressureSource([{"id": i, "arrival": float(i)} for i in range(4)], slowdown=3.0)
+    assert next(src)["arrival"] == 0.0
+    src.backpressure(True)
+    assert next(src)["arrival"] == 3.0
+    src.backpressure(False)
+    assert [t["arrival"] for t in src] == [4.0, 5.0]
+    assert src.signals == 2
+
+
+class _RecordingAdmission(AdmissionControl):
+    def __init__(self, **kw):
+        super().__init__(**kw)
+        self.drops = []   # (id, já tinha começado)
+
+    def on_pop(self, task, now):
+        started = "start_time" in task
+        ok = super().on_pop(task, now)
+        if not ok:
+            self.drops.append((task["id"], started))
+        return ok
+
+
+def _run(m, timeout):
+    done = threading.Event()
+
+    def target():
+        m.run()
+        done.set()
+
+    threading.Thread(target=target, daemon=True).start()
+    assert done.wait(timeout), "execução não terminou"
+
+
+@pytest.mark.parametrize("overflow", ["reject", "block"])
+def test_master_run_exits_once_every_admitted_task_is_accounted(overflow):
+    # tarefas P3 longas (preemptadas a cada quantum e devolvidas à fila) e P1 curtas chegando
+    # depois: o shed age com tarefas já começadas na fila. A execução tem que terminar (nada
+    # pendente esquecido) e só depois de todas as admitidas concluírem ou serem descartadas
+    tasks = [_task(i, prioridade=3, tempo_exec=0.06, arrival=0.0) for i in range(12)]
+    tasks += [_task(12 + i, prioridade=1, tempo_exec=0.01, arrival=0.03) for i in range(10)]
+    adm = _RecordingAdmission(max_backlog=6, shed=True, overflow=overflow)
+    m = Master([{"id": 1, "capacidade": 1}, {"id": 2, "capacidade": 1}], tasks, policy="PRIORITY",
+               realtime=True, use_monitor=False, verbose=False, quantum=0.02, admission=adm)
+    _run(m, 30)
+    ids = m.completed_log.values("task_id")
+    assert len(ids) == len(set(ids))
+    assert len(ids) + adm.dropped == adm.admitted
+    assert not any(started for _, started in adm.drops)
+    assert not set(ids) & {tid for tid, _ in adm.drops}
+    if overflow == "block":
+        assert adm.admitted == len(tasks) and adm.blocked > 0
+    assert adm.shed_count > 0
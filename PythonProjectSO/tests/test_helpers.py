@@ -0,0 +1,56 @@
+# test_helpers.py
+import json
+import pytest
+import helpers
+from helpers import load_input, load_input_stream
+
+EXAMPLE = {
+    "servidores": [{"id": 1, "capacidade": 3}, {"id": 2, "capacidade": 2}],
+    "requisicoes": [{"id": i, "tipo": "nlp", "prioridade": 1 + i % 3, "tempo_exec": 0.5 * i}
+                    for i in range(1, 200)],
+}
+
+
+def _write(tmp_path, data, name="input.json"):
+    path = tmp_path / name
+    path.write_text(json.dumps(data, indent=1), encoding="utf-8")
+    return str(path)
+
+
+def _streamed(path):
+    servers, tasks = load_input_stream(path)
+    return {"servidores": servers, "requisicoes": list(tasks)}
+
+
+@pytest.mark.parametrize("data", [
+    EXAMPLE,
+    # nome da chave como valor e antes das chaves de verdade
+    {"nome": "requisicoes", **EXAMPLE},
+    # requisições antes dos servidores, chave repetida dentro de objetos aninhados e números no topo
+    {"meta": {"requisicoes": [1, 2], "servidores": "x"}, "versao": 123456789,
+     "requisicoes": EXAMPLE["requisicoes"], "servidores": EXAMPLE["servidores"]},
+    # strings com colchetes, aspas e escapes
+    {"descricao": "lista \"requisicoes\": [ ] {", **EXAMPLE},
+])
+@pytest.mark.parametrize("chunk", [7, 64, 1 << 16])
+def test_stream_matches_load_input(tmp_path, monkeypatch, data, chunk):
+    # blocos pequenos cortam chaves, strings e números entre leituras
+    monkeypatch.setattr(helpers, "STREAM_CHUNK", chunk)
+    path = _write(tmp_path, data)
+    expected = load_input(path)
+    assert _streamed(path) == {"servidores": expected["servidores"], "requisicoes": expected["requisicoes"]}
+
+
+def test_stream_missing_key(tmp_path):
+    path = _write(tmp_path, {"servidores": [], "outras": [{"requisicoes": []}]})
+    servers, tasks = load_input_stream(path)
+    assert servers == []
+    with pytest.raises(ValueError):
+        list(tasks)
+
+
+def test_ndjson_matches_load_input(tmp_path):
+    path = tmp_path / "input.ndjson"
+    lines = [json.dumps({"servidores": EXAMPLE["servidores"]})] + [json.dumps(t) for t in EXAMPLE["requisicoes"]]
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    assert _streamed(str(path)) == load_input(str(path)) == EXAMPLE
@@ -0,0 +1,90 @@
+# test_metrics.py
+import math
+import random
+import statistics
+import pytest
+from metrics import EXACT_LIMIT, Histogram, P2Quantile, RingBuffer, RunningStats, StreamingSummary
+
+DISTRIBUTIONS = {
+    "uniform": lambda r: r.random(),
+    "exponential": lambda r: r.expovariate(1.0),
+    "lognormal": lambda r: r.lognormvariate(0.0, 1.0),   # cauda longa, como latências
+}
+
+
+@pytest.mark.parametrize("dist", sorted(DISTRIBUTIONS))
+@pytest.mark.parametrize("p", [0.50, 0.95, 0.99])
+def test_p2_tracks_exact_quantiles(dist, p):
+    rng = random.Random(7)
+    xs = [DISTRIBUTIONS[dist](rng) for _ in range(20_000)]
+    est = P2Quantile(p)
+    for x in xs:
+        est.add(x)
+    exact = statistics.quantiles(xs, n=100, method="inclusive")[round(p * 100) - 1]
+    assert est.value() == pytest.approx(exact, rel=0.03)
+    # em posto: a estimativa separa ~p das amostras
+    rank = sum(x <= est.value() for x in xs) / len(xs)
+    assert rank == pytest.approx(p, abs=0.005)
+
+
+def test_p2_is_exact_for_small_samples():
+    rng = random.Random(3)
+    xs = [rng.random() for _ in range(EXACT_LIMIT)]
+    for p in (0.5, 0.95, 0.99):
+        est = P2Quantile(p)
+        for x in xs:
+            est.add(x)
+        assert est.value() == sorted(xs)[math.ceil(p * len(xs)) - 1]   # nearest-rank
+    assert P2Quantile(0.5).value() == 0.0
+
+
+def test_ring_buffer_wraps_around():
+    buf = RingBuffer(5)
+    assert list(buf) == [] and len(buf) == 0
+    for i in range(3):
+        buf.append(float(i))
+    assert list(buf) == [0.0, 1.0, 2.0]
+    buf.append(3.0)
+    buf.append(4.0)
+    assert list(buf) == [0.0, 1.0, 2.0, 3.0, 4.0]
+    for i in range(5, 13):   # passa da capacidade mais de uma volta
+        buf.append(float(i))
+        assert len(buf) == 5
+        assert list(buf) == [float(x) for x in range(i - 4, i + 1)]
+    one = RingBuffer(0)   # capacidade mínima 1
+    one.append(1.0)
+    one.append(2.0)
+    assert list(one) == [2.0]
+    ints = RingBuffer(3, typecode="q")
+    for i in range(7):
+        ints.append(i)
+    assert list(ints) == [4, 5, 6]
+
+
+def test_running_stats_and_summary():
+    rng = random.Random(11)
+    xs = [rng.gauss(10.0, 2.0) for _ in range(5_000)]
+    stats = RunningStats()
+    summary = StreamingSummary()
+    for x in xs:
+        stats.add(x)
+        summary.add(x)
+    assert stats.mean == pytest.approx(statistics.fmean(xs))
+    assert stats.std == pytest.approx(statistics.stdev(xs))
+    out = summary.summary()
+    assert out["count"] == len(xs)
+    assert (out["min"], out["max"]) == (min(xs), max(xs))
+    exact = statistics.quantiles(xs, n=100, method="inclusive")
+    for p in (50, 95, 99):
+        assert out[f"p{p}"] == pytest.approx(exact[p - 1], rel=0.02)
+    assert StreamingSummary().summary() == {"count": 0, "mean": 0.0, "std": 0.0, "min": 0.0, "max": 0.0,
+                                            "p50": 0.0, "p95": 0.0, "p99": 0.0}
+
+
+def test_histogram_bounds_are_inclusive():
+    h = Histogram((0.1, 1.0))
+    for x in (0.05, 0.1, 0.5, 1.0, 2.0):
+        h.add(x)
+    cumulative, total = h.snapshot()
+    assert cumulative == [2, 4, 5]
+    assert total == pytest.approx(3.65)
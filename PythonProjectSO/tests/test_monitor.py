@@ -0,0 +1,54 @@
+# test_monitor.py
+import os
+import time
+import pytest
+from monitor import SystemMonitor
+from statetable import WorkerStateTable
+
+
+class _Proc:
+    # o monitor só usa pid e is_alive dos multiprocessing.Process
+    def __init__(self, pid):
+        self.pid = pid
+
+    def is_alive(self):
+        return True
+
+
+@pytest.fixture
+def table():
+    t = WorkerStateTable(rows=2)
+    yield t
+    t.close()
+
+
+def test_state_first_sample_and_respawn_keep_the_line(table):
+    cols = table.cols
+    cols["pid"][0], cols["capacity"][0], cols["threads"][0], cols["rss"][0] = 1000, 2, 3, 64 * 1024 * 1024
+    mon = SystemMonitor({1: _Proc(1000)}, state=table, rows={1: 0})
+
+    lines = mon.sample()                    # primeira leitura: linha sem CPU
+    assert len(lines) == 1 and "Worker 01" in lines[0] and "CPU:    -- " in lines[0]
+    assert "RAM:   64.0 MB" in lines[0] and "Slots: 0/2" in lines[0]
+    assert mon.cpu_stats[1].count == 0 and mon.mem_stats[1].count == 1
+
+    time.sleep(0.01)
+    cols["cpu_time"][0] = 0.001
+    lines = mon.sample()
+    assert "--" not in lines[0]
+    assert mon.cpu_stats[1].count == 1 and len(mon.cpu_history[1]) == 1
+
+    cols["pid"][0], cols["cpu_time"][0] = 2000, 0.0   # worker recriado: contador zerado
+    lines = mon.sample()
+    assert "CPU:    -- " in lines[0]
+    assert mon.cpu_stats[1].count == 1 and mon.mem_stats[1].count == 3
+    assert mon.cpu_stats[1].stats.min >= 0.0
+
+
+def test_psutil_first_sample_keeps_the_line():
+    mon = SystemMonitor({1: _Proc(os.getpid())})
+    lines = mon.sample()
+    assert len(lines) == 1 and "CPU:    -- " in lines[0]
+    assert mon.cpu_stats[1].count == 0 and mon.mem_stats[1].count == 1
+    lines = mon.sample()
+    assert "--" not in lines[0] and mon.cpu_stats[1].count == 1
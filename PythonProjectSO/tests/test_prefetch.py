@@ -0,0 +1,40 @@
+# test_prefetch.py
+import threading
+from collections import Counter
+import pytest
+from master import Master
+
+
+def _run(m, timeout):
+    done = threading.Event()
+
+    def target():
+        m.run()
+        done.set()
+
+    threading.Thread(target=target, daemon=True).start()
+    assert done.wait(timeout), "execução não terminou"
+
+
+@pytest.mark.parametrize("shared_state", [True, False])
+def test_reclaimed_tasks_finish_exactly_once(shared_state):
+    # workers desiguais com fila local (prefetch): o worker lento acumula tarefas que os rápidos,
+    # ao ficarem ociosos, recolhem (CMD_RECLAIM). Cada tarefa conclui uma vez e cada recolhida
+    # é despachada de novo exatamente uma vez
+    num_tasks = 60
+    tasks = [{"id": i, "tipo": "nlp", "prioridade": 1, "tempo_exec": 0.04 if i % 3 == 0 else 0.01}
+             for i in range(num_tasks)]
+    # o servidor 1 roda as tarefas 4x mais devagar
+    servers = [{"id": 1, "capacidade": 1, "speedup": {"nlp": 0.25}}, {"id": 2, "capacidade": 3},
+               {"id": 3, "capacidade": 2}]
+    m = Master(servers, tasks, realtime=False, use_monitor=False, verbose=False, prefetch=4,
+               shared_state=shared_state)
+    _run(m, 60)
+
+    ids = m.completed_log.values("task_id")
+    assert sorted(ids) == list(range(num_tasks))
+    assert m.reclaimed > 0
+    dispatches = Counter(task_id for _, task_id, _ in m.assigned_log)
+    assert sorted(dispatches) == list(range(num_tasks))
+    assert sum(dispatches.values()) == num_tasks + m.reclaimed
+    assert not any(m.assigned.values()) and not m.task_table
@@ -0,0 +1,110 @@
+# test_results.py
+import json
+from array import array
+import pytest
+from results import (ResultStore, read_results, COLUMNS, FILE_MAGIC_V1, FILE_MAGIC_V2, GROUP_HEADER,
+                     LABEL_BASE, MISSING_INT)
+
+
+def _write_old(path, magic, group_json, rows):
+    # arquivo no formato antigo: as mesmas colunas, sem runtime
+    names = [name for name in COLUMNS if name != "runtime"]
+    with open(path, "wb") as f:
+        f.write(magic)
+        new = json.dumps(group_json).encode("utf-8")
+        f.write(GROUP_HEADER.pack(len(rows), len(new)))
+        f.write(new)
+        for i, name in enumerate(names):
+            array(COLUMNS[name], [row[i] for row in rows]).tofile(f)
+
+
+def test_reads_sores2_without_runtime_column(tmp_path):
+    path = tmp_path / "old.bin"
+    # task_id, worker_id, arrival, dispatch, start, end, prioridade, tipo (código)
+    rows = [(1, 2, 0.0, 0.1, 0.5, 1.5, 1, 0), (2, 1, 0.2, 0.3, 0.4, 0.9, MISSING_INT, 1)]
+    _write_old(path, FILE_MAGIC_V2, {"tipos": ["nlp", "voz"], "labels": []}, rows)
+    store = read_results(path)
+    assert store.values("task_id") == [1, 2]
+    assert store.values("runtime") == pytest.approx([1.0, 0.5])
+    assert store.values("prioridade") == [1, None]
+    assert store.values("tipo") == ["nlp", "voz"]
+    assert store.count() == 2
+
+
+def test_runtime_round_trip(tmp_path):
+    path = tmp_path / "res.bin"
+    store = ResultStore(path=str(path), row_group=2)
+    store.append(1, 1, 0.0, 0.0, 1.0, 5.0, 1, "nlp", 0.5)   # preemptada: executou 0,5 s
+    store.append(2, 1, 0.0, 0.0, 1.0, 2.0, 1, "nlp")        # uma fatia: fim - início
+    store.append(3, 1, 0.0, 0.0, None, 2.0, 1, "nlp")       # sem início
+    store.close()
+    back = read_results(path)
+    assert back.values("runtime") == [0.5, 1.0, None]
+    assert back.values("wait") == [1.0, 1.0, None]
+
+
+def _fill(store, rows):
+    for task_id, worker_id, prioridade, tipo in rows:
+        store.append(task_id, worker_id, 0.0, 0.1, 0.2, 1.0, prioridade, tipo)
+
+
+ROWS = [
+    (1, 1, 1, "nlp"),
+    ("t2", "gpu-a", 2, "voz"),
+    (2 ** 70, 1, 1.5, "nlp"),          # além da coluna int64: vira rótulo
+    (LABEL_BASE - 5, 2 ** 40, "alta", "visao"),
+    (3, "gpu-a", None, "nlp"),
+    ("t2", 1, True, "voz"),            # True não se confunde com 1
+    (-7, 1, 1.0, "nlp"),               # 1.0 também não
+]
+
+
+@pytest.mark.parametrize("row_group", [1, 3, 100])
+@pytest.mark.parametrize("keep", [True, False])
+def test_round_trip_mixed_ids_and_priorities(tmp_path, row_group, keep):
+    # rótulos novos aparecem em grupos diferentes; keep=False descarta as colunas a cada grupo
+    path = tmp_path / "res.bin"
+    store = ResultStore(path=str(path), keep=keep, row_group=row_group)
+    _fill(store, ROWS)
+    store.close()
+    back = read_results(path)
+    assert back.count() == len(ROWS)
+    for i, field in enumerate(("task_id", "worker_id", "prioridade", "tipo")):
+        values = back.values(field)
+        assert values == [row[i] for row in ROWS]
+        assert [type(v) for v in values] == [type(row[i]) for row in ROWS]
+    if keep:
+        assert [rec.to_dict() for rec in back] == [rec.to_dict() for rec in store]
+
+
+def test_summary_by_labeled_priority():
+    store = ResultStore()
+    _fill(store, ROWS)
+    names = store.names("prioridade")
+    assert names == [1, 1.0, 1.5, 2, None, True, "alta"]
+    assert [type(v) for v in names] == [int, float, float, int, type(None), bool, str]
+    assert store.summary("prioridade", "alta")["response"]["count"] == 1
+    assert store.summary("prioridade", 1)["response"]["count"] == 1
+    assert store.summary("prioridade", "ausente") == {}
+    assert store.summary("worker", "gpu-a")["response"]["count"] == 2
+
+
+def test_reads_sores1(tmp_path):
+    # SORES1: só inteiros nas colunas "q" e o JSON do grupo é a lista de tipos
+    path = tmp_path / "v1.bin"
+    rows = [(10, 1, 0.0, 0.0, 0.25, 0.75, 2, 0), (11, 2, 0.5, 0.5, 1.0, 3.0, MISSING_INT, 0)]
+    _write_old(path, FILE_MAGIC_V1, ["nlp"], rows)
+    store = read_results(path)
+    assert store.values("task_id") == [10, 11]
+    assert store.values("worker_id") == [1, 2]
+    assert store.values("prioridade") == [2, None]
+    assert store.values("tipo") == ["nlp", "nlp"]
+    assert store.values("runtime") == [0.5, 2.0]
+    assert store.values("response") == [0.75, 2.5]
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "x.bin"
+    path.write_bytes(b"not a results file")
+    with pytest.raises(ValueError):
+        read_results(path)
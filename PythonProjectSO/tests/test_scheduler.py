@@ -0,0 +1,86 @@
+# test_scheduler.py
+import pytest
+from scheduler import Scheduler
+
+
+def _task(tid, tempo_exec=1.0, prioridade=1, tipo="nlp", arrival_time=0.0, **extra):
+    return {"id": tid, "tipo": tipo, "prioridade": prioridade, "tempo_exec": tempo_exec,
+            "arrival_time": arrival_time, **extra}
+
+
+def _drain(s):
+    order = []
+    while not s.is_empty():
+        order.append(s.pop()["id"])
+    return order
+
+
+def test_srpt_orders_by_remaining_time():
+    s = Scheduler("SRPT")
+    s.push(_task(0, tempo_exec=3.0))
+    s.push(_task(1, tempo_exec=5.0, remaining=0.5))   # preemptada: só falta 0,5 s
+    s.push(_task(2, tempo_exec=1.0))
+    s.push(_task(3, tempo_exec=1.0))                  # empate: ordem de chegada
+    assert _drain(s) == [1, 2, 3, 0]
+
+
+def test_edf_orders_by_absolute_deadline():
+    s = Scheduler("EDF")
+    s.push(_task(0, arrival_time=0.0, deadline=10.0))   # prazo em 10
+    s.push(_task(1, arrival_time=0.0))                  # sem prazo: fim da fila
+    s.push(_task(2, arrival_time=4.0, deadline=2.0))    # prazo em 6
+    s.push(_task(3, arrival_time=1.0, deadline=8.0))    # prazo em 9
+    s.push(_task(4, arrival_time=2.0))
+    assert _drain(s) == [2, 3, 0, 1, 4]
+
+
+def test_wfq_shares_by_weight():
+    # peso 2 para "a": duas tarefas de "a" para cada uma de "b"
+    s = Scheduler("WFQ", weights={"a": 2.0})
+    for i in range(3):
+        s.push(_task("a%d" % i, tipo="a"))
+        s.push(_task("b%d" % i, tipo="b"))
+    assert _drain(s) == ["a0", "b0", "a1", "a2", "b1", "b2"]
+
+
+def test_wfq_charges_remaining_time():
+    # uma tarefa preemptada volta com a tag do que falta, não do tempo_exec inteiro
+    s = Scheduler("WFQ")
+    s.push(_task(0, tipo="a", tempo_exec=10.0, remaining=0.5))
+    s.push(_task(1, tipo="b", tempo_exec=1.0))
+    assert _drain(s) == [0, 1]
+
+
+def test_mlfq_serves_lower_levels_first():
+    s = Scheduler("MLFQ", levels=3)
+    s.push(_task(0, preemptions=1))
+    s.push(_task(1, preemptions=5))   # além do último nível: fica no último
+    s.push(_task(2))
+    s.push(_task(3, preemptions=2))
+    s.push(_task(4))
+    assert len(s) == 5
+    assert _drain(s) == [2, 4, 0, 1, 3]
+
+
+def test_aging_promotes_waiting_tasks():
+    # com aging_interval=5, 5 s de espera valem um nível: prioridade 2 que chegou em 0 passa
+    # na frente de prioridade 1 que chegou em 10
+    s = Scheduler("AGING", aging_interval=5.0)
+    s.push(_task(0, prioridade=1, arrival_time=10.0))
+    s.push(_task(1, prioridade=2, arrival_time=0.0))
+    s.push(_task(2, prioridade=1, arrival_time=6.0))
+    s.push(_task(3, prioridade=3, arrival_time=12.0))
+    assert _drain(s) == [1, 2, 0, 3]
+
+
+@pytest.mark.parametrize("policy", ["SRPT", "EDF", "WFQ", "MLFQ", "AGING"])
+def test_counts_follow_pushes_and_pops(policy):
+    s = Scheduler(policy)
+    for i in range(4):
+        s.push(_task(i, prioridade=i % 2))
+    assert s.counts == {0: 2, 1: 2}
+    s.pop()
+    assert sum(s.counts.values()) == 3
+    _drain(s)
+    assert s.counts == {0: 0, 1: 0}
+    assert s.pop() is None
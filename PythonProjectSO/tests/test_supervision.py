@@ -0,0 +1,115 @@
+# test_supervision.py
+import multiprocessing as mp
+import os
+import signal
+import threading
+import time
+import pytest
+import worker
+from master import Master
+from protocol import CMD_RUN
+
+HANG_TEMPO = 0.0123   # tempo_exec que trava o laço de comandos do worker que a receber
+
+
+def _run(m, timeout):
+    # o Master roda numa thread: um worker travado e não detectado deixaria o teste pendurado
+    done = threading.Event()
+
+    def target():
+        m.run()
+        done.set()
+
+    threading.Thread(target=target, daemon=True).start()
+    assert done.wait(timeout), "execução não terminou"
+
+
+def _assert_each_once(m, num_tasks):
+    ids = m.completed_log.values("task_id")
+    assert sorted(ids) == list(range(num_tasks))
+
+
+@pytest.mark.parametrize("shared_state", [True, False])
+def test_killed_and_stopped_workers_recover(shared_state):
+    # worker 1 morto (SIGKILL) e worker 2 congelado (SIGSTOP) no meio da execução; com a tabela o
+    # travamento aparece pelo heartbeat dela, sem ela pelos pings sem resposta
+    num_tasks = 120
+    tasks = [{"id": i, "tipo": "nlp", "prioridade": 1, "tempo_exec": 0.05} for i in range(num_tasks)]
+    m = Master([{"id": 1, "capacidade": 2}, {"id": 2, "capacidade": 2}, {"id": 3, "capacidade": 2}], tasks,
+               realtime=False, use_monitor=False, verbose=False, shared_state=shared_state,
+               heartbeat_interval=0.2, heartbeat_timeout=1.0)
+    timers = [threading.Timer(0.5, lambda: os.kill(m.worker_procs[1].pid, signal.SIGKILL)),
+              threading.Timer(1.0, lambda: os.kill(m.worker_procs[2].pid, signal.SIGSTOP))]
+    for t in timers:
+        t.start()
+    try:
+        _run(m, 60)
+    finally:
+        for t in timers:
+            t.cancel()
+    assert sorted((f["worker"], f["reason"]) for f in m.failures) == [(1, "crash"), (2, "hung")]
+    assert all(f["respawned"] for f in m.failures)
+    assert sum(f["requeued"] for f in m.failures) > 0
+    _assert_each_once(m, num_tasks)
+
+
+def test_deadlocked_command_loop_is_detected(monkeypatch):
+    # a tarefa marcada trava o laço de comandos (uma vez só); a thread de fundo da tabela de
+    # estado continua viva, então só o heartbeat escrito pelo laço revela o travamento
+    fired = mp.Event()
+    unpack = worker.unpack_commands
+
+    def hanging_unpack(buf):
+        msgs = unpack(buf)
+        if not fired.is_set() and any(m.cmd == CMD_RUN and m.tempo_exec == HANG_TEMPO for m in msgs):
+            fired.set()
+            while True:
+                time.sleep(60)
+        return msgs
+
+    monkeypatch.setattr(worker, "unpack_commands", hanging_unpack)
+    num_tasks = 40
+    tasks = [{"id": i, "tipo": "nlp", "prioridade": 1, "tempo_exec": HANG_TEMPO if i == 5 else 0.01}
+             for i in range(num_tasks)]
+    m = Master([{"id": 1, "capacidade": 2}, {"id": 2, "capacidade": 2}], tasks, realtime=False,
+               use_monitor=False, verbose=False, heartbeat_interval=0.2, heartbeat_timeout=1.0)
+    _run(m, 30)
+    assert fired.is_set()
+    assert [f["reason"] for f in m.failures] == ["hung"]
+    _assert_each_once(m, num_tasks)
+
+
+def test_server_ids_outside_int32():
+    # os ids dos servidores não passam pelo pipe (só o índice do worker): texto e inteiros além
+    # de int32 aparecem intactos nos resultados
+    num_tasks = 30
+    tasks = [{"id": i, "tipo": "nlp", "prioridade": 1, "tempo_exec": 0.01} for i in range(num_tasks)]
+    servers = [{"id": "gpu-a", "capacidade": 2}, {"id": 2 ** 40, "capacidade": 2}]
+    m = Master(servers, tasks, realtime=False, use_monitor=False, verbose=False)
+    _run(m, 30)
+    assert not m.failures
+    _assert_each_once(m, num_tasks)
+    assert set(m.completed_log.values("worker_id")) <= {"gpu-a", 2 ** 40}
+
+
+def test_slot_exception_fails_the_worker(monkeypatch):
+    # uma exceção num slot encerra o worker: a supervisão vê um crash e a tarefa volta à fila
+    fired = mp.Event()
+    work = worker.simulate_cpu_work
+
+    def failing_work(run, *args):
+        if not fired.is_set() and run == HANG_TEMPO:
+            fired.set()
+            raise RuntimeError("falha no slot")
+        return work(run, *args)
+
+    monkeypatch.setattr(worker, "simulate_cpu_work", failing_work)
+    num_tasks = 40
+    tasks = [{"id": i, "tipo": "nlp", "prioridade": 1, "tempo_exec": HANG_TEMPO if i == 5 else 0.01}
+             for i in range(num_tasks)]
+    m = Master([{"id": 1, "capacidade": 2}, {"id": 2, "capacidade": 2}], tasks, realtime=False,
+               use_monitor=False, verbose=False, heartbeat_interval=0.2, heartbeat_timeout=1.0)
+    _run(m, 30)
+    assert fired.is_set()
+    assert [f["reason"] for f in m.failures] == ["crash"]
+    _assert_each_once(m, num_tasks)
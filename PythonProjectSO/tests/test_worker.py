@@ -0,0 +1,57 @@
+# test_worker.py
+import threading
+import time
+import pytest
+import worker
+from master import Master
+from worker import (KERNELS, KERNEL_PYTHON, UNIT_OPS, WORK_FIXED, WORK_MODES, WORK_TIME, configure_code,
+                    simulate_cpu_work)
+
+
+def test_configure_code_round_trip():
+    for kernel in KERNELS:
+        for work in WORK_MODES:
+            code = configure_code(kernel, work)
+            assert (KERNELS[code % len(KERNELS)], WORK_MODES[code // len(KERNELS)]) == (kernel, work)
+
+
+def test_fixed_work_runs_a_fixed_number_of_iterations(monkeypatch):
+    calls = []
+    monkeypatch.setitem(worker._rates, KERNEL_PYTHON, 100_000.0)
+    monkeypatch.setitem(worker._KERNELS, KERNEL_PYTHON, calls.append)
+    for _ in range(3):
+        del calls[:]
+        units = simulate_cpu_work(0.0123, 2.0, 3, KERNEL_PYTHON, WORK_FIXED)
+        assert sum(calls) == 1230
+        assert max(calls) <= 100   # blocos de CHUNK_SECONDS
+        assert units == pytest.approx(0.0123 * 2.0 * 3 * UNIT_OPS)
+
+
+def _elapsed_with_contention(work, seconds, threads=2):
+    # slots THREAD com o kernel python disputam o GIL
+    start = time.perf_counter()
+    ts = [threading.Thread(target=simulate_cpu_work, args=(seconds, 1, 1, KERNEL_PYTHON, work))
+          for _ in range(threads)]
+    for t in ts:
+        t.start()
+    for t in ts:
+        t.join()
+    return time.perf_counter() - start
+
+
+def test_fixed_work_stretches_under_contention():
+    worker.calibrate(KERNEL_PYTHON)
+    assert _elapsed_with_contention(WORK_TIME, 0.2) < 0.3
+    assert _elapsed_with_contention(WORK_FIXED, 0.2) > 0.3
+
+
+def test_master_with_fixed_work():
+    tasks = [{"id": i, "tipo": "nlp", "prioridade": 1, "tempo_exec": 0.01} for i in range(20)]
+    m = Master([{"id": 1, "capacidade": 2}, {"id": 2, "capacidade": 1}], tasks, realtime=False,
+               use_monitor=False, verbose=False, cpu_work=WORK_FIXED, quantum=0.005)
+    done = threading.Event()
+    threading.Thread(target=lambda: (m.run(), done.set()), daemon=True).start()
+    assert done.wait(30), "execução não terminou"
+    assert sorted(m.completed_log.values("task_id")) == list(range(20))
+    with pytest.raises(ValueError):
+        Master([{"id": 1, "capacidade": 1}], [], cpu_work="exact")
@@ -1,59 +1,242 @@
 # worker.py
+import os
+import sys
 import time
+import traceback
+import hashlib
 import threading
 import queue
+import multiprocessing as mp
+from instrument import SamplingProfiler, worker_profile_path
+from statetable import WorkerState
+from protocol import (CMD_RUN, CMD_PING, CMD_STOP, CMD_RECLAIM, CMD_CONFIGURE, CMD_PROFILE, EV_STARTED,
+                      EV_DONE, EV_PONG, EV_EXITING, EV_PREEMPTED, EV_RECLAIMED, EV_PROFILED,
+                      BatchingEventSender, unpack_commands, pack_event)
 
-def _worker_thread_loop(worker_id, internal_q, out_queue, capacity):
+# modos de execução dos slots de um worker
+EXEC_THREAD = "THREAD"    # threads executam o trabalho (limitadas pelo GIL: ~1 núcleo por worker)
+EXEC_PROCESS = "PROCESS"  # threads só coordenam; o trabalho roda num pool de 'capacity' processos
+
+# kernels de trabalho CPU-bound de simulate_cpu_work
+KERNEL_PYTHON = "python"  # laço Python: segura o GIL (no modo THREAD os slots se revezam num núcleo)
+KERNEL_HASH = "hash"      # sha256 sobre blocos de 64 KB: libera o GIL (slots THREAD rodam em paralelo)
+KERNELS = (KERNEL_PYTHON, KERNEL_HASH)   # o índice é o código enviado no CMD_CONFIGURE
+
+# modos de simulate_cpu_work: o que fica fixo em cada tarefa
+WORK_TIME = "time"        # o tempo de serviço: o kernel roda até o prazo de relógio (tempo_exec)
+WORK_FIXED = "fixed"      # o trabalho: tempo_exec * taxa calibrada iterações; com disputa, demora mais
+WORK_MODES = (WORK_TIME, WORK_FIXED)
+
+UNIT_OPS = 50_000             # escala das unidades relatadas: por segundo de CPU exclusiva, peso 1, capacidade 1
+CHUNK_SECONDS = 0.001         # duração de cada bloco do kernel: o relógio só é lido entre blocos
+CALIBRATION_SECONDS = 0.05    # duração aproximada da calibração de cada kernel
+_HASH_BLOCK = bytes(64 * 1024)
+_rates = {}                   # kernel -> iterações/s medidas neste host (ver calibrate)
+
+def _worker_thread_loop(worker_id, internal_q, sender, settings, pool=None, state=None):
+    """
+    settings: {"capacity", "quantum", "kernel"} do worker, lidos a cada tarefa (CMD_CONFIGURE pode mudá-los)
+    state: statetable.WorkerState do worker (None = sem tabela compartilhada); atualizado antes de
+    cada evento, então o Master nunca recebe um evento que a tabela ainda não reflete
+    """
+    try:
+        _slot_loop(worker_id, internal_q, sender, settings, pool, state)
+    except Exception:
+        # um slot morto deixaria sua tarefa sem evento enquanto o laço de comandos segue vivo (e
+        # batendo o heartbeat): o worker inteiro termina e a supervisão do Master o trata como
+        # crash, devolvendo as tarefas à fila
+        traceback.print_exc(file=sys.stderr)
+        sys.stderr.flush()
+        os._exit(1)
+
+
+def _slot_loop(worker_id, internal_q, sender, settings, pool, state):
+    preempted_at = None   # fim da última fatia preemptada neste slot
     while True:
         task = internal_q.get()
         if task is None:
             break
+        if state is not None:
+            state.started()
 
         t_start = time.time()
-        out_queue.put({"type": "started", "task": task, "worker": worker_id, "time": t_start})
+        # custo da troca de contexto: tempo que o slot ficou parado entre a preempção e a próxima tarefa
+        switch = t_start - preempted_at if preempted_at is not None else 0.0
+        preempted_at = None
+        sender.send(pack_event(EV_STARTED, worker_id, task.task_id, t_start, switch))
+
+        # com quantum, executa no máximo uma fatia e devolve o restante ao Master
+        run = task.tempo_exec
+        quantum = settings["quantum"]
+        if quantum and run > quantum:
+            run = quantum
 
         # simulação CPU-bound proporcional
-        simulate_cpu_work(
-            seconds=task["tempo_exec"],
-            peso_cpu=task.get("peso_cpu", 1),
-            capacity=capacity
-        )
+        work_args = (run, task.peso_cpu, settings["capacity"], settings["kernel"], settings["work"])
+        cpu = 0.0
+        if pool is not None:
+            cpu = pool.apply(_slot_process_work, work_args)
+        else:
+            simulate_cpu_work(*work_args)
 
         t_end = time.time()
-        out_queue.put({"type": "done", "task": task, "worker": worker_id, "time": t_end})
+        if state is not None:
+            state.ended(cpu)
+        if run < task.tempo_exec:
+            sender.send(pack_event(EV_PREEMPTED, worker_id, task.task_id, t_end, task.tempo_exec - run))
+            preempted_at = t_end
+        else:
+            sender.send(pack_event(EV_DONE, worker_id, task.task_id, t_end))
         internal_q.task_done()
 
 
-def worker_process(worker_id, capacity, in_queue, out_queue):
+def _slot_process_work(*work_args):
+    # modo PROCESS: roda no processo de slot e devolve a CPU gasta, somada à do worker na tabela
+    cpu0 = time.process_time()
+    simulate_cpu_work(*work_args)
+    return time.process_time() - cpu0
+
+
+def _reclaim(worker_id, internal_q, sender, count, state=None):
+    """
+    Devolve ao Master até 'count' tarefas que ainda estão na fila local. Cada tarefa sai da fila
+    uma única vez (get atômico): ou uma thread a inicia (EV_STARTED), ou ela volta (EV_RECLAIMED).
+    """
+    taken = 0
+    while taken < count:
+        try:
+            task = internal_q.get_nowait()
+        except queue.Empty:
+            break
+        if task is None:
+            # sinal de encerramento de um slot (redução de capacidade): devolve à fila
+            internal_q.put(None)
+            break
+        internal_q.task_done()
+        if state is not None:
+            state.returned()
+        sender.send(pack_event(EV_RECLAIMED, worker_id, task.task_id, time.time()))
+        taken += 1
+    sender.send(pack_event(EV_RECLAIMED, worker_id, 0, time.time(), taken))
+
+
+def worker_process(worker_id, capacity, in_channel, out_channel, exec_mode=EXEC_THREAD,
+                   batch_size=1, flush_interval=0.002, quantum=None, kernel=KERNEL_PYTHON, rates=None,
+                   state_table=None, state_row=None, cpus=None, work=WORK_TIME):
     """
     Processo worker: cria 'capacity' threads e mantém uma fila interna.
-    - in_queue: multiprocessing.Queue onde Master envia comandos {"cmd":"run", "task":...} ou None para terminar
-    - out_queue: multiprocessing.Queue usado para enviar eventos ao Master
+    - in_channel: protocol.CommandChannel onde o Master envia comandos (CMD_RUN, CMD_PING, CMD_STOP,
+      CMD_RECLAIM)
+    - out_channel: protocol.EventChannel usado para enviar eventos ao Master
+    - exec_mode: EXEC_THREAD ou EXEC_PROCESS (cada slot executa em um processo próprio, em paralelo real)
+    - batch_size / flush_interval: eventos são enviados em lotes de até batch_size ou a cada
+      flush_interval segundos (batch_size=1 envia cada evento na hora)
+    - quantum: fatia máxima (s) por execução; a tarefa que não termina nela volta ao Master
+      com o tempo restante (EV_PREEMPTED). None = executa até o fim
+    - kernel / rates: kernel de simulate_cpu_work e taxas já calibradas pelo processo pai (ver
+      calibrate); sem elas o worker calibra ao iniciar, antes de criar as threads
+    - work: WORK_TIME (tempo de serviço fixo) ou WORK_FIXED (trabalho fixo), ver simulate_cpu_work
+    - state_table / state_row: statetable.WorkerStateTable e a linha deste worker, onde ele mantém
+      slots ocupados, fila local, tarefas concluídas, heartbeat e CPU (lidos direto pelo Master)
+    - cpus: CPUs a que o processo fica preso (os.sched_setaffinity), antes de criar threads e
+      processos de slot, que herdam a máscara. None = sem afinidade (ou sistema sem suporte)
+    O processo pode ser reutilizado por vários Masters (pool.WorkerPool): CMD_CONFIGURE troca o
+    quantum, o kernel, o modo de trabalho e, no modo THREAD, a capacidade (slots são criados ou
+    encerrados).
+    CMD_PROFILE liga/desliga um profiler por amostragem das threads deste processo (no modo
+    PROCESS o trabalho em si roda nos filhos do pool e aparece só como espera em pool.apply).
     """
+    if cpus and hasattr(os, "sched_setaffinity"):
+        try:
+            os.sched_setaffinity(0, cpus)
+        except OSError:
+            pass
     internal_q = queue.Queue()
+    if rates:
+        _rates.update(rates)
+    calibrate(kernel)
+    # o Pool cria seus processos já no construtor, antes das threads abaixo existirem
+    # (fork com outras threads ativas pode herdar locks presos e travar o filho)
+    pool = mp.Pool(processes=max(1, capacity)) if exec_mode == EXEC_PROCESS else None
+    sender = BatchingEventSender(out_channel, batch_size, flush_interval)
+    settings = {"capacity": capacity, "quantum": quantum, "kernel": kernel, "work": work}
     threads = []
-    for _ in range(max(1, capacity)):
-        t = threading.Thread(target=_worker_thread_loop,
-                             args=(worker_id, internal_q, out_queue, capacity),
-                             daemon=True)
-        t.start()
-        threads.append(t)
+    profiler = None
+    state = None
+    if state_table is not None:
+        state = WorkerState(state_table, state_row, max(1, capacity)).start()
+
+    def add_slots(n):
+        for _ in range(n):
+            t = threading.Thread(target=_worker_thread_loop,
+                                 args=(worker_id, internal_q, sender, settings, pool, state),
+                                 daemon=True)
+            t.start()
+            threads.append(t)
+
+    add_slots(max(1, capacity))
 
     # Loop principal do processo: recebe mensagens vindas do Master
     try:
-        while True:
-            msg = in_queue.get()
-            # None -> sinal de shutdown
-            if msg is None:
-                break
-            if msg.get("cmd") == "run":
-                task = msg["task"]
-                # Coloca a tarefa na fila interna (as threads vão pegar quando disponíveis)
-                internal_q.put(task)
-            else:
-                # Mensagem desconhecida — ignorar
-                pass
-    except KeyboardInterrupt:
+        stopping = False
+        # com a tabela de estado, o laço acorda a cada state.interval para escrever o heartbeat
+        timeout = state.interval if state is not None else None
+        while not stopping:
+            # um recv pode trazer um lote de comandos
+            buf = in_channel.recv(timeout)
+            if state is not None:
+                state.alive()
+            if buf is None:
+                continue
+            for msg in unpack_commands(buf):
+                # CMD_STOP -> sinal de shutdown
+                if msg.cmd == CMD_STOP:
+                    stopping = True
+                    break
+                if msg.cmd == CMD_RUN:
+                    # Coloca a tarefa na fila interna (as threads vão pegar quando disponíveis)
+                    if state is not None:
+                        state.received()
+                    internal_q.put(msg)
+                elif msg.cmd == CMD_PING:
+                    sender.send(pack_event(EV_PONG, worker_id, 0, time.time()))
+                elif msg.cmd == CMD_RECLAIM:
+                    _reclaim(worker_id, internal_q, sender, msg.task_id, state)
+                elif msg.cmd == CMD_CONFIGURE:
+                    settings["quantum"] = msg.tempo_exec or None
+                    code = int(msg.peso_cpu)   # ver configure_code
+                    settings["kernel"] = KERNELS[code % len(KERNELS)]
+                    settings["work"] = WORK_MODES[code // len(KERNELS)]
+                    calibrate(settings["kernel"])
+                    new_capacity = max(1, msg.task_id)
+                    if pool is None:
+                        # slots a mais são criados; a menos recebem o sinal de encerramento
+                        diff = new_capacity - settings["capacity"]
+                        if diff > 0:
+                            add_slots(diff)
+                        for _ in range(-diff):
+                            internal_q.put(None)
+                        settings["capacity"] = new_capacity
+                        if state is not None:
+                            state.set_capacity(new_capacity)
+                elif msg.cmd == CMD_PROFILE:
+                    if msg.task_id:
+                        if profiler is None:
+                            profiler = SamplingProfiler().start()
+                    else:
+                        # sempre responde, mesmo sem profiler ativo: o Master espera o EV_PROFILED
+                        samples = 0
+                        if profiler is not None:
+                            profiler.stop()
+                            profiler.dump(worker_profile_path(os.getpid()))
+                            samples = profiler.samples
+                            profiler = None
+                        sender.send(pack_event(EV_PROFILED, worker_id, 0, time.time(), samples))
+                else:
+                    # Mensagem desconhecida — ignorar
+                    pass
+    except (KeyboardInterrupt, EOFError):
+        # EOFError: o Master fechou o canal (terminou ou morreu)
         pass
     finally:
         # sinaliza shutdown para threads internas
@@ -62,21 +245,101 @@ def worker_process(worker_id, capacity, in_queue, out_queue):
         # espera threads terminarem
         for t in threads:
             t.join(timeout=2.0)
-        out_queue.put({"type": "exiting", "worker": worker_id, "time": time.time()})
+        if pool is not None:
+            pool.terminate()
+        if profiler is not None:
+            profiler.stop()
+        if state is not None:
+            state.stop()
+        sender.send(pack_event(EV_EXITING, worker_id, 0, time.time()))
+        sender.close()
 
-def simulate_cpu_work(seconds, peso_cpu, capacity):
-        """
-        Simula trabalho CPU-bound proporcional à capacidade do servidor e ao peso da tarefa.
-        Quanto maior a capacidade do worker, mais processamento cabe no mesmo tempo.
-        """
-        end = time.time() + seconds
+def _kernel_python(n):
+    x = 0
+    # loop CPU-bound
+    for i in range(n):
+        x += i * i
+    return x
 
-        # Escala o número de operações pelo peso da tarefa e pela capacidade do worker
-        ops = int(50_000 * peso_cpu * capacity)
+def _kernel_hash(n):
+    h = hashlib.sha256()
+    for _ in range(n):
+        h.update(_HASH_BLOCK)
+    return h.digest()
 
-        while time.time() < end:
-            x = 0
-            # loop CPU-bound
-            for i in range(ops):
-                x += i * i
+_KERNELS = {KERNEL_PYTHON: _kernel_python, KERNEL_HASH: _kernel_hash}
 
+def calibrate(kernel=KERNEL_PYTHON, seconds=CALIBRATION_SECONDS):
+    """
+    Iterações por segundo do kernel neste host, medidas uma vez por processo (melhor de 5 rodadas,
+    para descartar interrupções). Processos criados por fork herdam o valor já medido pelo pai.
+    """
+    rate = _rates.get(kernel)
+    if rate is not None:
+        return rate
+    fn = _KERNELS[kernel]
+    n = 1
+    # aumenta o bloco até uma rodada durar seconds / 5 (bem acima da resolução do relógio)
+    while True:
+        t0 = time.perf_counter()
+        fn(n)
+        best = time.perf_counter() - t0
+        if best >= seconds / 5:
+            break
+        n *= 2
+    for _ in range(4):
+        t0 = time.perf_counter()
+        fn(n)
+        best = min(best, time.perf_counter() - t0)
+    rate = _rates[kernel] = n / best
+    return rate
+
+def calibrated_rates():
+    """Taxas de todos os kernels (calibrando o que faltar), para repassar a processos novos."""
+    return {kernel: calibrate(kernel) for kernel in KERNELS}
+
+def configure_code(kernel, work=WORK_TIME):
+    """Kernel e modo de trabalho num só código, o campo peso_cpu do CMD_CONFIGURE."""
+    return KERNELS.index(kernel) + len(KERNELS) * WORK_MODES.index(work)
+
+def simulate_cpu_work(seconds, peso_cpu, capacity, kernel=KERNEL_PYTHON, work=WORK_TIME):
+        """
+        Simula trabalho CPU-bound durante 'seconds' segundos com o kernel escolhido.
+        Com WORK_TIME (padrão) o que fica fixo é o tempo de serviço, não a quantidade de trabalho:
+        o laço termina no prazo de relógio (tempo_exec), como o modelo do Master e do SimMaster
+        supõe, e o kernel roda em blocos de ~CHUNK_SECONDS dimensionados pela taxa calibrada (calibrate), com o último bloco
+        cortado no tempo que falta; o tempo de serviço erra por menos de um bloco, qualquer que
+        seja o host, a capacidade ou o peso.
+        peso_cpu e capacity não mudam o trabalho feito, só a escala do valor retornado: as
+        iterações executadas, normalizadas pela taxa do host, vezes peso_cpu * capacity * UNIT_OPS.
+        Esse valor só é determinístico sem disputa (seconds * peso_cpu * capacity * UNIT_OPS); com
+        disputa pelo GIL ou por núcleos ele cai e varia de execução para execução, e serve para
+        medir a vazão de CPU obtida (ex.: benchmarks.py slot_scaling), não como trabalho garantido.
+        Com WORK_FIXED o que fica fixo é o trabalho: round(seconds * taxa calibrada) iterações,
+        as mesmas em toda tarefa com esse 'seconds' (os workers de um pool recebem as taxas do
+        pai), e o retorno é sempre seconds * peso_cpu * capacity * UNIT_OPS. Só sem disputa a
+        tarefa leva 'seconds'; com disputa ela demora mais. As taxas são medidas no host, então a
+        quantidade de iterações (e o tempo) muda de uma máquina para outra.
+        """
+        rate = calibrate(kernel)
+        fn = _KERNELS[kernel]
+        chunk = max(1, int(rate * CHUNK_SECONDS))
+        if work == WORK_FIXED:
+            total = max(1, round(seconds * rate))
+            done = 0
+            while done < total:
+                n = min(chunk, total - done)
+                fn(n)
+                done += n
+            return total / rate * peso_cpu * capacity * UNIT_OPS
+        end = time.perf_counter() + seconds
+
+        done = 0
+        while True:
+            left = end - time.perf_counter()
+            if left <= 0:
+                break
+            n = min(chunk, max(1, int(left * rate)))
+            fn(n)
+            done += n
+        return done / rate * peso_cpu * capacity * UNIT_OPS
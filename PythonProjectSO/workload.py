@@ -0,0 +1,217 @@
+# workload.py
+import itertools
+import json
+import math
+import random
+from helpers import load_input_stream
+
+# Cargas sintéticas e reprodução de traces. Tudo é gerado sob demanda (geradores): milhões de
+# tarefas não ocupam memória, e a mesma semente produz a mesma sequência em Master e SimMaster.
+# Cada tarefa traz 'arrival' (segundos desde o início da execução); com realtime=True os dois
+# motores usam esse instante no lugar do intervalo exponencial de arrival_mean.
+
+TIPOS = ("visao_computacional", "nlp", "voz")
+PRIORIDADES = (1, 2, 3)
+SERVICE_MEAN = 2.0   # tempo_exec médio (s) das cargas pré-definidas
+
+# -------------------------
+# processos de chegada: geradores (infinitos) de instantes crescentes, em segundos
+# -------------------------
+def poisson_arrivals(rate, seed=None):
+    """Chegadas de Poisson com 'rate' tarefas/s (intervalos exponenciais)."""
+    rng = random.Random(seed)
+    t = 0.0
+    while True:
+        t += rng.expovariate(rate)
+        yield t
+
+def mmpp_arrivals(rates, mean_durations, seed=None):
+    """
+    Processo de Poisson modulado por Markov: o processo fica no estado i por um tempo exponencial
+    de média mean_durations[i], gerando chegadas com taxa rates[i], e passa ao estado seguinte
+    (em ciclo). Estados de taxa alta e curta duração produzem rajadas.
+    """
+    rng = random.Random(seed)
+    t = 0.0
+    for state in itertools.cycle(range(len(rates))):
+        end = t + rng.expovariate(1.0 / mean_durations[state])
+        rate = rates[state]
+        if rate > 0:
+            # sem memória: a chegada que passaria do fim do estado é simplesmente descartada
+            while True:
+                t += rng.expovariate(rate)
+                if t >= end:
+                    break
+                yield t
+        t = end
+
+def on_off_arrivals(rate, on_mean, off_mean, seed=None):
+    """Rajadas liga/desliga: Poisson com 'rate' durante ~on_mean s, silêncio durante ~off_mean s."""
+    return mmpp_arrivals((rate, 0.0), (on_mean, off_mean), seed)
+
+def diurnal_arrivals(mean_rate, amplitude=0.8, period=86400.0, seed=None):
+    """
+    Poisson não homogêneo com curva diária: taxa(t) = mean_rate * (1 - amplitude * cos(2πt / period)),
+    mínima no início do período e máxima na metade. Gerado por afinamento (thinning).
+    """
+    rng = random.Random(seed)
+    peak = mean_rate * (1.0 + amplitude)
+    t = 0.0
+    while True:
+        t += rng.expovariate(peak)
+        rate = mean_rate * (1.0 - amplitude * math.cos(2.0 * math.pi * t / period))
+        if rng.random() * peak < rate:
+            yield t
+
+# -------------------------
+# distribuições de tempo_exec: cada uma retorna uma função rng -> segundos
+# -------------------------
+def fixed_service(value):
+    return lambda rng: value
+
+def exponential_service(mean):
+    return lambda rng: rng.expovariate(1.0 / mean)
+
+def lognormal_service(mean, sigma=1.0):
+    """Lognormal com a média pedida (mu ajustado para mean = exp(mu + sigma²/2))."""
+    mu = math.log(mean) - sigma * sigma / 2.0
+    return lambda rng: rng.lognormvariate(mu, sigma)
+
+def pareto_service(alpha, minimum, cap=None):
+    """Pareto (cauda pesada): P(X > x) = (minimum / x) ** alpha; alpha <= 2 tem variância infinita."""
+    if cap is None:
+        return lambda rng: minimum * rng.paretovariate(alpha)
+    return lambda rng: min(cap, minimum * rng.paretovariate(alpha))
+
+# -------------------------
+# tarefas
+# -------------------------
+def synthetic_tasks(n, arrivals, service, seed=None, tipos=TIPOS, prioridades=PRIORIDADES, first_id=1):
+    """
+    Gera n tarefas (None = sem fim) no formato das requisições de entrada, com 'arrival' tirado
+    do processo 'arrivals' e 'tempo_exec' da distribuição 'service'.
+    """
+    rng = random.Random(seed)
+    ids = range(first_id, first_id + n) if n is not None else itertools.count(first_id)
+    for task_id, at in zip(ids, arrivals):
+        yield {
+            "id": task_id,
+            "tipo": rng.choice(tipos),
+            "prioridade": rng.choice(prioridades),
+            "tempo_exec": service(rng),
+            "arrival": at,
+        }
+
+def make_workload(name, n, seed=42, arrival_mean=1.0, service_mean=SERVICE_MEAN):
+    """
+    Cargas pré-definidas com a mesma taxa média (1 / arrival_mean):
+      poisson    - chegadas de Poisson, tempo_exec exponencial
+      bursty     - rajadas liga/desliga (4x a taxa média durante 1/4 do tempo)
+      diurnal    - curva diária comprimida num período de 1000 chegadas médias
+      heavy_tail - chegadas de Poisson, tempo_exec Pareto (alpha 1.5)
+    """
+    rate = 1.0 / arrival_mean
+    # sementes separadas: trocar o processo de chegada não muda os tempos de execução
+    if name == "poisson":
+        arrivals = poisson_arrivals(rate, seed)
+    elif name == "bursty":
+        arrivals = on_off_arrivals(4 * rate, 10 * arrival_mean, 30 * arrival_mean, seed)
+    elif name == "diurnal":
+        arrivals = diurnal_arrivals(rate, period=1000 * arrival_mean, seed=seed)
+    elif name == "heavy_tail":
+        arrivals = poisson_arrivals(rate, seed)
+    else:
+        raise ValueError("Unknown workload: " + str(name))
+    if name == "heavy_tail":
+        # média de uma Pareto: minimum * alpha / (alpha - 1)
+        service = pareto_service(1.5, service_mean / 3.0)
+    else:
+        service = exponential_service(service_mean)
+    return synthetic_tasks(n, arrivals, service, seed=None if seed is None else seed + 1)
+
+WORKLOADS = ("poisson", "bursty", "diurnal", "heavy_tail")
+
+# -------------------------
+# servidores com perfil por tipo
+# -------------------------
+def specialized_servers(n, capacity=4, fast=2.0, slow=0.75, tipos=TIPOS, first_id=1):
+    """
+    n servidores, o i-ésimo especializado em tipos[i % len(tipos)]: speedup 'fast' no seu tipo e
+    'slow' nos demais (tempo_exec / speedup). Formato de "servidores" da entrada.
+    """
+    return [{"id": first_id + i, "capacidade": capacity,
+             "speedup": {t: (fast if t == tipos[i % len(tipos)] else slow) for t in tipos}}
+            for i in range(n)]
+
+# -------------------------
+# fonte com pressão de volta
+# -------------------------
+class BackpressureSource:
+    """
+    Envolve uma fonte de tarefas com 'arrival' e atende ao sinal de pressão do Master
+    (admission.AdmissionControl): enquanto backpressure(True) estiver valendo, os intervalos
+    entre chegadas ficam 'slowdown' vezes maiores, como um cliente que recua quando o servidor
+    avisa que está cheio. Tarefas sem 'arrival' passam sem alteração.
+    """
+
+    def __init__(self, tasks, slowdown=4.0):
+        self.tasks = iter(tasks)
+        self.slowdown = slowdown
+        self.throttled = False
+        self.shift = 0.0        # atraso acumulado pelas chegadas esticadas
+        self.last = None        # 'arrival' original da tarefa anterior
+        self.signals = 0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        t = next(self.tasks)
+        if "arrival" in t:
+            at = float(t["arrival"])
+            if self.throttled and self.last is not None:
+                self.shift += (at - self.last) * (self.slowdown - 1.0)
+            self.last = at
+            t["arrival"] = at + self.shift
+        return t
+
+    def backpressure(self, on):
+        self.throttled = on
+        self.signals += 1
+
+# -------------------------
+# traces
+# -------------------------
+def replay_trace(path, speedup=1.0, field="timestamp"):
+    """
+    Reproduz um trace gravado: arquivo no formato de helpers.load_input_stream em que cada
+    requisição traz o instante registrado em 'field' (segundos, ex.: epoch). Retorna
+    (servidores, gerador de tarefas) com 'arrival' relativo à primeira requisição e dividido
+    por 'speedup' (2.0 = reproduz duas vezes mais rápido).
+    """
+    servers, tasks = load_input_stream(path)
+    return servers, _replay(tasks, speedup, field)
+
+def _replay(tasks, speedup, field):
+    origin = None
+    for t in tasks:
+        ts = float(t.pop(field))
+        if origin is None:
+            origin = ts
+        t["arrival"] = (ts - origin) / speedup
+        yield t
+
+def write_trace(path, servers, tasks, field="timestamp", origin=0.0):
+    """
+    Grava tarefas com 'arrival' (ex.: uma carga sintética) como trace .ndjson reproduzível por
+    replay_trace, uma requisição por linha. Retorna quantas foram gravadas.
+    """
+    count = 0
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(json.dumps({"servidores": servers}) + "\n")
+        for t in tasks:
+            rec = dict(t)
+            rec[field] = origin + rec.pop("arrival")
+            f.write(json.dumps(rec) + "\n")
+            count += 1
+    return count